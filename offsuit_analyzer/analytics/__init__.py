@@ -1,25 +1,96 @@
 # TODO: Add proper interface definitions for analytics services
 
-from . import placement_analyzer, win_rate_analyzer, roi_analyzer, trueskill_analyzer, player_weighted_spring_graph, player_disconnectedness
+import importlib
+from typing import Dict, Tuple
 
-# Import functions directly into the module namespace
-build_players_outlasted_leaderboard = placement_analyzer.build_players_outlasted_leaderboard
-build_1st_place_win_leaderboard = win_rate_analyzer.build_1st_place_win_leaderboard
-build_itm_percent_leaderboard = placement_analyzer.build_itm_percent_leaderboard
+# The submodules pull in pandas, networkx, matplotlib, scipy and trueskill, so nothing is imported
+# here. Each name below is loaded from its submodule the first time it is used (PEP 562).
+_SUBMODULES = {
+    'rounds_frame', 'placement_analyzer', 'win_rate_analyzer', 'roi_analyzer', 'placement_metrics',
+    'trueskill_analyzer', 'weng_lin_engine', 'trueskill_checkpoints', 'trueskill_history', 'trueskill_sweep',
+    'player_weighted_spring_graph', 'player_disconnectedness'
+}
+
+_EXPORTS: Dict[str, Tuple[str, str]] = {
+    'RoundsFrame': ('rounds_frame', 'RoundsFrame'),
+    'PlacementMetrics': ('placement_metrics', 'PlacementMetrics'),
+    'PlacementMetricsInput': ('placement_metrics', 'PlacementMetricsInput'),
+    'compute_placement_metrics': ('placement_metrics', 'compute_placement_metrics'),
+    'build_combined_placement_leaderboard': ('placement_metrics', 'build_combined_placement_leaderboard'),
+    'build_players_outlasted_leaderboard': ('placement_analyzer', 'build_players_outlasted_leaderboard'),
+    'build_1st_place_win_leaderboard': ('win_rate_analyzer', 'build_1st_place_win_leaderboard'),
+    'build_itm_percent_leaderboard': ('placement_analyzer', 'build_itm_percent_leaderboard'),
+    'build_player_round_results': ('placement_analyzer', 'build_player_round_results'),
+
+    'build_roi_leaderboard': ('roi_analyzer', 'build_roi_leaderboard'),
+    'generate_graph_image_buffer': ('player_weighted_spring_graph', 'generate_graph_image_buffer'),
+    'compute_graph_layout': ('player_weighted_spring_graph', 'compute_graph_layout'),
+    'render_graph': ('player_weighted_spring_graph', 'render_graph'),
+    'highlight_player': ('player_weighted_spring_graph', 'highlight_player'),
+    'build_ego_graph': ('player_weighted_spring_graph', 'build_ego_graph'),
+    'render_ego_graph': ('player_weighted_spring_graph', 'render_ego_graph'),
+    'build_graph_export': ('player_weighted_spring_graph', 'build_graph_export'),
+    'compute_community_labels': ('player_disconnectedness', 'compute_community_labels'),
+    'build_player_graph': ('player_weighted_spring_graph', 'build_player_graph'),
+    'build_player_adjacency': ('player_weighted_spring_graph', 'build_player_adjacency'),
+    'get_community_avg_disconnectedness_df': ('player_disconnectedness', 'get_community_avg_disconnectedness_df'),
+    'get_community_disconnectedness_over_time_df': ('player_disconnectedness', 'get_community_disconnectedness_over_time_df'),
+
+    'build_trueskill_leaderboard': ('trueskill_analyzer', 'build_trueskill_leaderboard'),
+    'WengLinEngine': ('weng_lin_engine', 'WengLinEngine'),
+    'refresh_trueskill_ratings': ('trueskill_checkpoints', 'refresh_trueskill_ratings'),
+    'load_trueskill_ratings': ('trueskill_checkpoints', 'load_trueskill_ratings'),
+    'build_incremental_trueskill_leaderboard': ('trueskill_checkpoints', 'build_incremental_trueskill_leaderboard'),
+    'trueskill_leaderboard_to_dataframe': ('trueskill_analyzer', 'leaderboard_to_dataframe'),
+    'load_rating_history': ('trueskill_history', 'load_rating_history'),
+    'run_trueskill_sweep': ('trueskill_sweep', 'run_trueskill_sweep'),
+}
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        module_name, attribute = _EXPORTS[name]
+        value = getattr(importlib.import_module(f"{__name__}.{module_name}"), attribute)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f"{__name__}.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | _SUBMODULES)
 
-build_roi_leaderboard = roi_analyzer.build_roi_leaderboard
-generate_graph_image_buffer = player_weighted_spring_graph.generate_graph_image_buffer
-build_player_graph = player_weighted_spring_graph.build_player_graph
-get_community_avg_disconnectedness_df = player_disconnectedness.get_community_avg_disconnectedness_df
 
-build_trueskill_leaderboard= trueskill_analyzer.build_trueskill_leaderboard
 __all__ = [
+    'RoundsFrame',
+    'PlacementMetrics',
+    'compute_placement_metrics',
+    'build_combined_placement_leaderboard',
     'build_players_outlasted_leaderboard',
     'build_roi_leaderboard',
     'build_trueskill_leaderboard',
+    'WengLinEngine',
+    'refresh_trueskill_ratings',
+    'load_trueskill_ratings',
+    'build_incremental_trueskill_leaderboard',
+    'trueskill_leaderboard_to_dataframe',
+    'load_rating_history',
+    'run_trueskill_sweep',
     'build_1st_place_win_leaderboard',
     'build_itm_percent_leaderboard',
+    'build_player_round_results',
     'generate_graph_image_buffer',
+    'compute_graph_layout',
+    'render_graph',
+    'highlight_player',
+    'build_ego_graph',
+    'render_ego_graph',
+    'build_graph_export',
+    'compute_community_labels',
     'build_player_graph',
-    'get_community_avg_disconnectedness_df'
+    'build_player_adjacency',
+    'get_community_avg_disconnectedness_df',
+    'get_community_disconnectedness_over_time_df'
 ]
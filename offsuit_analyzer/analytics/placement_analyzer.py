@@ -1,7 +1,7 @@
+import numpy as np
 import pandas as pd
-from collections import defaultdict
-from typing import List
-from offsuit_analyzer.datamodel import Round
+from offsuit_analyzer.analytics.rounds_frame import RoundsInput, as_rounds_frame, days_to_round_date, MISSING_ROUND_DATE, INVALID_ROUND_DATE
+from offsuit_analyzer.analytics.placement_metrics import PlacementMetrics, PlacementMetricsInput, compute_placement_metrics, players_outlasted_per_entry
 
 
 def _calculate_players_outlasted(placement: int, total_players: int) -> float:
@@ -14,35 +14,20 @@ def _calculate_players_outlasted(placement: int, total_players: int) -> float:
     return round((1 - (placement - 1) / (total_players - 1)) * 100, 2)
 
 
-def build_players_outlasted_leaderboard(rounds: List[Round], min_rounds_required: int) -> pd.DataFrame:
+def build_players_outlasted_leaderboard(rounds: PlacementMetricsInput, min_rounds_required: int) -> pd.DataFrame:
     """
     Calculate each player's average percentage of players outlasted across all rounds.
     100% means always outlasting everyone (1st place), 0% means never outlasting anyone (last place)
     """
-    player_stats = defaultdict(lambda: {"TotalOutlasted": 0, "RoundsPlayed": 0})
+    metrics = compute_placement_metrics(rounds)
+    qualified = metrics.rounds_played >= min_rounds_required
+    rounds_played = metrics.rounds_played[qualified]
 
-    for round_obj in rounds:
-        # Sort players by points to determine placements
-        sorted_players = sorted(round_obj.players, key=lambda p: p.points, reverse=True)
-        total_players = len(sorted_players)
-        
-        for placement, player in enumerate(sorted_players, 1):
-            outlasted = _calculate_players_outlasted(placement, total_players)
-            player_stats[player.player_name]["TotalOutlasted"] += outlasted
-            player_stats[player.player_name]["RoundsPlayed"] += 1
-
-    leaderboard_records = []
-
-    for player_name, stats in player_stats.items():
-        if stats["RoundsPlayed"] >= min_rounds_required:
-            avg_outlasted = round(stats["TotalOutlasted"] / stats["RoundsPlayed"], 2)
-            leaderboard_records.append({
-                "Player": player_name,
-                "Players Outlasted": avg_outlasted,  # Store as number
-                "Rounds Played": stats["RoundsPlayed"]
-            })
-
-    leaderboard_df = pd.DataFrame(leaderboard_records)
+    leaderboard_df = pd.DataFrame({
+        "Player": np.array(metrics.player_names, dtype=object)[qualified],
+        "Players Outlasted": np.round(metrics.outlasted_sum[qualified] / rounds_played, 2),  # Store as number
+        "Rounds Played": rounds_played
+    })
     if not leaderboard_df.empty:
         leaderboard_df.sort_values("Players Outlasted", ascending=False, inplace=True)
         leaderboard_df.reset_index(drop=True, inplace=True)
@@ -51,44 +36,58 @@ def build_players_outlasted_leaderboard(rounds: List[Round], min_rounds_required
     return leaderboard_df
 
 
-def build_itm_percent_leaderboard(rounds: List[Round], min_rounds: int, percent_for_itm: float) -> pd.DataFrame:
+def build_itm_percent_leaderboard(rounds: PlacementMetricsInput, min_rounds: int, percent_for_itm: float) -> pd.DataFrame:
     """
     Build a leaderboard showing percentage of times each player finishes in top X percentile.
     Only includes players with more than `min_rounds` played.
     
     Args:
-        rounds: List of Round objects
+        rounds: List of Round objects, a RoundsFrame or precomputed PlacementMetrics
         min_rounds: Minimum rounds required to be included in leaderboard
         percent_for_itm: The percentile threshold (e.g., 20.0 for top 20%)
     """
-    stats = defaultdict(lambda: {"rounds": 0, "itm_finishes": 0})
-    
-    for round_obj in rounds:
-        # Sort players by points to determine placements
-        sorted_players = sorted(round_obj.players, key=lambda p: p.points, reverse=True)
-        total_players = len(sorted_players)
-        
-        for placement, player in enumerate(sorted_players, 1):
-            stats[player.player_name]["rounds"] += 1
-            outlasted = _calculate_players_outlasted(placement, total_players)
-            if outlasted >= (100 - percent_for_itm):
-                stats[player.player_name]["itm_finishes"] += 1
+    if isinstance(rounds, PlacementMetrics):
+        # only the itm threshold matters here, keep the roi settings so cached metrics get reused
+        metrics = compute_placement_metrics(rounds, percent_for_itm, rounds.payout_percent, rounds.steepness)
+    else:
+        metrics = compute_placement_metrics(rounds, percent_for_itm=percent_for_itm)
+    qualified = metrics.rounds_played >= min_rounds
+    rounds_played = metrics.rounds_played[qualified]
+    itm_finishes = metrics.itm_finishes[qualified]
 
-    leaderboard_records = []
-    for player, player_stats in stats.items():
-        if player_stats["rounds"] >= min_rounds:
-            itm_rate = round((player_stats["itm_finishes"] / player_stats["rounds"]) * 100, 2)
-            leaderboard_records.append({
-                "Player": player,
-                "ITM %": itm_rate,  # Store as number
-                "ITM Finishes": player_stats["itm_finishes"],
-                "Rounds Played": player_stats["rounds"]
-            })
-
-    leaderboard_df = pd.DataFrame(leaderboard_records)
+    leaderboard_df = pd.DataFrame({
+        "Player": np.array(metrics.player_names, dtype=object)[qualified],
+        "ITM %": np.round(itm_finishes / rounds_played * 100, 2),  # Store as number
+        "ITM Finishes": itm_finishes,
+        "Rounds Played": rounds_played
+    })
     if not leaderboard_df.empty:
         leaderboard_df.sort_values("ITM %", ascending=False, inplace=True)
         leaderboard_df.reset_index(drop=True, inplace=True)
         # Format as percentage after sorting
         leaderboard_df["ITM %"] = leaderboard_df["ITM %"].apply(lambda x: f"{x:.2f}%")
     return leaderboard_df
+
+
+def build_player_round_results(rounds: RoundsInput, player_name: str) -> pd.DataFrame:
+    """Every round player_name played with their finish, newest first. rounds only needs to hold that player's rounds."""
+    frame = as_rounds_frame(rounds)
+    try:
+        player_id = frame.player_names.index(player_name)
+    except ValueError:
+        return pd.DataFrame(columns=["Date", "Bar ID", "Round ID", "Points", "Place", "Field Size", "Players Outlasted"])
+
+    entries = np.flatnonzero(frame.player_ids == player_id)
+    entry_rounds = frame.entry_round_index()[entries]
+    round_dates = frame.round_dates[entry_rounds]
+    results_df = pd.DataFrame({
+        "Date": [None if d in (MISSING_ROUND_DATE, INVALID_ROUND_DATE) else days_to_round_date(d) for d in round_dates],
+        "Bar ID": [frame.bar_ids[code] for code in frame.round_bar_codes[entry_rounds]],
+        "Round ID": [frame.round_ids[i] for i in entry_rounds],
+        "Points": frame.points[entries],
+        "Place": frame.placements[entries],
+        "Field Size": frame.field_sizes[entries],
+        "Players Outlasted": players_outlasted_per_entry(frame)[entries]
+    })
+    order = np.argsort(-round_dates.astype(np.int64), kind="stable")
+    return results_df.iloc[order].reset_index(drop=True)
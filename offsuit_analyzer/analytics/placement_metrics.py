@@ -0,0 +1,181 @@
+"""
+Single pass placement metrics engine.
+
+The players outlasted, ITM, ROI and first place leaderboards all derive from the same per round
+placements, so they are accumulated together in one traversal of a RoundsFrame and every
+leaderboard is a view over the result.
+"""
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from offsuit_analyzer.analytics.rounds_frame import RoundsFrame, RoundsInput, as_rounds_frame
+from offsuit_analyzer.config import config
+
+
+def _calculate_num_paid(num_players: int, payout_percent: float) -> int:
+    if num_players <= 0:
+        return 0
+    return max(2, math.ceil(num_players * payout_percent))
+
+
+def _generate_normalized_payouts(num_players: int, payout_percent: float, steepness: float) -> List[float]:
+    """
+    Generate payout fractions summing to 1.0, divided among top N places.
+    """
+    num_paid = _calculate_num_paid(num_players, payout_percent)
+    if num_paid == 0:
+        return []
+
+    weights = [1 / (place ** steepness) for place in range(1, num_paid + 1)]
+    total_weight = sum(weights)
+    payouts = [w / total_weight for w in weights]
+
+    # Correction for rounding
+    correction = 1.0 - sum(payouts)
+    payouts[0] += correction
+
+    return payouts
+
+@lru_cache(maxsize=config.PAYOUT_TABLE_CACHE_SIZE)
+def get_net_roi_table(num_players: int, payout_percent: float, steepness: float) -> np.ndarray:
+    """
+    Net ROI for every placement 1..num_players of a round with this payout structure.
+    Cached per (num_players, payout_percent, steepness) and read only since the arrays are shared.
+    """
+    payouts = _generate_normalized_payouts(num_players, payout_percent, steepness)
+    table = np.full(num_players, -1.0)  # No payout = full loss
+    num_paid = min(len(payouts), num_players)
+    table[:num_paid] = np.array(payouts[:num_paid]) * num_players - 1.0
+    table.flags.writeable = False
+    return table
+
+
+@lru_cache(maxsize=config.PAYOUT_TABLE_CACHE_SIZE)
+def get_net_roi_lookup(max_players: int, payout_percent: float, steepness: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Every net ROI table for field sizes 0..max_players laid end to end.
+    The ROI of placement p in a field of n is flat_table[table_offsets[n] + p - 1].
+    """
+    table_offsets = np.zeros(max_players + 1, dtype=np.int64)
+    np.cumsum(np.arange(max_players), out=table_offsets[1:])
+    flat_table = np.concatenate([get_net_roi_table(n, payout_percent, steepness) for n in range(max_players + 1)])
+    table_offsets.flags.writeable = False
+    flat_table.flags.writeable = False
+    return table_offsets, flat_table
+
+
+def players_outlasted_per_entry(frame: RoundsFrame) -> np.ndarray:
+    """
+    Percentage of players outlasted by every entry of the frame.
+    100 means outlasted everyone (1st place), 0 means outlasted no one (last place).
+    """
+    placements = frame.placements.astype(np.float64)
+    field_sizes = frame.field_sizes.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        outlasted = np.round((1 - (placements - 1) / (field_sizes - 1)) * 100, 2)
+    return np.where(field_sizes <= 1, 100.0, outlasted)
+
+
+def net_roi_per_entry(frame: RoundsFrame, payout_percent: float, steepness: float) -> np.ndarray:
+    """Net ROI of every entry of the frame as one gather from the cached payout tables."""
+    if frame.num_entries == 0:
+        return np.zeros(0)
+    table_offsets, flat_table = get_net_roi_lookup(int(frame.field_sizes.max()), payout_percent, steepness)
+    return flat_table[table_offsets[frame.field_sizes] + frame.placements - 1]
+
+
+@dataclass(frozen=True, eq=False)
+class PlacementMetrics:
+    frame: RoundsFrame
+    percent_for_itm: float
+    payout_percent: float
+    steepness: float
+
+    # per player accumulators indexed by frame player id
+    rounds_played: np.ndarray
+    outlasted_sum: np.ndarray
+    itm_finishes: np.ndarray
+    net_roi_sum: np.ndarray
+    wins: np.ndarray
+
+    @property
+    def player_names(self) -> List[str]:
+        return self.frame.player_names
+
+    def matches(self, percent_for_itm: float, payout_percent: float, steepness: float) -> bool:
+        return (self.percent_for_itm, self.payout_percent, self.steepness) == (percent_for_itm, payout_percent, steepness)
+
+
+PlacementMetricsInput = Union[RoundsInput, PlacementMetrics]
+
+
+def compute_placement_metrics(rounds: PlacementMetricsInput,
+                              percent_for_itm: float = config.PERCENT_FOR_ITM,
+                              payout_percent: float = config.PERCENT_FOR_ROI,
+                              steepness: float = config.STEEPNESS_FOR_ROI) -> PlacementMetrics:
+    """
+    Fill every per player accumulator from one pass over the frame.
+    Passing in PlacementMetrics computed with the same settings returns them as is.
+    """
+    if isinstance(rounds, PlacementMetrics):
+        if rounds.matches(percent_for_itm, payout_percent, steepness):
+            return rounds
+        rounds = rounds.frame
+
+    frame = as_rounds_frame(rounds)
+    player_ids = frame.player_ids
+    num_players = frame.num_players
+
+    outlasted = players_outlasted_per_entry(frame)
+    net_roi = net_roi_per_entry(frame, payout_percent, steepness)
+    itm_entries = outlasted >= (100 - percent_for_itm)
+    # Entries are sorted by points inside each round so the winner is always placement 1
+    winning_entries = frame.placements == 1
+
+    return PlacementMetrics(
+        frame=frame,
+        percent_for_itm=percent_for_itm,
+        payout_percent=payout_percent,
+        steepness=steepness,
+        rounds_played=np.bincount(player_ids, minlength=num_players),
+        outlasted_sum=np.bincount(player_ids, weights=outlasted, minlength=num_players),
+        itm_finishes=np.bincount(player_ids[itm_entries], minlength=num_players),
+        net_roi_sum=np.bincount(player_ids, weights=net_roi, minlength=num_players),
+        wins=np.bincount(player_ids[winning_entries], minlength=num_players),
+    )
+
+
+def build_combined_placement_leaderboard(rounds: PlacementMetricsInput, min_rounds_required: int,
+                                         percent_for_itm: float = config.PERCENT_FOR_ITM,
+                                         payout_percent: float = config.PERCENT_FOR_ROI,
+                                         steepness: float = config.STEEPNESS_FOR_ROI) -> pd.DataFrame:
+    """
+    Every placement based stat for every qualifying player in one table, sorted by players outlasted.
+    """
+    metrics = compute_placement_metrics(rounds, percent_for_itm, payout_percent, steepness)
+    rounds_played = metrics.rounds_played
+    qualified = rounds_played >= min_rounds_required
+    played = rounds_played[qualified]
+
+    leaderboard_df = pd.DataFrame({
+        "Player": np.array(metrics.player_names, dtype=object)[qualified],
+        "Players Outlasted": np.round(metrics.outlasted_sum[qualified] / played, 2),
+        "ITM %": np.round(metrics.itm_finishes[qualified] / played * 100, 2),
+        "ITM Finishes": metrics.itm_finishes[qualified],
+        "AVG ROI": np.round(metrics.net_roi_sum[qualified] / played * 100, 2),
+        "Win Rate": np.round(metrics.wins[qualified] / played * 100, 2),
+        "Wins": metrics.wins[qualified],
+        "Rounds Played": played
+    })
+    if not leaderboard_df.empty:
+        leaderboard_df.sort_values("Players Outlasted", ascending=False, inplace=True)
+        leaderboard_df.reset_index(drop=True, inplace=True)
+        # Format as percentage after sorting
+        for column in ("Players Outlasted", "ITM %", "AVG ROI", "Win Rate"):
+            leaderboard_df[column] = leaderboard_df[column].apply(lambda x: f"{x:.2f}%")
+    return leaderboard_df
@@ -1,13 +1,38 @@
 import networkx as nx
 import pandas as pd
 import numpy as np
-from typing import List
+import scipy.sparse as sp
+from concurrent.futures import ProcessPoolExecutor
+from scipy.sparse.csgraph import dijkstra
+from typing import Dict, List
 import community as community_louvain
 from offsuit_analyzer.datamodel import Round
+from offsuit_analyzer.analytics.rounds_frame import RoundsInput, as_rounds_frame, days_to_round_date, MISSING_ROUND_DATE, INVALID_ROUND_DATE
 from offsuit_analyzer import analytics
+from offsuit_analyzer.config import config
 
+DISCONNECTEDNESS_BACKENDS = ("csgraph", "landmark", "networkx")
 
-def compute_disconnectedness_leaderboard_df(G: nx.Graph) -> pd.DataFrame:
+
+def compute_disconnectedness_leaderboard_df(G: nx.Graph, backend: str = None) -> pd.DataFrame:
+    backend = backend or config.DISCONNECTEDNESS_BACKEND
+    if backend == "networkx":
+        farness = _networkx_farness(G)
+    elif backend == "csgraph":
+        farness = dict(zip(G.nodes(), _csgraph_farness(_edge_length_matrix(G)).tolist()))
+    elif backend == "landmark":
+        farness = dict(zip(G.nodes(), _landmark_farness(_edge_length_matrix(G), config.DISCONNECTEDNESS_LANDMARKS).tolist()))
+    else:
+        raise ValueError(f"Unknown disconnectedness backend {backend!r}, expected one of {DISCONNECTEDNESS_BACKENDS}")
+
+    vals = np.array(list(farness.values()), dtype=float)
+    mn, mx = vals.min(), vals.max()
+    norm = {k: 0.0 for k in farness} if mx == mn else {k: (v - mn) / (mx - mn) for k, v in farness.items()}
+    df = pd.DataFrame(list(norm.items()), columns=["Player", "Disconnectedness"])
+    return df.sort_values("Disconnectedness", ascending=False).reset_index(drop=True)
+
+
+def _networkx_farness(G: nx.Graph) -> Dict[str, float]:
     def edge_length(u, v, d):
         w = d.get('weight', 1.0)
         return 1.0 / w if w > 0 else 1e9
@@ -24,12 +49,70 @@ def compute_disconnectedness_leaderboard_df(G: nx.Graph) -> pd.DataFrame:
         else:
             all_lengths = [lengths[v] for v in nodes]
         farness[u] = sum(all_lengths) / (n - 1)
+    return farness
+
+
+def _edge_length_matrix(G: nx.Graph) -> sp.csr_matrix:
+    """CSR matrix of 1/weight edge lengths in G.nodes() order, reusing the sparse adjacency the graph was built from."""
+    adjacency = G.graph.get("adjacency")
+    if adjacency is not None and adjacency.player_names == list(G.nodes()):
+        weights = adjacency.matrix.astype(np.float64)
+    else:
+        weights = nx.to_scipy_sparse_array(G, weight="weight", dtype=np.float64, format="csr")
+    lengths = sp.csr_matrix(weights, copy=True)
+    positive = lengths.data > 0
+    lengths.data[positive] = 1.0 / lengths.data[positive]
+    lengths.data[~positive] = 1e9
+    return lengths
+
+
+def _farness_from_distances(distances: np.ndarray, n: int) -> np.ndarray:
+    """Same rule as the networkx loop: unreachable players count as 10x the farthest reachable one."""
+    reachable = np.isfinite(distances)
+    big = np.where(reachable, distances, 0).max(axis=1, keepdims=True) * 10
+    return np.where(reachable, distances, big).sum(axis=1) / (n - 1)
+
+
+_worker_lengths: sp.csr_matrix = None
+
+
+def _init_farness_worker(lengths: sp.csr_matrix) -> None:
+    global _worker_lengths
+    _worker_lengths = lengths
+
+
+def _farness_chunk(sources: np.ndarray) -> np.ndarray:
+    distances = dijkstra(_worker_lengths, directed=False, indices=sources)
+    return _farness_from_distances(distances, _worker_lengths.shape[0])
 
-    vals = np.array(list(farness.values()), dtype=float)
-    mn, mx = vals.min(), vals.max()
-    norm = {k: 0.0 for k in farness} if mx == mn else {k: (v - mn) / (mx - mn) for k, v in farness.items()}
-    df = pd.DataFrame(list(norm.items()), columns=["Player", "Disconnectedness"])
-    return df.sort_values("Disconnectedness", ascending=False).reset_index(drop=True)
+
+def _csgraph_farness(lengths: sp.csr_matrix, max_workers: int = None) -> np.ndarray:
+    """Exact farness of every node, dijkstra runs over chunks of sources so only a chunk x n block is dense at once."""
+    max_workers = max_workers or config.DISCONNECTEDNESS_MAX_WORKERS
+    n = lengths.shape[0]
+    chunk_size = config.DISCONNECTEDNESS_SOURCE_CHUNK_SIZE
+    chunks = [np.arange(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+    if max_workers <= 1 or len(chunks) <= 1:
+        _init_farness_worker(lengths)
+        results = [_farness_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_farness_worker, initargs=(lengths,)) as executor:
+            results = list(executor.map(_farness_chunk, chunks))
+    return np.concatenate(results) if results else np.zeros(0)
+
+
+def _landmark_farness(lengths: sp.csr_matrix, num_landmarks: int, seed: int = 42) -> np.ndarray:
+    """
+    Farness estimated from the distances to a random sample of landmark players, which on an undirected
+    graph are the distances from them. Falls back to the exact computation when the sample would be most of the graph.
+    """
+    n = lengths.shape[0]
+    if num_landmarks >= n:
+        return _csgraph_farness(lengths)
+    landmarks = np.sort(np.random.default_rng(seed).choice(n, size=num_landmarks, replace=False))
+    distances = dijkstra(lengths, directed=False, indices=landmarks).T  # node x landmark
+    # scale the sampled sum up to the whole player pool
+    return _farness_from_distances(distances, n) * (n / num_landmarks)
 
 
 def compute_community_labels(G: nx.Graph) -> pd.DataFrame:
@@ -81,10 +164,10 @@ def get_community_detection_df(rounds: List[Round]) -> pd.DataFrame:
     G = analytics.build_player_graph(rounds)
     return compute_community_labels(G)
 
-def get_community_avg_disconnectedness_df(rounds: List[Round]) -> pd.DataFrame:
-    G = analytics.build_player_graph(rounds)
+def get_community_avg_disconnectedness_df(rounds: List[Round], G: nx.Graph = None, comm_df: pd.DataFrame = None) -> pd.DataFrame:
+    G = G if G is not None else analytics.build_player_graph(rounds)
     disc_df = compute_disconnectedness_leaderboard_df(G)
-    comm_df = compute_community_labels(G)
+    comm_df = comm_df if comm_df is not None else compute_community_labels(G)
     return add_avg_disconnectedness_to_communities(disc_df, comm_df)
 
 def print_community_disconnectedness_over_time(rounds: List[Round], num_slices: int = 5):
@@ -97,27 +180,106 @@ def print_community_disconnectedness_over_time(rounds: List[Round], num_slices:
         print("No rounds provided.")
         return
 
-    # --- Sort chronologically ---
-    rounds_sorted = sorted(rounds, key=lambda r: r.round_date)
-    n = len(rounds_sorted)
+    over_time_df = get_community_disconnectedness_over_time_df(rounds, num_slices)
+
+    print("\n=== Community Avg Disconnectedness by Cumulative Slice ===")
+
+    for (idx, cutoff), merged_df in over_time_df.groupby(["Slice", "Rounds"], sort=True):
+        print(f"\n--- Slice {idx} (First {cutoff} rounds) ---")
+        with pd.option_context('display.max_rows', None, 'display.max_columns', None):
+            print(merged_df[['Player', 'CommunityID', 'Disconnectedness', 'AvgDisconnectedness']])
+
+
+def get_community_disconnectedness_over_time_df(rounds: RoundsInput, num_slices: int = 5) -> pd.DataFrame:
+    """
+    Community average disconnectedness for cumulative time slices, one row per player per slice.
+
+    One graph is grown slice by slice from the co-occurrence counts of just the new rounds, and Louvain
+    starts from the previous slice's partition instead of from scratch.
+    """
+    columns = ['Slice', 'Rounds', 'Through Date', 'Player', 'CommunityID', 'Disconnectedness', 'AvgDisconnectedness']
+    frame = as_rounds_frame(rounds)
+    n = frame.num_rounds
+    if n == 0:
+        return pd.DataFrame(columns=columns)
+
+    # chronological, ties keep their stored order like sorted(rounds, key=round_date)
+    round_order = np.argsort(frame.round_dates, kind="stable")
+    round_rank = np.empty(n, dtype=np.int64)
+    round_rank[round_order] = np.arange(n)
+    entry_rank = round_rank[frame.entry_round_index()]
+
     step = max(1, n // num_slices)
     cutoffs = [min(n, step * i) for i in range(1, num_slices + 1)]
 
-    print("\n=== Community Avg Disconnectedness by Cumulative Slice ===")
+    G = nx.Graph()
+    node_ids: List[int] = []  # frame player id of every node, in G.nodes() order
+    cooccurrence = sp.csr_matrix((frame.num_players, frame.num_players), dtype=np.int64)
+    partition = None
+    slice_dfs = []
+    previous_cutoff = 0
 
     for idx, cutoff in enumerate(cutoffs, start=1):
-        subset = rounds_sorted[:cutoff]
-        if not subset:
+        if cutoff > previous_cutoff:
+            in_slice = (entry_rank >= previous_cutoff) & (entry_rank < cutoff)
+            incidence = sp.csr_matrix(
+                (np.ones(int(in_slice.sum()), dtype=np.int64), (entry_rank[in_slice] - previous_cutoff, frame.player_ids[in_slice])),
+                shape=(cutoff - previous_cutoff, frame.num_players)
+            )
+            delta = (incidence.T @ incidence).tocsr()
+            delta.setdiag(0)
+            delta.eliminate_zeros()
+            cooccurrence = cooccurrence + delta
+            _add_edge_weights(G, node_ids, frame.player_names, sp.triu(delta, k=1).tocoo())
+        previous_cutoff = cutoff
+        if G.number_of_nodes() == 0:
             continue
 
-        G = analytics.build_player_graph(subset)
+        adjacency_matrix = cooccurrence[node_ids][:, node_ids].tocsr()
+        G.graph["adjacency"] = analytics.player_weighted_spring_graph.PlayerAdjacency(player_names=list(G.nodes()), matrix=adjacency_matrix)
+
+        partition = _warm_start_partition(G, partition)
         disc_df = compute_disconnectedness_leaderboard_df(G)
-        comm_df = compute_community_labels(G)
+        comm_df = pd.DataFrame(list(partition.items()), columns=['Player', 'CommunityID']).sort_values(['CommunityID', 'Player']).reset_index(drop=True)
         merged_df = add_avg_disconnectedness_to_communities(disc_df, comm_df)
 
-        print(f"\n--- Slice {idx} (First {cutoff} rounds) ---")
-        with pd.option_context('display.max_rows', None, 'display.max_columns', None):
-            print(merged_df)
+        through_days = int(frame.round_dates[round_order[cutoff - 1]])
+        merged_df.insert(0, 'Through Date', "" if through_days in (MISSING_ROUND_DATE, INVALID_ROUND_DATE) else days_to_round_date(through_days))
+        merged_df.insert(0, 'Rounds', cutoff)
+        merged_df.insert(0, 'Slice', idx)
+        slice_dfs.append(merged_df)
+
+    if not slice_dfs:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(slice_dfs, ignore_index=True)[columns]
+
+
+def _add_edge_weights(G: nx.Graph, node_ids: List[int], player_names: List[str], delta: sp.coo_matrix) -> None:
+    for i, j, w in zip(delta.row.tolist(), delta.col.tolist(), delta.data.tolist()):
+        u, v = player_names[i], player_names[j]
+        for player_id, name in ((i, u), (j, v)):
+            if name not in G:
+                G.add_node(name)
+                node_ids.append(player_id)
+        if G.has_edge(u, v):
+            G[u][v]['weight'] += w
+        else:
+            G.add_edge(u, v, weight=w)
+
+
+def _warm_start_partition(G: nx.Graph, previous: Dict[str, int] = None) -> Dict[str, int]:
+    if previous is None:
+        return community_louvain.best_partition(G, weight='weight', resolution=1.3)
+    # players new in this slice start out as their own community
+    next_id = max(previous.values(), default=-1) + 1
+    initial = {}
+    for node in G.nodes():
+        if node in previous:
+            initial[node] = previous[node]
+        else:
+            initial[node] = next_id
+            next_id += 1
+    return community_louvain.best_partition(G, partition=initial, weight='weight', resolution=1.3)
 
 
 def top_three_trueskill_rounds_avg(rounds: list[Round]) -> list[dict]:
@@ -1,36 +1,296 @@
 import networkx as nx
-import matplotlib.pyplot as plt
-from itertools import combinations
-from typing import List
+from matplotlib import colormaps
+from matplotlib.colors import to_hex
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from PIL import Image
 from offsuit_analyzer.datamodel import Round
+from offsuit_analyzer.analytics.rounds_frame import RoundsFrame, RoundsInput, as_rounds_frame
 from offsuit_analyzer import analytics
+import heapq
 import io
+import itertools
 
 # ===============================
 # GRAPH CONSTRUCTION & VISUALIZATION
 # ===============================
 
-def build_player_graph(rounds: List[Round]) -> nx.Graph:
+@dataclass(frozen=True, eq=False)
+class PlayerAdjacency:
+    """Symmetric sparse co-occurrence counts, entry (i, j) is the number of rounds players i and j shared."""
+    player_names: List[str]  # row/column index -> name, players who shared a round with someone
+    matrix: sp.csr_matrix  # int64, zero diagonal
+
+
+def build_player_adjacency(rounds: RoundsInput) -> PlayerAdjacency:
+    """
+    Co-occurrence counts as one sparse product XᵀX of the round x player incidence matrix instead of
+    a Python loop over every pair of every round.
+    """
+    frame = as_rounds_frame(rounds)
+    entry_rounds = frame.entry_round_index()
+    incidence = sp.csr_matrix(
+        (np.ones(frame.num_entries, dtype=np.int64), (entry_rounds, frame.player_ids)),
+        shape=(frame.num_rounds, frame.num_players)
+    )
+    cooccurrence = (incidence.T @ incidence).tocsr()
+    cooccurrence.setdiag(0)
+    cooccurrence.eliminate_zeros()
+
+    # players who never shared a round are not in the graph, the rest keep the order they first
+    # met someone in, which is the node order the pairwise build produced
+    node_order = _first_shared_round_order(frame, cooccurrence)
+    matrix = cooccurrence[node_order][:, node_order].tocsr()
+    matrix.sort_indices()
+    return PlayerAdjacency(player_names=[frame.player_names[i] for i in node_order.tolist()], matrix=matrix)
+
+
+def _first_shared_round_order(frame: RoundsFrame, cooccurrence: sp.csr_matrix) -> np.ndarray:
+    shared = frame.field_sizes > 1
+    first_round = np.full(frame.num_players, np.iinfo(np.int64).max)
+    np.minimum.at(first_round, frame.player_ids[shared], frame.entry_round_index()[shared].astype(np.int64))
+    connected = np.flatnonzero(np.diff(cooccurrence.indptr) > 0)
+    # player ids were handed out in order of appearance, so they break ties inside a round
+    return connected[np.lexsort((connected, first_round[connected]))]
+
+
+def build_player_graph(rounds: RoundsInput) -> nx.Graph:
+    adjacency = build_player_adjacency(rounds)
     G = nx.Graph()
-    for rnd in rounds:
-        players = [p.player_name for p in rnd.players]
-        for p1, p2 in combinations(players, 2):
-            if G.has_edge(p1, p2):
-                G[p1][p2]['weight'] += 1
-            else:
-                G.add_edge(p1, p2, weight=1)
+    G.add_nodes_from(adjacency.player_names)
+    upper = sp.triu(adjacency.matrix, k=1).tocoo()
+    names = adjacency.player_names
+    G.add_weighted_edges_from(
+        (names[i], names[j], w) for i, j, w in zip(upper.row.tolist(), upper.col.tolist(), upper.data.tolist())
+    )
+    # keep the sparse form around for anything that would rather do matrix math than walk the graph
+    G.graph["adjacency"] = adjacency
     return G
 
-def generate_graph_image_buffer(rounds: List[Round], searched_player_name: str = None, title: str = "Player Interaction Graph") -> io.BytesIO:
-    G = build_player_graph(rounds)
-    _prepare_graph_plot(G, rounds, searched_player_name, title)
+@dataclass(frozen=True, eq=False)
+class GraphRendering:
+    """A rendered graph png plus where every node landed in it, so a highlight can be drawn on top later."""
+    png: bytes
+    node_pixels: Dict[str, Tuple[float, float]]
+    # decoded copy of png, decoding it again took seconds per highlight
+    overlay_base: Image.Image
+
+
+GRAPH_DPI = 115
+GRAPH_NODE_SIZE = 245  # points^2, matplotlib scatter size
+GRAPH_LABEL_FONT_SIZE = 4
+_HIGHLIGHT_PATCH_PX = 128  # side of the square redrawn around a highlighted node, room for its label
+_SAVEFIG_PAD_INCHES = 0.1  # matplotlib's default pad for bbox_inches='tight'
+
+
+def compute_graph_layout(G: nx.Graph) -> Dict[str, np.ndarray]:
+    return nx.spring_layout(G, weight="weight", k=5.0, iterations=200, seed=42)
+
+
+def generate_graph_image_buffer(rounds: List[Round], searched_player_name: str = None, title: str = "Player Interaction Graph", G: nx.Graph = None) -> io.BytesIO:
+    G = G if G is not None else build_player_graph(rounds)
+    rendering = render_graph(G, rounds, title)
+    return highlight_player(rendering, searched_player_name)
+
+
+def build_ego_graph(G: nx.Graph, player_name: str, hops: int = 1, top_n_edges: int = None) -> nx.Graph:
+    """
+    Everyone within hops shared rounds of the player, with the edges between them. With top_n_edges the
+    graph is grown out from the player one strongest edge at a time instead, so the N edges kept are the
+    heaviest ones that stay connected to the player.
+    """
+    ego = nx.ego_graph(G, player_name, radius=hops)
+    if top_n_edges is None or ego.number_of_edges() <= top_n_edges:
+        return ego
+
+    kept_nodes = {player_name}
+    kept_edges = []
+    seen_edges = set()
+    frontier = []  # max heap of (-weight, u, v) for edges touching a kept node
+    tie_breaker = itertools.count()
+
+    def push_edges(node):
+        for neighbor, data in ego[node].items():
+            edge = frozenset((node, neighbor))
+            if edge not in seen_edges:
+                seen_edges.add(edge)
+                heapq.heappush(frontier, (-data["weight"], next(tie_breaker), node, neighbor))
+
+    push_edges(player_name)
+    while frontier and len(kept_edges) < top_n_edges:
+        negative_weight, _, u, v = heapq.heappop(frontier)
+        kept_edges.append((u, v, -negative_weight))
+        if v not in kept_nodes:
+            kept_nodes.add(v)
+            push_edges(v)
+
+    pruned = nx.Graph()
+    # original node order so the seeded layout does not depend on edge weights
+    pruned.add_nodes_from(node for node in ego.nodes() if node in kept_nodes)
+    pruned.add_weighted_edges_from(kept_edges)
+    return pruned
+
+
+def render_ego_graph(ego_graph: nx.Graph, player_name: str, title: str, trueskill_df: pd.DataFrame = None) -> bytes:
+    """
+    Lay out and render just the ego graph, with the player drawn in blue. The figure grows with the
+    neighborhood instead of always being the full league size.
+    """
+    figure_inches = float(np.clip(1.5 * np.sqrt(ego_graph.number_of_nodes()), 8, 48))
+    fig, _ = _prepare_graph_plot(ego_graph, None, player_name, title, compute_graph_layout(ego_graph), trueskill_df,
+                                 figure_inches=figure_inches, label_font_size=7)
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=115, bbox_inches='tight')
+    fig.savefig(buf, format='png', dpi=GRAPH_DPI, bbox_inches='tight')
+    return buf.getvalue()
+
+
+def render_graph(G: nx.Graph, rounds: Optional[List[Round]], title: str = "Player Interaction Graph",
+                 pos: Dict[str, np.ndarray] = None, trueskill_df: pd.DataFrame = None) -> GraphRendering:
+    """
+    Render the graph without any player highlighted. Pass a cached layout and TrueSkill leaderboard to skip
+    recomputing them, rounds are only needed when trueskill_df is not given.
+    Uses its own Agg figure and no pyplot state, so it is safe to call from any thread or worker process.
+    """
+    pos = pos if pos is not None else compute_graph_layout(G)
+    fig, ax = _prepare_graph_plot(G, rounds, None, title, pos, trueskill_df)
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=GRAPH_DPI, bbox_inches='tight')
+
+    # same crop savefig applied, so data coordinates can be mapped onto the saved image
+    tight_bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(_SAVEFIG_PAD_INCHES)
+    nodes = list(G.nodes())
+    display = ax.transData.transform(np.array([pos[node] for node in nodes])) if nodes else np.zeros((0, 2))
+    x_px = (display[:, 0] / fig.dpi - tight_bbox.x0) * GRAPH_DPI
+    y_px = (tight_bbox.y1 - display[:, 1] / fig.dpi) * GRAPH_DPI
+
+    png = buf.getvalue()
+    return GraphRendering(
+        png=png,
+        node_pixels={node: (x, y) for node, x, y in zip(nodes, x_px.tolist(), y_px.tolist())},
+        overlay_base=Image.open(io.BytesIO(png)).convert("RGB")
+    )
+
+
+def highlight_player(rendering: GraphRendering, player_name: str = None) -> io.BytesIO:
+    """Redraw the player's node in blue on a copy of the rendering, the base png is returned as is otherwise."""
+    position = rendering.node_pixels.get(player_name) if player_name else None
+    if position is None:
+        return io.BytesIO(rendering.png)
+
+    x, y = position
+    left, top = int(x) - _HIGHLIGHT_PATCH_PX // 2, int(y) - _HIGHLIGHT_PATCH_PX // 2
+    patch = _render_highlight_patch(player_name, (x - left, y - top))
+    image = rendering.overlay_base.copy()
+    image.paste(patch, (left, top), patch)
+    buf = io.BytesIO()
+    image.save(buf, format="PNG", compress_level=1)
     buf.seek(0)
-    plt.close()
     return buf
 
 
+def _render_highlight_patch(player_name: str, center: Tuple[float, float]) -> Image.Image:
+    """
+    The player's blue node and label on a transparent square, drawn by the same networkx calls as the full
+    graph so the fill, edge and label font match it. center is in pixels from the top left of the square.
+    """
+    fig = Figure(figsize=(_HIGHLIGHT_PATCH_PX / GRAPH_DPI, _HIGHLIGHT_PATCH_PX / GRAPH_DPI), dpi=GRAPH_DPI)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    G = nx.Graph()
+    G.add_node(player_name)
+    pos = {player_name: center}
+    nx.draw_networkx_nodes(G, pos, ax=ax, node_size=GRAPH_NODE_SIZE, node_color=["blue"], edgecolors="black")
+    nx.draw_networkx_labels(G, pos, _create_multiline_labels(G.nodes()), ax=ax,
+                            font_size=GRAPH_LABEL_FONT_SIZE, font_weight="bold")
+    # data coordinates are pixels of the square, y grows downwards like the image
+    ax.set_xlim(0, _HIGHLIGHT_PATCH_PX)
+    ax.set_ylim(_HIGHLIGHT_PATCH_PX, 0)
+    ax.axis("off")
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=GRAPH_DPI, transparent=True)
+    return Image.open(buf)
+
+
+@dataclass(frozen=True, eq=False)
+class GraphExport:
+    """Everything a client needs to draw the graph itself, as parallel arrays in node order."""
+    player_names: List[str]
+    positions: np.ndarray  # node x 2 spring layout coordinates
+    colors: List[str]  # hex, same TrueSkill coloring as the png
+    skills: np.ndarray  # Adjusted Ranking, nan for players without one
+    communities: np.ndarray  # Louvain community id, -1 when unknown
+    strengths: np.ndarray  # sum of edge weights, used to pick nodes for lower levels of detail
+    edge_sources: np.ndarray  # upper triangle edges, node indexes
+    edge_targets: np.ndarray
+    edge_weights: np.ndarray
+
+    def to_dict(self, min_edge_weight: int = 1, max_nodes: int = None, max_edges: int = None, precision: int = 3) -> Dict[str, Any]:
+        """
+        Compact columnar json. max_nodes keeps the most connected players, max_edges the heaviest edges
+        between the players kept, node ids are indexes into the returned node arrays.
+        """
+        node_ids = np.arange(len(self.player_names))
+        if max_nodes is not None and max_nodes < len(node_ids):
+            node_ids = np.sort(np.argsort(-self.strengths, kind="stable")[:max_nodes])
+        new_ids = np.full(len(self.player_names), -1, dtype=np.int64)
+        new_ids[node_ids] = np.arange(len(node_ids))
+
+        sources, targets = new_ids[self.edge_sources], new_ids[self.edge_targets]
+        edges = np.flatnonzero((sources >= 0) & (targets >= 0) & (self.edge_weights >= min_edge_weight))
+        if max_edges is not None and max_edges < len(edges):
+            edges = np.sort(edges[np.argsort(-self.edge_weights[edges], kind="stable")[:max_edges]])
+
+        skills = np.round(self.skills[node_ids], 2)
+        return {
+            "nodes": {
+                "name": [self.player_names[i] for i in node_ids.tolist()],
+                "x": np.round(self.positions[node_ids, 0], precision).tolist(),
+                "y": np.round(self.positions[node_ids, 1], precision).tolist(),
+                "color": [self.colors[i] for i in node_ids.tolist()],
+                "skill": [None if np.isnan(v) else v for v in skills.tolist()],
+                "community": self.communities[node_ids].tolist(),
+            },
+            "edges": {
+                "source": sources[edges].tolist(),
+                "target": targets[edges].tolist(),
+                "weight": self.edge_weights[edges].tolist(),
+            },
+            "total_nodes": len(self.player_names),
+            "total_edges": len(self.edge_weights),
+        }
+
+
+def build_graph_export(G: nx.Graph, pos: Dict[str, np.ndarray], trueskill_df: pd.DataFrame,
+                       communities_df: pd.DataFrame = None) -> GraphExport:
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    skill_map = dict(zip(trueskill_df["Name"], trueskill_df["Adjusted Ranking"])) if not trueskill_df.empty else {}
+    community_map = dict(zip(communities_df["Player"], communities_df["CommunityID"])) if communities_df is not None else {}
+
+    edges = list(G.edges(data="weight"))
+    edge_sources = np.array([index[u] for u, _, _ in edges], dtype=np.int64)
+    edge_targets = np.array([index[v] for _, v, _ in edges], dtype=np.int64)
+    edge_weights = np.array([w for _, _, w in edges], dtype=np.int64)
+    strengths = np.bincount(edge_sources, weights=edge_weights, minlength=len(nodes)) + np.bincount(edge_targets, weights=edge_weights, minlength=len(nodes))
+
+    return GraphExport(
+        player_names=nodes,
+        positions=np.array([pos[node] for node in nodes], dtype=np.float64).reshape(len(nodes), 2),
+        colors=[to_hex(color) for color in _get_player_trueskill_colors(None, nodes, None, trueskill_df)],
+        skills=np.array([skill_map.get(node, np.nan) for node in nodes], dtype=np.float64),
+        communities=np.array([community_map.get(node, -1) for node in nodes], dtype=np.int64),
+        strengths=strengths,
+        edge_sources=edge_sources,
+        edge_targets=edge_targets,
+        edge_weights=edge_weights,
+    )
+
+
 def _create_multiline_labels(nodes) -> dict:
     labels = {}
     for node in nodes:
@@ -39,8 +299,9 @@ def _create_multiline_labels(nodes) -> dict:
     return labels
 
 
-def _get_player_trueskill_colors(rounds: List[Round], nodes, special_player_name: str = None) -> list:
-    trueskill_df = analytics.build_trueskill_leaderboard(rounds)
+def _get_player_trueskill_colors(rounds: List[Round], nodes, special_player_name: str = None, trueskill_df: pd.DataFrame = None) -> list:
+    if trueskill_df is None:
+        trueskill_df = analytics.build_trueskill_leaderboard(rounds)
     skill_map = {}
 
     if not trueskill_df.empty:
@@ -53,7 +314,7 @@ def _get_player_trueskill_colors(rounds: List[Round], nodes, special_player_name
     if skill_map:
         vals = list(skill_map.values())
         min_skill, max_skill = min(vals), max(vals)
-        colormap = plt.cm.RdYlGn
+        colormap = colormaps["RdYlGn"]
 
         colors = []
         for node in nodes:
@@ -70,16 +331,21 @@ def _get_player_trueskill_colors(rounds: List[Round], nodes, special_player_name
         return ['skyblue'] * len(nodes)
 
 
-def _prepare_graph_plot(G: nx.Graph, rounds: List[Round], searched_player_name: str = None, title: str = "Player Interaction Graph") -> None:
-    pos = nx.spring_layout(G, weight="weight", k=5.0, iterations=200, seed=42)
-    plt.figure(figsize=(48, 48))
-    node_colors = _get_player_trueskill_colors(rounds, G.nodes(), searched_player_name)
-    nx.draw_networkx_nodes(G, pos, node_size=245, node_color=node_colors, edgecolors="black")
+def _prepare_graph_plot(G: nx.Graph, rounds: List[Round], searched_player_name: str = None, title: str = "Player Interaction Graph",
+                        pos: Dict[str, np.ndarray] = None, trueskill_df: pd.DataFrame = None,
+                        figure_inches: float = 48, label_font_size: float = GRAPH_LABEL_FONT_SIZE) -> Tuple[Figure, Any]:
+    pos = pos if pos is not None else compute_graph_layout(G)
+    fig = Figure(figsize=(figure_inches, figure_inches))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    node_colors = _get_player_trueskill_colors(rounds, G.nodes(), searched_player_name, trueskill_df)
+    nx.draw_networkx_nodes(G, pos, ax=ax, node_size=GRAPH_NODE_SIZE, node_color=node_colors, edgecolors="black")
     labels = _create_multiline_labels(G.nodes())
-    nx.draw_networkx_labels(G, pos, labels, font_size=4, font_weight="bold")
-    nx.draw_networkx_edges(G, pos, width=0.5, alpha=0.4, edge_color="gray")
-    plt.title(f"{title}\n(Red=Lower Skill, Green=Higher Skill)", fontsize=20)
-    plt.axis("off")
-    plt.tight_layout()
+    nx.draw_networkx_labels(G, pos, labels, ax=ax, font_size=label_font_size, font_weight="bold")
+    nx.draw_networkx_edges(G, pos, ax=ax, width=0.5, alpha=0.4, edge_color="gray")
+    ax.set_title(f"{title}\n(Red=Lower Skill, Green=Higher Skill)", fontsize=20)
+    ax.axis("off")
+    fig.tight_layout()
+    return fig, ax
 
 
@@ -0,0 +1,113 @@
+"""
+Benchmark and agreement report for the rating engine backends.
+
+Replays the same rounds through the exact TrueSkill engine and the vectorized Weng-Lin engine,
+times both and reports how closely the Weng-Lin leaderboard follows the TrueSkill one.
+
+    python -m offsuit_analyzer.analytics.rating_engine_benchmark               # stored rounds
+    python -m offsuit_analyzer.analytics.rating_engine_benchmark --synthetic   # no database needed
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from offsuit_analyzer.analytics.rounds_frame import ROUNDS_FRAME_FIELDS, RoundsFrame, RoundsInput, as_rounds_frame
+from offsuit_analyzer.analytics.trueskill_analyzer import create_default_engine, prepare_round_data, leaderboard_to_dataframe
+from offsuit_analyzer.datamodel import Round, PlayerScore
+
+
+def generate_synthetic_rounds(num_rounds: int = 2000, num_players: int = 1500, min_field: int = 10,
+                              max_field: int = 60, seed: int = 7) -> List[Round]:
+    """Bar nights where points follow a hidden skill plus noise, so both engines have something real to find."""
+    rng = random.Random(seed)
+    names = [f"Player {i}" for i in range(num_players)]
+    skills = [rng.gauss(0, 1) for _ in range(num_players)]
+    rounds = []
+    for round_index in range(num_rounds):
+        field = rng.sample(range(num_players), rng.randint(min_field, max_field))
+        performances = sorted(field, key=lambda p: skills[p] + rng.gauss(0, 1.5), reverse=True)
+        rounds.append(Round(
+            round_id=str(round_index),
+            bar_name=f"Bar {round_index % 8}",
+            round_date=(pd.Timestamp("2022-01-01") + pd.Timedelta(days=round_index // 4)).date().isoformat(),
+            bar_id=str(round_index % 8),
+            players=tuple(PlayerScore(names[p], 10 * (len(field) - place)) for place, p in enumerate(performances))
+        ))
+    return rounds
+
+
+def time_backend(backend: str, processed_rounds: List[Dict]) -> Tuple[pd.DataFrame, float]:
+    engine = create_default_engine(backend)
+    start = time.perf_counter()
+    engine.process_multiple_rounds(processed_rounds)
+    elapsed = time.perf_counter() - start
+    return leaderboard_to_dataframe(engine.get_leaderboard()), elapsed
+
+
+def build_agreement_report(rounds: RoundsInput, min_rounds_played: int = 0, top_ns: Tuple[int, ...] = (10, 25, 50)) -> pd.DataFrame:
+    """
+    One row per metric comparing the weng_lin leaderboard against the trueskill one.
+    Players under min_rounds_played are left out, the same way the site hides them.
+    """
+    frame = as_rounds_frame(rounds)
+    processed_rounds = [r for r in prepare_round_data(frame) if len(r["results"]) > 1]
+
+    exact_df, exact_seconds = time_backend("trueskill", processed_rounds)
+    approx_df, approx_seconds = time_backend("weng_lin", processed_rounds)
+
+    played = dict(zip(frame.player_names, frame.rounds_played_per_player().tolist()))
+    qualified = {name for name, count in played.items() if count >= min_rounds_played}
+
+    def ranked(df: pd.DataFrame) -> pd.DataFrame:
+        df = df[df["Name"].isin(qualified)].reset_index(drop=True)
+        df["Rank"] = np.arange(1, len(df) + 1)
+        return df.set_index("Name")
+
+    exact, approx = ranked(exact_df), ranked(approx_df)
+    joined = exact.join(approx, lsuffix=" trueskill", rsuffix=" weng_lin", how="inner")
+    rank_shift = (joined["Rank trueskill"] - joined["Rank weng_lin"]).abs()
+
+    rows = [
+        ("Rounds", len(processed_rounds)),
+        ("Players compared", len(joined)),
+        ("trueskill seconds", round(exact_seconds, 3)),
+        ("weng_lin seconds", round(approx_seconds, 3)),
+        ("Speedup", round(exact_seconds / approx_seconds, 1) if approx_seconds else float("inf")),
+        ("Spearman adjusted ranking", round(joined["Adjusted Ranking trueskill"].corr(joined["Adjusted Ranking weng_lin"], method="spearman"), 4)),
+        ("Spearman raw ranking", round(joined["Raw Ranking trueskill"].corr(joined["Raw Ranking weng_lin"], method="spearman"), 4)),
+        ("Mean rank shift", round(rank_shift.mean(), 2)),
+        ("Max rank shift", int(rank_shift.max()) if len(rank_shift) else 0),
+        ("Mean abs adjusted ranking diff", round((joined["Adjusted Ranking trueskill"] - joined["Adjusted Ranking weng_lin"]).abs().mean(), 3)),
+        ("Mean abs uncertainty diff", round((joined["Uncertainty trueskill"] - joined["Uncertainty weng_lin"]).abs().mean(), 3)),
+    ]
+    for top_n in top_ns:
+        overlap = len(set(exact.index[:top_n]) & set(approx.index[:top_n]))
+        rows.append((f"Top {top_n} overlap %", round(overlap / max(min(top_n, len(exact)), 1) * 100, 1)))
+
+    return pd.DataFrame(rows, columns=["Metric", "Value"], dtype=object)
+
+
+# ===============================
+# DRIVER
+# ===============================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the trueskill and weng_lin rating engines")
+    parser.add_argument("--synthetic", action="store_true", help="use generated rounds instead of the database")
+    parser.add_argument("--rounds", type=int, default=2000, help="synthetic rounds to generate")
+    parser.add_argument("--players", type=int, default=1500, help="synthetic player pool size")
+    parser.add_argument("--min-rounds", type=int, default=0, help="only compare players with at least this many rounds")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        rounds = generate_synthetic_rounds(args.rounds, args.players)
+    else:
+        from offsuit_analyzer import persistence
+        rounds = RoundsFrame.from_documents(persistence.iter_round_documents(projection=ROUNDS_FRAME_FIELDS))
+
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None):
+        print(build_agreement_report(rounds, min_rounds_played=args.min_rounds).to_string(index=False))
@@ -0,0 +1,192 @@
+"""
+Columnar representation of a round history for the analytics modules.
+
+Every player entry of every round is stored in flat NumPy arrays, grouped by round and sorted by
+points descending inside each round, so placements and field sizes are computed once when the
+frame is built instead of re-sorting every round in every leaderboard.
+"""
+from array import array
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+
+import numpy as np
+
+from offsuit_analyzer.datamodel import Round
+
+# round_dates sentinels, missing dates sort first and unparseable dates sort last
+MISSING_ROUND_DATE = np.iinfo(np.int32).min
+INVALID_ROUND_DATE = np.iinfo(np.int32).max
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# the only document fields a frame reads, pass as the projection when streaming round documents
+ROUNDS_FRAME_FIELDS = ("round_id", "round_date", "bar_id", "players")
+
+
+@dataclass(frozen=True, eq=False)
+class RoundsFrame:
+    player_names: List[str]  # player id -> name
+    bar_ids: List[str]  # bar code -> bar_id
+    round_ids: List[str]  # round index -> round_id
+
+    # per round arrays, length num_rounds (round_offsets has one extra closing entry)
+    round_offsets: np.ndarray  # int64, entries of round i are [round_offsets[i], round_offsets[i + 1])
+    round_dates: np.ndarray  # int32 days since 1970-01-01
+    round_bar_codes: np.ndarray  # int32 index into bar_ids
+
+    # per entry arrays, length num_entries
+    player_ids: np.ndarray  # int32 index into player_names
+    points: np.ndarray  # int32
+    placements: np.ndarray  # int16, 1 = most points in the round
+    field_sizes: np.ndarray  # int16, number of players in the entry's round
+
+    @property
+    def num_rounds(self) -> int:
+        return len(self.round_ids)
+
+    @property
+    def num_players(self) -> int:
+        return len(self.player_names)
+
+    @property
+    def num_entries(self) -> int:
+        return len(self.player_ids)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.round_offsets, self.round_dates, self.round_bar_codes,
+                  self.player_ids, self.points, self.placements, self.field_sizes)
+        return sum(a.nbytes for a in arrays)
+
+    def entry_round_index(self) -> np.ndarray:
+        """Round index of every entry."""
+        return np.repeat(np.arange(self.num_rounds, dtype=np.int32), np.diff(self.round_offsets))
+
+    def rounds_played_per_player(self) -> np.ndarray:
+        return np.bincount(self.player_ids, minlength=self.num_players)
+
+    def round_player_ids(self, round_index: int) -> np.ndarray:
+        """Player ids of one round in placement order."""
+        return self.player_ids[self.round_offsets[round_index]:self.round_offsets[round_index + 1]]
+
+    def iter_round_player_ids(self) -> Iterator[np.ndarray]:
+        offsets = self.round_offsets
+        for round_index in range(self.num_rounds):
+            yield self.player_ids[offsets[round_index]:offsets[round_index + 1]]
+
+    @classmethod
+    def from_rounds(cls, rounds: Iterable[Round]) -> "RoundsFrame":
+        builder = _RoundsFrameBuilder()
+        for round_obj in rounds:
+            builder.add_round(
+                round_obj.round_id,
+                round_obj.round_date,
+                round_obj.bar_id,
+                ((p.player_name, p.points) for p in round_obj.players)
+            )
+        return builder.build()
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[Mapping[str, Any]]) -> "RoundsFrame":
+        """
+        Build straight from stored round documents without creating Round objects first. docs can be a
+        database cursor, each document is folded into the buffers and dropped as it arrives.
+        """
+        builder = _RoundsFrameBuilder()
+        for doc in docs:
+            builder.add_round(
+                doc["round_id"],
+                doc.get("round_date"),
+                doc.get("bar_id"),
+                ((p["player_name"], p["points"]) for p in doc["players"])
+            )
+        return builder.build()
+
+
+RoundsInput = Union[List[Round], RoundsFrame]
+
+
+def as_rounds_frame(rounds: RoundsInput) -> RoundsFrame:
+    """Let the build_*_leaderboard functions take either a list of Rounds or a prebuilt frame."""
+    if isinstance(rounds, RoundsFrame):
+        return rounds
+    return RoundsFrame.from_rounds(rounds)
+
+
+def round_date_to_days(round_date: str) -> int:
+    if not round_date:
+        return MISSING_ROUND_DATE
+    try:
+        return date.fromisoformat(round_date).toordinal() - _EPOCH_ORDINAL
+    except (TypeError, ValueError):
+        return INVALID_ROUND_DATE
+
+
+def days_to_round_date(days: int) -> str:
+    return date.fromordinal(int(days) + _EPOCH_ORDINAL).isoformat()
+
+
+class _RoundsFrameBuilder:
+    """Appends rounds into compact buffers so a frame can be built from any stream of rounds."""
+
+    def __init__(self):
+        self._player_index: Dict[str, int] = {}
+        self._bar_index: Dict[str, int] = {}
+        self._date_cache: Dict[str, int] = {}
+        self._round_ids: List[str] = []
+        self._round_sizes = array("q")
+        self._round_dates = array("i")
+        self._round_bar_codes = array("i")
+        self._player_ids = array("i")
+        self._points = array("i")
+
+    def add_round(self, round_id: str, round_date: str, bar_id: str, players: Iterable[Tuple[str, int]]) -> None:
+        player_index = self._player_index
+        size = 0
+        for player_name, points in players:
+            player_id = player_index.get(player_name)
+            if player_id is None:
+                player_id = player_index[player_name] = len(player_index)
+            self._player_ids.append(player_id)
+            self._points.append(int(points))
+            size += 1
+
+        round_days = self._date_cache.get(round_date)
+        if round_days is None:
+            round_days = self._date_cache[round_date] = round_date_to_days(round_date)
+
+        self._round_ids.append(round_id)
+        self._round_sizes.append(size)
+        self._round_dates.append(round_days)
+        self._round_bar_codes.append(self._bar_index.setdefault(bar_id, len(self._bar_index)))
+
+    def build(self) -> RoundsFrame:
+        round_sizes = np.array(self._round_sizes, dtype=np.int64)
+        round_offsets = np.zeros(len(round_sizes) + 1, dtype=np.int64)
+        np.cumsum(round_sizes, out=round_offsets[1:])
+
+        player_ids = np.array(self._player_ids, dtype=np.int32)
+        points = np.array(self._points, dtype=np.int32)
+        entry_rounds = np.repeat(np.arange(len(round_sizes), dtype=np.int32), round_sizes)
+
+        # stable sort by round then points descending, ties keep their original order like sorted(..., reverse=True)
+        order = np.lexsort((-points.astype(np.int64), entry_rounds))
+        player_ids = player_ids[order]
+        points = points[order]
+
+        placements = (np.arange(len(order), dtype=np.int64) - round_offsets[entry_rounds] + 1).astype(np.int16)
+        field_sizes = round_sizes[entry_rounds].astype(np.int16)
+
+        return RoundsFrame(
+            player_names=list(self._player_index),
+            bar_ids=list(self._bar_index),
+            round_ids=self._round_ids,
+            round_offsets=round_offsets,
+            round_dates=np.array(self._round_dates, dtype=np.int32),
+            round_bar_codes=np.array(self._round_bar_codes, dtype=np.int32),
+            player_ids=player_ids,
+            points=points,
+            placements=placements,
+            field_sizes=field_sizes,
+        )
@@ -1,8 +1,9 @@
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Union
 from collections import defaultdict
 import trueskill
 import pandas as pd
 from offsuit_analyzer.datamodel import Round
+from offsuit_analyzer.analytics.rounds_frame import RoundsFrame, RoundsInput, MISSING_ROUND_DATE, round_date_to_days
 from offsuit_analyzer import persistence
 from offsuit_analyzer.config import config
 
@@ -48,8 +49,10 @@ class TrueSkillEngine:
 
         self.env = trueskill.TrueSkill(**env_kwargs)
         self.ratings: Dict[str, trueskill.Rating] = defaultdict(self.env.Rating)
+        # optional RatingLog, when set every rating update is appended to it with its round date
+        self.rating_log = None
 
-    def process_round(self, round_results: List[Tuple[str, int]]):
+    def process_round(self, round_results: List[Tuple[str, int]], round_date: Union[str, int, None] = None):
         sorted_players = sorted(round_results, key=lambda x: x[1])
         teams = [[self.ratings[name]] for name, _ in sorted_players]
         ranks = [place - 1 for _, place in sorted_players]
@@ -57,13 +60,19 @@ class TrueSkillEngine:
         for (name, _), team_rating in zip(sorted_players, new_ratings):
             self.ratings[name] = team_rating[0]
 
+        if self.rating_log is not None and round_date is not None:
+            round_days = round_date_to_days(round_date) if isinstance(round_date, str) else int(round_date)
+            for (name, _), team_rating in zip(sorted_players, new_ratings):
+                self.rating_log.append(name, round_days, team_rating[0].mu, team_rating[0].sigma)
+
     def process_multiple_rounds(
         self, rounds: List[Dict[str, Any]], sort_by_date_key: str = "date"
     ):
-        rounds_sorted = sorted(rounds, key=lambda r: r.get(sort_by_date_key, ""))
+        # same (date, bar_id, round_id) replay order as the checkpointed ratings, so both give the same leaderboard
+        rounds_sorted = sorted(rounds, key=lambda r: (r.get(sort_by_date_key, ""), str(r.get("bar_id", "")), str(r.get("round_id", ""))))
         for round_data in rounds_sorted:
             results = [(p["name"], p["place"]) for p in round_data["results"]]
-            self.process_round(results)
+            self.process_round(results, round_data.get(sort_by_date_key))
 
     def get_leaderboard(self) -> List[PlayerRating]:
         players = [
@@ -74,14 +83,48 @@ class TrueSkillEngine:
     def get_rating(self, player_name: str) -> trueskill.Rating:
         return self.ratings[player_name]
 
+    @property
+    def settings_key(self) -> str:
+        """Identifies the environment settings, ratings computed under different settings are not comparable."""
+        env = self.env
+        return f"mu={env.mu}|sigma={env.sigma}|beta={env.beta}|tau={env.tau}|draw={env.draw_probability}"
+
+    def export_ratings(self) -> List[Tuple[str, float, float]]:
+        return [(name, rating.mu, rating.sigma) for name, rating in self.ratings.items()]
+
+    def load_ratings(self, ratings: List[Tuple[str, float, float]]):
+        """Replace the current state with previously exported (name, mu, sigma) ratings."""
+        self.ratings.clear()
+        for name, mu, sigma in ratings:
+            self.ratings[name] = self.env.create_rating(mu, sigma)
+
     def reset(self):
         self.ratings.clear()
 
 
-def prepare_round_data(rounds: List[Round]) -> List[Dict[str, Any]]:
+RATING_ENGINE_BACKENDS = ("trueskill", "weng_lin")
+
+
+def create_default_engine(backend: Optional[str] = None) -> TrueSkillEngine:
+    """Engine with the league's tuned settings, backend defaults to config.RATING_ENGINE_BACKEND."""
+    backend = backend or config.RATING_ENGINE_BACKEND
+    if backend == "trueskill":
+        return TrueSkillEngine(mu=config.MU_TRUESKILL, sigma=config.SIGMA_TRUESKILL, beta=config.BETA_TRUESKILL,
+                               draw_probability=0.0, tau=config.TAU_TRUESKILL)
+    if backend == "weng_lin":
+        from offsuit_analyzer import analytics
+        return analytics.weng_lin_engine.WengLinEngine(mu=config.MU_TRUESKILL, sigma=config.SIGMA_TRUESKILL,
+                                                       beta=config.BETA_TRUESKILL, tau=config.TAU_TRUESKILL)
+    raise ValueError(f"Unknown rating engine backend {backend!r}, expected one of {RATING_ENGINE_BACKENDS}")
+
+
+def prepare_round_data(rounds: RoundsInput) -> List[Dict[str, Any]]:
     """
-    Convert a list of Round objects into a format consumable by TrueSkillEngine.
+    Convert a list of Round objects (or a RoundsFrame) into a format consumable by TrueSkillEngine.
     """
+    if isinstance(rounds, RoundsFrame):
+        return _prepare_frame_round_data(rounds)
+
     processed: List[Dict[str, Any]] = []
 
     for round_obj in rounds:
@@ -89,15 +132,36 @@ def prepare_round_data(rounds: List[Round]) -> List[Dict[str, Any]]:
         sorted_players = sorted(round_obj.players, key=lambda p: p.points, reverse=True)
         results = [(player.player_name, i + 1) for i, player in enumerate(sorted_players)]
 
-        if results and round_obj.round_date:
+        # a single player round carries no rating information
+        if len(results) > 1 and round_obj.round_date:
             processed.append({
                 "date": round_obj.round_date,
+                "bar_id": round_obj.bar_id,
+                "round_id": round_obj.round_id,
                 "results": [{"name": n, "place": p} for n, p in results]
             })
 
     return processed
 
 
+def _prepare_frame_round_data(frame: RoundsFrame) -> List[Dict[str, Any]]:
+    """Frame entries are already in placement order, dates are day numbers which sort like the YYYY-MM-DD strings."""
+    processed: List[Dict[str, Any]] = []
+    names = frame.player_names
+
+    for round_index, player_ids in enumerate(frame.iter_round_player_ids()):
+        round_date = int(frame.round_dates[round_index])
+        if len(player_ids) > 1 and round_date != MISSING_ROUND_DATE:
+            processed.append({
+                "date": round_date,
+                "bar_id": frame.bar_ids[frame.round_bar_codes[round_index]],
+                "round_id": frame.round_ids[round_index],
+                "results": [{"name": names[player_id], "place": place} for place, player_id in enumerate(player_ids.tolist(), start=1)]
+            })
+
+    return processed
+
+
 def print_leaderboard(leaderboard: List[PlayerRating], max_sigma: float = None) -> None:
     print("\nLeaderboard (ranked by conservative skill estimate):")
     print(f"{'Rank':<5} {'Name':<20} {'Conservative':>14} {'Mu':>8} {'Sigma':>8}")
@@ -128,10 +192,10 @@ def leaderboard_to_dataframe(
 
     return pd.DataFrame(data)
 
-def build_trueskill_leaderboard(rounds: List[Round]):
+def build_trueskill_leaderboard(rounds: RoundsInput, backend: Optional[str] = None):
     processed_rounds = prepare_round_data(rounds)
 
-    engine = TrueSkillEngine(beta=config.BETA_TRUESKILL, draw_probability=0.0, tau=config.TAU_TRUESKILL)
+    engine = create_default_engine(backend)
 
     engine.process_multiple_rounds(processed_rounds)
 
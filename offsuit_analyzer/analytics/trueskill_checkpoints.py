@@ -0,0 +1,219 @@
+"""
+Incremental TrueSkill ratings backed by persisted checkpoints.
+
+Rounds are replayed in a fixed (round_date, bar_id, round_id) order. Every few hundred rounds the
+full rating state is saved together with a running hash of everything replayed so far. A refresh
+resumes from the newest checkpoint whose hash still matches the stored history, so new rounds only
+cost their own updates and a late backfill rewinds to the checkpoint just before it instead of
+replaying from the very first round. The rating updates replayed between two checkpoints are saved
+as a rating history segment alongside them.
+
+Only refresh_trueskill_ratings writes checkpoints, and only the admin refresh calls it. Request handlers
+use load_trueskill_ratings, which resumes the same way but replays the newer rounds in memory only,
+so worker processes never race each other on the checkpoint collection.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from offsuit_analyzer import persistence
+from offsuit_analyzer.analytics.rounds_frame import RoundsFrame, RoundsInput, as_rounds_frame, days_to_round_date, MISSING_ROUND_DATE, INVALID_ROUND_DATE
+from offsuit_analyzer.analytics.trueskill_analyzer import TrueSkillEngine, create_default_engine, leaderboard_to_dataframe
+from offsuit_analyzer.analytics.trueskill_history import RatingLog, rating_history_covers
+from offsuit_analyzer.datamodel import TrueSkillCheckpoint
+from offsuit_analyzer.datamodel.trueskill_checkpoint import CHECKPOINT_KIND_PERIODIC, CHECKPOINT_KIND_HEAD
+from offsuit_analyzer.config import config
+
+
+@dataclass(frozen=True)
+class OrderedRound:
+    round_days: int
+    bar_id: str
+    round_id: str
+    player_names: Tuple[str, ...]  # placement order
+
+    @property
+    def round_date(self) -> str:
+        return "" if self.round_days == INVALID_ROUND_DATE else days_to_round_date(self.round_days)
+
+    def digest_bytes(self) -> bytes:
+        return "\x1f".join((str(self.round_days), str(self.bar_id), str(self.round_id)) + self.player_names).encode() + b"\n"
+
+
+@dataclass
+class TrueSkillRefreshResult:
+    engine: TrueSkillEngine
+    resumed_from_round: int  # 0 means the whole history was replayed
+    rounds_replayed: int
+    checkpoints_written: int
+    rating_log: Optional[RatingLog] = None  # updates replayed in memory after resumed_from_round, set by load_trueskill_ratings
+
+
+def get_ordered_rounds(frame: RoundsFrame) -> List[OrderedRound]:
+    """Rounds that can be rated, in the fixed replay order checkpoints rely on."""
+    ordered = []
+    names = frame.player_names
+    for round_index, player_ids in enumerate(frame.iter_round_player_ids()):
+        round_days = int(frame.round_dates[round_index])
+        # a single player round carries no rating information
+        if len(player_ids) < 2 or round_days == MISSING_ROUND_DATE:
+            continue
+        ordered.append(OrderedRound(
+            round_days=round_days,
+            bar_id=frame.bar_ids[frame.round_bar_codes[round_index]],
+            round_id=frame.round_ids[round_index],
+            player_names=tuple(names[player_id] for player_id in player_ids.tolist())
+        ))
+    ordered.sort(key=lambda r: (r.round_days, str(r.bar_id), str(r.round_id)))
+    return ordered
+
+
+def _find_resume_checkpoint(ordered_rounds: List[OrderedRound], summaries: List[TrueSkillCheckpoint]) -> Optional[TrueSkillCheckpoint]:
+    """Newest checkpoint whose history hash matches the same prefix of the current history."""
+    by_position = {summary.rounds_processed: summary for summary in summaries if summary.rounds_processed <= len(ordered_rounds)}
+    resume_from = None
+    hasher = hashlib.sha1()
+    for position, round_obj in enumerate(ordered_rounds, start=1):
+        hasher.update(round_obj.digest_bytes())
+        summary = by_position.get(position)
+        if summary is not None and summary.history_digest == hasher.hexdigest():
+            resume_from = summary
+    return resume_from
+
+
+def _find_valid_resume_checkpoint(settings_key: str, ordered_rounds: List[OrderedRound],
+                                  summaries: List[TrueSkillCheckpoint]) -> Optional[TrueSkillCheckpoint]:
+    resume_summary = _find_resume_checkpoint(ordered_rounds, summaries)
+    if resume_summary and not rating_history_covers(settings_key, resume_summary.rounds_processed):
+        # ratings without their history up to this point, replay everything once to fill it in
+        return None
+    return resume_summary
+
+
+def _make_checkpoint(engine: TrueSkillEngine, rounds_processed: int, last_round: OrderedRound, history_digest: str) -> TrueSkillCheckpoint:
+    kind = CHECKPOINT_KIND_PERIODIC if rounds_processed % config.TRUESKILL_CHECKPOINT_INTERVAL == 0 else CHECKPOINT_KIND_HEAD
+    return TrueSkillCheckpoint(
+        settings_key=engine.settings_key,
+        rounds_processed=rounds_processed,
+        last_round_date=last_round.round_date,
+        last_round_id=last_round.round_id,
+        last_bar_id=last_round.bar_id,
+        history_digest=history_digest,
+        kind=kind,
+        created_at=datetime.now(timezone.utc).isoformat(),
+        ratings=tuple(engine.export_ratings())
+    )
+
+
+def _prune_checkpoints(settings_key: str, kept: List[TrueSkillCheckpoint]) -> None:
+    """Only the newest checkpoint may be a head, and only the newest periodic checkpoints are kept for rewinds."""
+    if not kept:
+        return
+    newest = max(kept, key=lambda c: c.rounds_processed)
+    old_heads = [c.rounds_processed for c in kept if c.kind == CHECKPOINT_KIND_HEAD and c is not newest]
+    periodic = sorted((c.rounds_processed for c in kept if c.kind == CHECKPOINT_KIND_PERIODIC), reverse=True)
+    too_old = periodic[config.TRUESKILL_MAX_PERIODIC_CHECKPOINTS:]
+    persistence.delete_trueskill_checkpoints(settings_key, old_heads + too_old)
+
+
+def refresh_trueskill_ratings(rounds: RoundsInput, engine: TrueSkillEngine = None) -> TrueSkillRefreshResult:
+    """
+    Bring the persisted rating state up to date with the rounds and return the engine holding it.
+    Only rounds after the newest still valid checkpoint are replayed.
+    """
+    engine = engine or create_default_engine()
+    settings_key = engine.settings_key
+    ordered_rounds = get_ordered_rounds(as_rounds_frame(rounds))
+
+    summaries = persistence.get_trueskill_checkpoint_summaries(settings_key)
+    resume_summary = _find_valid_resume_checkpoint(settings_key, ordered_rounds, summaries)
+    resume_position = resume_summary.rounds_processed if resume_summary else 0
+
+    # anything after the resume point describes a history that no longer exists
+    stale = [s.rounds_processed for s in summaries if s.rounds_processed > resume_position]
+    persistence.delete_trueskill_checkpoints(settings_key, stale)
+    persistence.delete_trueskill_history_after(settings_key, resume_position)
+    kept = [s for s in summaries if s.rounds_processed <= resume_position]
+
+    engine.reset()
+    if resume_summary:
+        engine.load_ratings(persistence.get_trueskill_checkpoint(settings_key, resume_position).ratings)
+    engine.rating_log = RatingLog()
+
+    hasher = hashlib.sha1()
+    for round_obj in ordered_rounds[:resume_position]:
+        hasher.update(round_obj.digest_bytes())
+
+    checkpoints_written = 0
+    last_saved_position, last_saved_entry = resume_position, 0
+    for position in range(resume_position, len(ordered_rounds)):
+        round_obj = ordered_rounds[position]
+        engine.process_round([(name, place) for place, name in enumerate(round_obj.player_names, start=1)], round_obj.round_days)
+        hasher.update(round_obj.digest_bytes())
+
+        rounds_processed = position + 1
+        is_last = rounds_processed == len(ordered_rounds)
+        if rounds_processed % config.TRUESKILL_CHECKPOINT_INTERVAL == 0 or is_last:
+            # history segment first, a checkpoint is only trusted once its history is stored
+            segment = engine.rating_log.to_segment(settings_key, last_saved_position, rounds_processed, last_saved_entry)
+            persistence.save_trueskill_history_segment(segment)
+            last_saved_position, last_saved_entry = rounds_processed, len(engine.rating_log)
+
+            checkpoint = _make_checkpoint(engine, rounds_processed, round_obj, hasher.hexdigest())
+            persistence.save_trueskill_checkpoint(checkpoint)
+            kept.append(checkpoint)
+            checkpoints_written += 1
+
+    engine.rating_log = None
+
+    _prune_checkpoints(settings_key, kept)
+
+    return TrueSkillRefreshResult(
+        engine=engine,
+        resumed_from_round=resume_position,
+        rounds_replayed=len(ordered_rounds) - resume_position,
+        checkpoints_written=checkpoints_written
+    )
+
+
+def load_trueskill_ratings(rounds: RoundsInput, engine: TrueSkillEngine = None) -> TrueSkillRefreshResult:
+    """
+    Read only counterpart of refresh_trueskill_ratings: start from the newest still valid checkpoint and
+    replay the rounds after it in memory. Nothing is saved or deleted, the replayed updates are returned
+    in rating_log so the rating history can be completed without them being stored.
+    """
+    engine = engine or create_default_engine()
+    settings_key = engine.settings_key
+    ordered_rounds = get_ordered_rounds(as_rounds_frame(rounds))
+
+    summaries = persistence.get_trueskill_checkpoint_summaries(settings_key)
+    resume_summary = _find_valid_resume_checkpoint(settings_key, ordered_rounds, summaries)
+    resume_position = resume_summary.rounds_processed if resume_summary else 0
+
+    engine.reset()
+    if resume_summary:
+        engine.load_ratings(persistence.get_trueskill_checkpoint(settings_key, resume_position).ratings)
+    rating_log = engine.rating_log = RatingLog()
+    for round_obj in ordered_rounds[resume_position:]:
+        engine.process_round([(name, place) for place, name in enumerate(round_obj.player_names, start=1)], round_obj.round_days)
+    engine.rating_log = None
+
+    return TrueSkillRefreshResult(
+        engine=engine,
+        resumed_from_round=resume_position,
+        rounds_replayed=len(ordered_rounds) - resume_position,
+        checkpoints_written=0,
+        rating_log=rating_log
+    )
+
+
+def build_incremental_trueskill_leaderboard(rounds: RoundsInput) -> pd.DataFrame:
+    """
+    Same output as build_trueskill_leaderboard, both replay same day rounds in (bar_id, round_id) order,
+    but resumes from the persisted checkpoints.
+    """
+    result = refresh_trueskill_ratings(rounds)
+    return leaderboard_to_dataframe(result.engine.get_leaderboard())
@@ -0,0 +1,162 @@
+"""
+Point in time TrueSkill ratings.
+
+While the engine replays rounds it appends every player's new (round day, mu, sigma) to a RatingLog.
+The log is persisted as append only segments next to the rating checkpoints, and a RatingHistory
+built from it answers "what was this rating on that date" with a binary search instead of a replay.
+"""
+from array import array
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import trueskill
+
+from offsuit_analyzer import persistence
+from offsuit_analyzer.analytics.rounds_frame import round_date_to_days, days_to_round_date, INVALID_ROUND_DATE
+from offsuit_analyzer.analytics.trueskill_analyzer import PlayerRating
+from offsuit_analyzer.datamodel import TrueSkillHistorySegment
+
+
+class RatingLog:
+    """Append only columnar log of rating updates in replay order."""
+
+    def __init__(self):
+        self.player_names: List[str] = []
+        self._player_index: Dict[str, int] = {}
+        self.player_ids = array("i")
+        self.round_days = array("i")
+        self.mu = array("d")
+        self.sigma = array("d")
+
+    def __len__(self) -> int:
+        return len(self.player_ids)
+
+    def append(self, player_name: str, round_days: int, mu: float, sigma: float) -> None:
+        player_id = self._player_index.get(player_name)
+        if player_id is None:
+            player_id = self._player_index[player_name] = len(self.player_names)
+            self.player_names.append(player_name)
+        self.player_ids.append(player_id)
+        self.round_days.append(round_days)
+        self.mu.append(mu)
+        self.sigma.append(sigma)
+
+    def to_segment(self, settings_key: str, start_round: int, end_round: int, start_entry: int) -> TrueSkillHistorySegment:
+        """Pack the entries from start_entry on, with player ids local to the segment."""
+        global_ids = np.array(self.player_ids[start_entry:], dtype=np.int32)
+        segment_player_ids, local_ids = np.unique(global_ids, return_inverse=True)
+        return TrueSkillHistorySegment(
+            settings_key=settings_key,
+            start_round=start_round,
+            end_round=end_round,
+            player_names=tuple(self.player_names[i] for i in segment_player_ids.tolist()),
+            player_index=local_ids.astype(np.int32).tobytes(),
+            round_days=self.round_days[start_entry:].tobytes(),
+            mu=self.mu[start_entry:].tobytes(),
+            sigma=self.sigma[start_entry:].tobytes()
+        )
+
+    def extend(self, other: "RatingLog") -> None:
+        for player_id, round_days, mu, sigma in zip(other.player_ids, other.round_days, other.mu, other.sigma):
+            self.append(other.player_names[player_id], round_days, mu, sigma)
+
+    def extend_from_segment(self, segment: TrueSkillHistorySegment) -> None:
+        local_ids = array("i", segment.player_index)
+        for column, raw in ((self.round_days, segment.round_days), (self.mu, segment.mu), (self.sigma, segment.sigma)):
+            column.frombytes(raw)
+        for local_id in local_ids:
+            player_name = segment.player_names[local_id]
+            player_id = self._player_index.get(player_name)
+            if player_id is None:
+                player_id = self._player_index[player_name] = len(self.player_names)
+                self.player_names.append(player_name)
+            self.player_ids.append(player_id)
+
+
+class RatingHistory:
+    """Per player rating curves over a RatingLog, queried with binary search."""
+
+    def __init__(self, log: RatingLog):
+        player_ids = np.array(log.player_ids, dtype=np.int64)
+        # stable so each player's entries stay in replay order, which is also date order
+        order = np.argsort(player_ids, kind="stable")
+        self.player_names = list(log.player_names)
+        self._player_index = {name: i for i, name in enumerate(self.player_names)}
+        self._player_ids = player_ids[order]
+        self._round_days = np.array(log.round_days, dtype=np.int64)[order]
+        self._mu = np.array(log.mu, dtype=np.float64)[order]
+        self._sigma = np.array(log.sigma, dtype=np.float64)[order]
+        self._offsets = np.zeros(len(self.player_names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self._player_ids, minlength=len(self.player_names)), out=self._offsets[1:])
+        # one sorted key per entry lets a single searchsorted answer the as of query for every player
+        self._search_keys = (self._player_ids << 32) + (self._round_days - np.iinfo(np.int32).min)
+
+    def player_curve(self, player_name: str) -> pd.DataFrame:
+        """Every rating the player held, one row per round played."""
+        player_id = self._player_index.get(player_name)
+        if player_id is None:
+            return pd.DataFrame(columns=["Date", "Adjusted Ranking", "Raw Ranking", "Uncertainty"])
+        start, end = self._offsets[player_id], self._offsets[player_id + 1]
+        mu, sigma = self._mu[start:end], self._sigma[start:end]
+        return pd.DataFrame({
+            "Date": [_format_round_days(d) for d in self._round_days[start:end].tolist()],
+            "Adjusted Ranking": np.round(mu - 3 * sigma, 2),
+            "Raw Ranking": np.round(mu, 2),
+            "Uncertainty": np.round(sigma, 2),
+        })
+
+    def rating_as_of(self, player_name: str, round_date: str) -> Optional[trueskill.Rating]:
+        player_id = self._player_index.get(player_name)
+        if player_id is None:
+            return None
+        entry = self._entries_as_of(round_date, np.array([player_id]))[0]
+        return trueskill.Rating(mu=self._mu[entry], sigma=self._sigma[entry]) if entry >= 0 else None
+
+    def leaderboard_as_of(self, round_date: str) -> List[PlayerRating]:
+        """Ratings everyone held after the rounds played on or before round_date, same order as the engine leaderboard."""
+        entries = self._entries_as_of(round_date, np.arange(len(self.player_names)))
+        players = [
+            PlayerRating(self.player_names[player_id], trueskill.Rating(mu=self._mu[entry], sigma=self._sigma[entry]))
+            for player_id, entry in enumerate(entries.tolist()) if entry >= 0
+        ]
+        return sorted(players, key=lambda p: p.conservative_score, reverse=True)
+
+    def _entries_as_of(self, round_date: str, player_ids: np.ndarray) -> np.ndarray:
+        """Index of each player's last entry on or before round_date, -1 if they had not played yet."""
+        target_days = round_date_to_days(round_date)
+        target_keys = (player_ids.astype(np.int64) << 32) + (target_days - np.iinfo(np.int32).min)
+        entries = np.searchsorted(self._search_keys, target_keys, side="right") - 1
+        started = entries >= self._offsets[player_ids]
+        return np.where(started, entries, -1)
+
+
+def _format_round_days(round_days: int) -> str:
+    return "" if round_days == INVALID_ROUND_DATE else days_to_round_date(round_days)
+
+
+def load_rating_history(settings_key: str, rounds_processed: int = None, tail: RatingLog = None) -> RatingHistory:
+    """
+    Stored history, up to rounds_processed when given, followed by the updates in tail that were
+    replayed in memory after that point (see load_trueskill_ratings).
+    """
+    log = RatingLog()
+    for segment in persistence.get_trueskill_history_segments(settings_key):
+        if rounds_processed is not None and segment.start_round >= rounds_processed:
+            break  # past the resume point, tail holds the current version of these rounds
+        log.extend_from_segment(segment)
+    if tail is not None:
+        log.extend(tail)
+    return RatingHistory(log)
+
+
+def rating_history_covers(settings_key: str, rounds_processed: int) -> bool:
+    """True when the stored segments describe rounds (0, rounds_processed] without gaps."""
+    covered = 0
+    for segment in persistence.get_trueskill_history_segments(settings_key, include_arrays=False):
+        if segment.start_round != covered:
+            break
+        covered = segment.end_round
+        if covered >= rounds_processed:
+            break
+    return covered == rounds_processed
@@ -0,0 +1,168 @@
+"""
+TrueSkill hyperparameter sweep and predictive backtest.
+
+Replays the round history once per (beta, tau, mu, sigma) setting across a process pool. Every
+round in the held out tail is scored before the engine learns from it: the log likelihood of the
+observed finishing order under a Plackett-Luce model of the ratings the engine held going in.
+Higher (closer to 0) is better. The rounds are parsed into flat arrays once and shipped to each
+worker a single time, the replays reuse them instead of rebuilding round dicts per setting.
+
+    python -m offsuit_analyzer.analytics.trueskill_sweep --betas 4.17 10 21 --taus 0.083 0.4 1
+"""
+import argparse
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from offsuit_analyzer.analytics.rounds_frame import ROUNDS_FRAME_FIELDS, RoundsFrame, RoundsInput, as_rounds_frame
+from offsuit_analyzer.analytics.trueskill_analyzer import TrueSkillEngine
+from offsuit_analyzer.analytics.trueskill_checkpoints import get_ordered_rounds
+from offsuit_analyzer.config import config
+
+DEFAULT_MUS = (config.MU_TRUESKILL,)
+DEFAULT_SIGMAS = (config.SIGMA_TRUESKILL,)
+DEFAULT_BETAS = (25.0 / 6, 10.0, config.BETA_TRUESKILL, 30.0)
+DEFAULT_TAUS = (25.0 / 300, config.TAU_TRUESKILL, 1.0)
+
+# per worker process, filled once by _init_sweep_worker
+_sweep_rounds: List[List[Tuple[str, int]]] = []
+_sweep_holdout_start = 0
+
+
+def _init_sweep_worker(player_names: List[str], round_offsets: np.ndarray, player_ids: np.ndarray, holdout_start: int) -> None:
+    global _sweep_rounds, _sweep_holdout_start
+    names = player_names
+    ids = player_ids.tolist()
+    offsets = round_offsets.tolist()
+    _sweep_rounds = [
+        [(names[player_id], place) for place, player_id in enumerate(ids[offsets[i]:offsets[i + 1]], start=1)]
+        for i in range(len(offsets) - 1)
+    ]
+    _sweep_holdout_start = holdout_start
+
+
+def _order_log_likelihood(mu: np.ndarray, sigma: np.ndarray, beta: float) -> Tuple[float, float]:
+    """
+    Plackett-Luce log likelihood of a finishing order (players in placement order) and the share of
+    player pairs the ratings put in the right order. A pair rated equal, like two unseen players,
+    counts as half right, the same as a coin flip would.
+    """
+    c = np.sqrt(np.sum(sigma ** 2 + beta ** 2))
+    strength = mu / c
+    # log of the strength still alive at each position, summed from the last place up
+    shifted = strength - strength.max()
+    alive_log_sum = np.log(np.cumsum(np.exp(shifted)[::-1])[::-1])
+    log_likelihood = float(np.sum(shifted - alive_log_sum))
+
+    n = len(mu)
+    correct_pairs = np.sum(np.triu(mu[:, None] > mu[None, :], k=1)) + 0.5 * np.sum(np.triu(mu[:, None] == mu[None, :], k=1))
+    return log_likelihood, float(correct_pairs) / (n * (n - 1) / 2)
+
+
+def _run_sweep_setting(setting: Tuple[float, float, float, float]) -> Dict[str, float]:
+    mu, sigma, beta, tau = setting
+    engine = TrueSkillEngine(mu=mu, sigma=sigma, beta=beta, tau=tau, draw_probability=0.0)
+
+    start = time.perf_counter()
+    log_likelihood = pairwise_accuracy = baseline = 0.0
+    finishes = 0
+    for round_index, round_results in enumerate(_sweep_rounds):
+        if round_index >= _sweep_holdout_start:
+            ratings = [engine.get_rating(name) for name, _ in round_results]
+            round_ll, round_pairs = _order_log_likelihood(
+                np.array([r.mu for r in ratings]), np.array([r.sigma for r in ratings]), beta
+            )
+            log_likelihood += round_ll
+            pairwise_accuracy += round_pairs
+            # a uniformly random order has probability 1 / n!
+            baseline -= float(np.sum(np.log(np.arange(1, len(round_results) + 1))))
+            finishes += len(round_results)
+        engine.process_round(round_results)
+
+    held_out = max(len(_sweep_rounds) - _sweep_holdout_start, 1)
+    return {
+        "Mu": mu,
+        "Sigma": sigma,
+        "Beta": beta,
+        "Tau": tau,
+        "Log Likelihood / Round": log_likelihood / held_out,
+        "Log Likelihood / Finish": log_likelihood / max(finishes, 1),
+        "Gain Over Random / Round": (log_likelihood - baseline) / held_out,
+        "Pairwise Accuracy": pairwise_accuracy / held_out,
+        "Seconds": time.perf_counter() - start,
+    }
+
+
+def run_trueskill_sweep(rounds: RoundsInput,
+                        betas: Sequence[float] = DEFAULT_BETAS,
+                        taus: Sequence[float] = DEFAULT_TAUS,
+                        mus: Sequence[float] = DEFAULT_MUS,
+                        sigmas: Sequence[float] = DEFAULT_SIGMAS,
+                        holdout_fraction: float = 0.2,
+                        max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Backtest every combination of the given settings, best held out log likelihood first.
+    max_workers=1 runs everything in this process.
+    """
+    if not 0 < holdout_fraction < 1:
+        raise ValueError("holdout_fraction must be between 0 and 1")
+
+    ordered_rounds = get_ordered_rounds(as_rounds_frame(rounds))
+    player_index: Dict[str, int] = {}
+    player_ids = np.fromiter(
+        (player_index.setdefault(name, len(player_index)) for r in ordered_rounds for name in r.player_names),
+        dtype=np.int32
+    )
+    round_offsets = np.zeros(len(ordered_rounds) + 1, dtype=np.int64)
+    np.cumsum([len(r.player_names) for r in ordered_rounds], out=round_offsets[1:])
+    holdout_start = int(len(ordered_rounds) * (1 - holdout_fraction))
+    worker_args = (list(player_index), round_offsets, player_ids, holdout_start)
+
+    settings = list(itertools.product(mus, sigmas, betas, taus))
+    if max_workers == 1:
+        _init_sweep_worker(*worker_args)
+        results = [_run_sweep_setting(setting) for setting in settings]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_sweep_worker, initargs=worker_args) as executor:
+            results = list(executor.map(_run_sweep_setting, settings))
+
+    sweep_df = pd.DataFrame(results)
+    sweep_df["Current Settings"] = (
+        (sweep_df["Mu"] == config.MU_TRUESKILL) & (sweep_df["Sigma"] == config.SIGMA_TRUESKILL)
+        & (sweep_df["Beta"] == config.BETA_TRUESKILL) & (sweep_df["Tau"] == config.TAU_TRUESKILL)
+    )
+    sweep_df.insert(4, "Held Out Rounds", len(ordered_rounds) - holdout_start)
+    sweep_df.sort_values("Log Likelihood / Round", ascending=False, inplace=True)
+    sweep_df.reset_index(drop=True, inplace=True)
+    return sweep_df.round(4)
+
+
+# ===============================
+# DRIVER
+# ===============================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest TrueSkill settings on the stored rounds")
+    parser.add_argument("--betas", type=float, nargs="+", default=DEFAULT_BETAS)
+    parser.add_argument("--taus", type=float, nargs="+", default=DEFAULT_TAUS)
+    parser.add_argument("--mus", type=float, nargs="+", default=DEFAULT_MUS)
+    parser.add_argument("--sigmas", type=float, nargs="+", default=DEFAULT_SIGMAS)
+    parser.add_argument("--holdout", type=float, default=0.2, help="fraction of the latest rounds to score")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--synthetic", action="store_true", help="use generated rounds instead of the database")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from offsuit_analyzer.analytics.rating_engine_benchmark import generate_synthetic_rounds
+        rounds = generate_synthetic_rounds(800, 600)
+    else:
+        from offsuit_analyzer import persistence
+        rounds = RoundsFrame.from_documents(persistence.iter_round_documents(projection=ROUNDS_FRAME_FIELDS))
+
+    sweep = run_trueskill_sweep(rounds, args.betas, args.taus, args.mus, args.sigmas, args.holdout, args.workers)
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+        print(sweep.to_string(index=False))
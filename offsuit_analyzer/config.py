@@ -21,12 +21,24 @@ class Config:
         self.NAME_TOOL_1_LINK = self.POKER_APP_BASE_URL + "api/nametools/getwarnings"
         self.NAME_TOOL_2_LINK = self.POKER_APP_BASE_URL + "api/nametools/ambiguousnamestool"
         self.NAME_SIMILARITY_THRESHOLD = 79.9
+        self.MU_TRUESKILL = 25.0
+        self.SIGMA_TRUESKILL = 25.0 / 3
         self.BETA_TRUESKILL = 21
         self.TAU_TRUESKILL = .4
+        # "trueskill" for the exact factor graph engine, "weng_lin" for the vectorized approximation
+        self.RATING_ENGINE_BACKEND = os.getenv("OFFSUIT_ANALYZER_RATING_ENGINE_BACKEND", "trueskill")
+        self.TRUESKILL_CHECKPOINT_INTERVAL = 250  # rounds between periodic rating checkpoints
+        self.TRUESKILL_MAX_PERIODIC_CHECKPOINTS = 20
         self.PERCENT_FOR_ITM = 24
         self.PERCENT_FOR_ROI = .24
         self.STEEPNESS_FOR_ROI = 1.06
+        self.PAYOUT_TABLE_CACHE_SIZE = 4096
+        self.PLAYER_NAME_CACHE_SIZE = 65536  # raw name spellings kept by the normalization memo
         self._set_cosmos_config_items()
+        self._set_storage_config_items()
+        self._set_cache_config_items()
+        self._set_graph_config_items()
+        self._set_keep_the_score_config_items()
         self._set_email_stuff()
 
     def _get_email_list(self):
@@ -51,7 +63,45 @@ class Config:
         self.ROUNDS_COLLECTION_NAME = "pokerRoundsCollection" + collection_env_suffix
         self.WARNINGS_COLLECTION_NAME = "warningsCollection" + collection_env_suffix
         self.NAME_INFOS_COLLECTION_NAME = "nameClashesCollection" + collection_env_suffix
+        self.DATA_VERSIONS_COLLECTION_NAME = "dataVersionsCollection" + collection_env_suffix
+        self.TRUESKILL_CHECKPOINTS_COLLECTION_NAME = "trueskillCheckpointsCollection" + collection_env_suffix
+        self.TRUESKILL_HISTORY_COLLECTION_NAME = "trueskillHistoryCollection" + collection_env_suffix
+        self.PLAYER_ALIASES_COLLECTION_NAME = "playerAliasesCollection" + collection_env_suffix
 
+    def _set_storage_config_items(self):
+        # "mongo" for Cosmos DB, "sqlite" for a local database file (load tests, benchmarks, offline runs)
+        self.STORAGE_BACKEND = os.getenv("OFFSUIT_ANALYZER_STORAGE_BACKEND", "mongo")
+        self.SQLITE_DATABASE_PATH = os.getenv("OFFSUIT_ANALYZER_SQLITE_DATABASE_PATH", "offsuit_analyzer.sqlite3")
+        self.ROUNDS_CURSOR_BATCH_SIZE = 1000  # round documents fetched per round trip when streaming rounds
+
+    def _set_cache_config_items(self):
+        # rounds snapshot is thrown away after this long even if no data version change was seen
+        self.ROUNDS_CACHE_MAX_AGE_SECONDS = 60 * 60
+        # how often the cache is allowed to ask the database if the rounds data version changed
+        self.ROUNDS_CACHE_VERSION_CHECK_INTERVAL_SECONDS = 30
+
+    def _set_graph_config_items(self):
+        # "csgraph" for compiled all pairs dijkstra, "landmark" for the sampled approximation, "networkx" for the old per node loop
+        self.DISCONNECTEDNESS_BACKEND = os.getenv("OFFSUIT_ANALYZER_DISCONNECTEDNESS_BACKEND", "csgraph")
+        self.DISCONNECTEDNESS_MAX_WORKERS = int(os.getenv("OFFSUIT_ANALYZER_DISCONNECTEDNESS_MAX_WORKERS", "1"))
+        self.DISCONNECTEDNESS_SOURCE_CHUNK_SIZE = 256  # dijkstra sources per call, bounds the dense distance block in memory
+        self.DISCONNECTEDNESS_LANDMARKS = 256  # sampled sources for the landmark backend
+        # highlighted network graph pngs kept per rounds snapshot, a full league render is several MB
+        self.GRAPH_IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+        # layouts and renders run in worker processes, requests past the queue limit get a 503
+        self.GRAPH_RENDER_MAX_WORKERS = int(os.getenv("OFFSUIT_ANALYZER_GRAPH_RENDER_MAX_WORKERS", "2"))
+        self.GRAPH_RENDER_MAX_PENDING = 4
+        self.GRAPH_RENDER_TIMEOUT_SECONDS = 120
+        self.GRAPH_EGO_MAX_HOPS = 3
+        self.COMMUNITY_OVER_TIME_MAX_SLICES = 20
+
+    def _set_keep_the_score_config_items(self):
+        # boards are fetched in parallel over one keep-alive session, a refresh takes as long as the slowest bar
+        self.KEEP_THE_SCORE_MAX_CONCURRENT_FETCHES = 8
+        self.KEEP_THE_SCORE_CONNECT_TIMEOUT_SECONDS = 5
+        self.KEEP_THE_SCORE_READ_TIMEOUT_SECONDS = 30
+        # validators and payload hash of the last stored response per board, unchanged boards are skipped
+        self.KEEP_THE_SCORE_RESPONSE_CACHE_DIR = os.getenv("OFFSUIT_ANALYZER_KEEP_THE_SCORE_CACHE_DIR", ".keep_the_score_cache")
     
 
     @staticmethod
@@ -5,7 +5,8 @@ This module encapsulates all API interactions and data transformations,
 providing a simple interface for the rest of the application.
 """
 
-from .external_data_client import get_this_months_rounds_for_bars
+from .external_data_client import get_this_months_rounds_for_bars, commit_fetched_boards, get_last_fetch_timings, normalize_player_name
 from .legacy_data_client import get_june_data_as_rounds
+from .board_response_cache import StagedEntries
 
-__all__ = ["get_this_months_rounds_for_bars", "get_june_data_as_rounds"]
+__all__ = ["get_this_months_rounds_for_bars", "commit_fetched_boards", "get_last_fetch_timings", "normalize_player_name", "get_june_data_as_rounds", "StagedEntries"]
@@ -1,6 +1,6 @@
 from typing import List
 from offsuit_analyzer.datamodel import Round, PlayerScore
-from offsuit_analyzer.persistence import cosmos_client
+from offsuit_analyzer.persistence import storage
 from offsuit_analyzer.config import config
 
 def add_hardcoded_round() -> None:
@@ -42,14 +42,15 @@ def add_hardcoded_round() -> None:
             players=tuple(player_scores)
         )
         
-        # Store the round using cosmos client
+        # Store the round through the configured storage backend
         rounds_to_store: List[Round] = [manual_round]
-        cosmos_client.store_rounds(rounds_to_store)
+        result = storage.store_rounds(rounds_to_store)
         
         print(f"✅ Successfully added manual round to {config.ROUNDS_COLLECTION_NAME}: {round_id}")
         print(f"   Bar: {bar_name}")
         print(f"   Date: {round_date}")
         print(f"   Players: {len(player_scores)}")
+        print(f"   Stored: {result}")
         
     finally:
         # Always restore original collection name
@@ -0,0 +1,172 @@
+"""
+Benchmark of the Keep The Score board to Round conversion.
+
+Converts one synthetic board with the matrix conversion and with the original per score entry
+conversion, checks both give the same rounds and reports the best time of each.
+
+    python -m offsuit_analyzer.data_service.board_conversion_benchmark
+    python -m offsuit_analyzer.data_service.board_conversion_benchmark --rounds 5000 --players 3000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from offsuit_analyzer.datamodel import Round, PlayerScore
+from . import date_utils
+from .external_data_client import _convert_bar_json_to_round_objects, normalize_player_name
+
+
+# ===============================
+# REFERENCE CONVERSION
+# ===============================
+
+def _create_round_object(round_data: Dict[str, Any]) -> Round:
+    """Create a Round object from round data dictionary."""
+    players: List[PlayerScore] = []
+    for score_entry in round_data.get("scores", []):
+        points_scored: int = score_entry.get("points", 0)
+        if points_scored <= 0:
+            continue
+        
+        normalized_name: str = normalize_player_name(score_entry["name"])
+        player_score: PlayerScore = PlayerScore(
+            player_name=normalized_name,
+            points=points_scored
+        )
+        players.append(player_score)
+
+    return Round(
+        round_id=round_data["round_id"],
+        bar_name=round_data["bar_name"],
+        round_date=round_data["round_date"],  # Already converted date
+        bar_id=round_data.get("bar_id", ""),  # Store bar identifier, not token
+        players=tuple(players)
+    )
+
+
+def _convert_bar_json_to_round_objects_per_entry(bar_token: str, target_weekday: int, bar_json: Dict[str, Any]) -> List[Round]:
+    """The original per score entry conversion, the reference the matrix conversion is checked against."""
+    # Extract bar info from the JSON
+    board_info = bar_json.get("board", {})
+    bar_name: str = board_info.get("appearance", {}).get("title", "Unknown Bar")
+    board_id: str = str(board_info.get("id", "unknown"))  # Use board ID as bar_id
+    
+    players: List[Dict[str, Any]] = bar_json.get("players", [])
+    
+    # First pass: collect all rounds with scores
+    temp_rounds: List[Dict[str, Any]] = []
+    for round_obj in bar_json.get("rounds", []):
+        scores: List[Dict[str, Any]] = []
+        round_scores: List[int] = round_obj.get("scores", [])
+        for idx, score in enumerate(round_scores):
+            if idx < len(players) and score > 0:  # Only include non-zero scores
+                player: Dict[str, Any] = players[idx]
+                scores.append({
+                    "name": player.get("name"),
+                    "points": score
+                })
+        
+        # Only include rounds that have players with points
+        if scores:
+            entry_date = round_obj.get("date")
+            # Convert API entry date to actual round date immediately
+            actual_round_date = date_utils.calculate_poker_night_date(entry_date, target_weekday) if entry_date else None
+            
+            temp_rounds.append({
+                "round_id": str(round_obj.get("id")),
+                "bar_id": board_id,  # Use board ID from API, not token
+                "bar_name": bar_name,
+                "round_date": actual_round_date,  # Store calculated date
+                "scores": scores
+            })
+    
+    # Second pass: filter out players with 0 total points across all rounds
+    filtered_rounds: List[Dict[str, Any]] = _remove_zero_total_players_from_rounds(temp_rounds)
+    
+    # Third pass: convert to Round objects
+    return [_create_round_object(round_data) for round_data in filtered_rounds]
+
+
+def _remove_zero_total_players_from_rounds(rounds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Remove players who have 0 total points across all rounds."""
+    # Calculate total points for each player
+    player_totals: Dict[str, int] = {}
+    for round_obj in rounds:
+        for score in round_obj["scores"]:
+            player_name: str = score["name"]
+            player_totals[player_name] = player_totals.get(player_name, 0) + score["points"]
+    
+    # Get players with > 0 total points
+    players_with_points: set[str] = {name for name, total in player_totals.items() if total > 0}
+    
+    # Filter rounds to only include players with > 0 total points
+    filtered_rounds: List[Dict[str, Any]] = []
+    for round_obj in rounds:
+        filtered_scores: List[Dict[str, Any]] = [s for s in round_obj["scores"] if s["name"] in players_with_points]
+        if filtered_scores:  # Only include rounds that still have players
+            filtered_rounds.append({
+                **round_obj,  # Copy all round data
+                "scores": filtered_scores  # Replace with filtered scores
+            })
+    
+    return filtered_rounds
+
+
+def generate_synthetic_board(num_rounds: int = 2000, num_players: int = 1500, min_field: int = 10,
+                             max_field: int = 60, seed: int = 7) -> Dict[str, Any]:
+    """
+    A board shaped like the API's: every round has a score for every player on the board, mostly 0.
+    Names come with the mixed case, punctuation and spacing people type into the app.
+    """
+    rng = random.Random(seed)
+    players = [{"name": f"  Player\t{i}{rng.choice(['', '!', '.', ' Jr.'])} "} for i in range(num_players)]
+    first_entry = datetime(2022, 1, 5, 21, 30)
+    rounds = []
+    for round_index in range(num_rounds):
+        scores = [0] * num_players
+        field = rng.sample(range(num_players), rng.randint(min_field, max_field))
+        for place, player_index in enumerate(field):
+            scores[player_index] = 10 * (len(field) - place)
+        entry_date = first_entry + timedelta(days=round_index // 4)
+        rounds.append({"id": round_index, "date": entry_date.strftime("%a, %d %b %Y %H:%M:%S GMT"), "scores": scores})
+    return {"board": {"id": 424242, "appearance": {"title": "Synthetic Bar"}}, "players": players, "rounds": rounds}
+
+
+def time_conversion(convert: Callable[[str, int, Dict[str, Any]], List[Round]], board: Dict[str, Any],
+                    repeat: int) -> Dict[str, Any]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rounds = convert("synthetic-token", 2, board)
+        timings.append(time.perf_counter() - start)
+    return {"rounds": rounds, "seconds": min(timings)}
+
+
+def run_benchmark(board: Dict[str, Any], repeat: int = 3) -> None:
+    matrix = time_conversion(_convert_bar_json_to_round_objects, board, repeat)
+    per_entry = time_conversion(_convert_bar_json_to_round_objects_per_entry, board, repeat)
+    if [r.to_dict() for r in matrix["rounds"]] != [r.to_dict() for r in per_entry["rounds"]]:
+        raise AssertionError("matrix conversion does not match the per entry conversion")
+
+    scores = sum(len(r.players) for r in matrix["rounds"])
+    print(f"Board: {len(board['rounds'])} rounds x {len(board['players'])} players, {scores} scores kept")
+    print(f"{'Conversion':<12}{'Seconds':>10}")
+    print(f"{'per entry':<12}{per_entry['seconds']:>10.3f}")
+    print(f"{'matrix':<12}{matrix['seconds']:>10.3f}")
+    print(f"Speedup {per_entry['seconds'] / matrix['seconds']:.1f}x, identical rounds")
+
+
+# ===============================
+# DRIVER
+# ===============================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the matrix and per entry board conversions")
+    parser.add_argument("--rounds", type=int, default=2000, help="rounds on the synthetic board")
+    parser.add_argument("--players", type=int, default=1500, help="players on the synthetic board")
+    parser.add_argument("--repeat", type=int, default=3, help="conversions per path, the best time is reported")
+    args = parser.parse_args()
+
+    run_benchmark(generate_synthetic_board(args.rounds, args.players), args.repeat)
@@ -0,0 +1,61 @@
+"""
+On-disk cache of what the last stored Keep The Score response looked like, one small json file per board
+and storage target.
+
+Each entry keeps the ETag and Last-Modified validators the server sent, a hash of the raw payload, the
+poker night weekday the rounds were dated with and how many rounds the board had, so an unchanged board
+is recognized before its JSON is parsed. Entries are kept per storage target, a different backend,
+database file or collection starts without any. Entries are staged per refresh and only written once the
+rounds from them were stored, so a refresh that fails halfway never marks a board as already stored.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict
+
+from offsuit_analyzer.config import config
+
+
+def payload_hash(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+def _entry_path(token: str, storage_target: str) -> str:
+    # tokens grant write access to the board and targets can hold credentials, keep both out of file names
+    key_hash = hashlib.sha256(f"{token}\x1f{storage_target}".encode("utf-8")).hexdigest()[:32]
+    return os.path.join(config.KEEP_THE_SCORE_RESPONSE_CACHE_DIR, f"{key_hash}.json")
+
+def get_entry(token: str, storage_target: str) -> Dict[str, Any]:
+    """The board's last response stored into storage_target, empty if it was never stored there."""
+    try:
+        with open(_entry_path(token, storage_target), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class StagedEntries:
+    """Entries of one refresh, each refresh stages into its own so overlapping refreshes don't drop each other's."""
+    def __init__(self, storage_target: str):
+        self.storage_target = storage_target
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()  # boards of one refresh are fetched concurrently
+
+    def stage(self, token: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[token] = entry
+
+    def commit(self) -> int:
+        """Write every staged entry to disk, call once the fetched rounds are stored. Returns the entries written."""
+        with self._lock:
+            entries = dict(self._entries)
+            self._entries.clear()
+
+        os.makedirs(config.KEEP_THE_SCORE_RESPONSE_CACHE_DIR, exist_ok=True)
+        for token, entry in entries.items():
+            path = _entry_path(token, self.storage_target)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"  # two refreshes can commit the same board at once
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, path)  # a crash mid write leaves the previous entry, never half a file
+        return len(entries)
@@ -1,15 +1,37 @@
 import re
-from typing import List, Dict, Any, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from offsuit_analyzer.datamodel import Round, PlayerScore
 from offsuit_analyzer import email_smtp_service
+from offsuit_analyzer import persistence
 from offsuit_analyzer.config import config
 from . import date_utils
 from . import keep_the_score_api_client
+from . import board_response_cache
 
 
-def get_this_months_rounds_for_bars() -> List[Round]:
+@dataclass(frozen=True)
+class BarFetchTiming:
+    bar: str  # board id once the board loaded, otherwise the bar's position in BAR_CONFIGS
+    seconds: float  # fetch plus conversion to rounds
+    rounds: int
+    error: Optional[str] = None
+    unchanged: bool = False  # same board as the last stored refresh, nothing was parsed
+
+_last_fetch_timings: List[BarFetchTiming] = []
+_last_fetch_timings_lock = threading.Lock()
+
+
+def get_this_months_rounds_for_bars(force: bool = False, staged_entries: Optional[board_response_cache.StagedEntries] = None) -> List[Round]:
     """
     Fetch poker rounds for configured bars from all data sources.
+    Boards unchanged since the last refresh stored into the current storage target are skipped unless
+    force is set. Their responses are staged into staged_entries, pass it to commit_fetched_boards once
+    the rounds are stored.
     
     Returns:
         List of Round objects with calculated poker night dates from API and legacy sources
@@ -20,123 +42,153 @@ def get_this_months_rounds_for_bars() -> List[Round]:
         (config.token, config.poker_night) 
         for config in config.BAR_CONFIGS
     ]
-    api_rounds = _get_list_of_rounds_from_api(api_tokens_with_day)
+    api_rounds = _get_list_of_rounds_from_api(api_tokens_with_day, force, staged_entries)
     
     return api_rounds
 
 
+_WHITESPACE_RUNS = re.compile(r'\s+')
+_DISALLOWED_CHARACTERS = re.compile(r'[^a-z0-9 ?]')
+
+@lru_cache(maxsize=config.PLAYER_NAME_CACHE_SIZE)
 def normalize_player_name(raw_name: str) -> str:
-    """Clean and standardize player names."""
+    """Clean and standardize player names. Memoized, the same few hundred names come back on every ingest."""
     name = str(raw_name).lower() # Convert to string and lowercase for uniformity
-    name = re.sub(r'\s+', ' ', name) # Collapse all whitespace (tabs, newlines, multiple spaces) into a single space
-    name = re.sub(r'[^a-z0-9 ?]', '', name) # Remove all characters except lowercase letters, numbers, and spaces, and ?
+    name = _WHITESPACE_RUNS.sub(' ', name) # Collapse all whitespace (tabs, newlines, multiple spaces) into a single space
+    name = _DISALLOWED_CHARACTERS.sub('', name) # Remove all characters except lowercase letters, numbers, and spaces, and ?
     name = name.strip() # Remove any leading or trailing spaces (could be left from previous step)
 
     return name
 
-def _create_round_object(round_data: Dict[str, Any]) -> Round:
-    """Create a Round object from round data dictionary."""
-    players: List[PlayerScore] = []
-    for score_entry in round_data.get("scores", []):
-        points_scored: int = score_entry.get("points", 0)
-        if points_scored <= 0:
-            continue
-        
-        normalized_name: str = normalize_player_name(score_entry["name"])
-        player_score: PlayerScore = PlayerScore(
-            player_name=normalized_name,
-            points=points_scored
-        )
-        players.append(player_score)
-
-    return Round(
-        round_id=round_data["round_id"],
-        bar_name=round_data["bar_name"],
-        round_date=round_data["round_date"],  # Already converted date
-        bar_id=round_data.get("bar_id", ""),  # Store bar identifier, not token
-        players=tuple(players)
-    )
-
-def _get_list_of_rounds_from_api(api_tokens_with_day: List[Tuple[str, int]]) -> List[Round]:
-    """Fetch API data and convert directly to Round objects with correct round dates."""
+def _get_list_of_rounds_from_api(api_tokens_with_day: List[Tuple[str, int]], force: bool = False,
+                                 staged_entries: Optional[board_response_cache.StagedEntries] = None) -> List[Round]:
+    """
+    Fetch API data and convert directly to Round objects with correct round dates.
+    Bars are fetched concurrently, so the refresh takes about as long as the slowest bar.
+    """
+    if not api_tokens_with_day:
+        return []
+
+    storage_target = staged_entries.storage_target if staged_entries else persistence.get_storage_target()
+    cached_entries = {} if force else _get_stored_board_entries([token for token, _ in api_tokens_with_day], storage_target)
+    max_workers = min(config.KEEP_THE_SCORE_MAX_CONCURRENT_FETCHES, len(api_tokens_with_day))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="keep-the-score") as executor:
+        futures = [
+            executor.submit(_fetch_bar_rounds, position, token, target_weekday, cached_entries.get(token, {}), staged_entries)
+            for position, (token, target_weekday) in enumerate(api_tokens_with_day)
+        ]
+        results = [future.result() for future in futures]  # BAR_CONFIGS order, whichever bar finished first
+
     all_rounds: List[Round] = []
-    for token, target_weekday in api_tokens_with_day:
-        bar_json_from_api: Dict[str, Any] = keep_the_score_api_client.fetch_board_json(token)
-        if "error" in bar_json_from_api:
-            _email_keep_the_score_error(f"Error fetching token {token}: {bar_json_from_api['error']}")
-            continue
-        
-        # Convert this bar's data directly to Round objects
-        bar_rounds: List[Round] = _convert_bar_json_to_round_objects(token, target_weekday, bar_json_from_api)
+    timings: List[BarFetchTiming] = []
+    for (token, _), (bar_rounds, timing) in zip(api_tokens_with_day, results):
+        if timing.error:
+            _email_keep_the_score_error(f"Error fetching token {token}: {timing.error}")
         all_rounds.extend(bar_rounds)
+        timings.append(timing)
 
+    with _last_fetch_timings_lock:
+        _last_fetch_timings[:] = timings
     return all_rounds
 
+def _get_stored_board_entries(tokens: List[str], storage_target: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Cache entries of the boards whose rounds are still in the storage target. A wiped or restored
+    database has fewer rounds of a board than its entry remembers, so that board is fetched again.
+    """
+    entries = {token: board_response_cache.get_entry(token, storage_target) for token in tokens}
+    entries = {token: entry for token, entry in entries.items() if "board_id" in entry}
+    stored_counts = persistence.count_rounds_by_bar(list({entry["board_id"] for entry in entries.values()})) if entries else {}
+    return {
+        token: entry for token, entry in entries.items()
+        if stored_counts.get(entry["board_id"], 0) >= entry.get("round_count", 0)
+    }
+
+def _fetch_bar_rounds(position: int, token: str, target_weekday: int, cached_entry: Dict[str, Any],
+                      staged_entries: Optional[board_response_cache.StagedEntries]) -> Tuple[List[Round], BarFetchTiming]:
+    start = time.perf_counter()
+    bar_json_from_api, entry = keep_the_score_api_client.fetch_board_json(token, target_weekday, cached_entry)
+    if bar_json_from_api is None:
+        if staged_entries is not None:
+            staged_entries.stage(token, entry)
+        return [], BarFetchTiming(f"bar {position}", time.perf_counter() - start, 0, unchanged=True)
+    if "error" in bar_json_from_api:
+        return [], BarFetchTiming(f"bar {position}", time.perf_counter() - start, 0, bar_json_from_api["error"])
+
+    # Convert this bar's data directly to Round objects
+    bar_rounds: List[Round] = _convert_bar_json_to_round_objects(token, target_weekday, bar_json_from_api)
+    if staged_entries is not None:
+        # same board id the rounds are stored under, so the next refresh can check they are still there
+        board_id = str(bar_json_from_api.get("board", {}).get("id", "unknown"))
+        staged_entries.stage(token, {**entry, "board_id": board_id, "round_count": len(bar_rounds)})
+    bar = str(bar_json_from_api.get("board", {}).get("id", f"bar {position}"))
+    return bar_rounds, BarFetchTiming(bar, time.perf_counter() - start, len(bar_rounds))
+
+def commit_fetched_boards(staged_entries: board_response_cache.StagedEntries) -> int:
+    """Remember the boards of a fetch as stored, so the next refresh skips them if they did not change."""
+    return staged_entries.commit()
+
+def get_last_fetch_timings() -> List[Dict[str, Any]]:
+    """Per bar timing of the most recent Keep The Score fetch, slowest first."""
+    with _last_fetch_timings_lock:
+        timings = list(_last_fetch_timings)
+    return [asdict(timing) for timing in sorted(timings, key=lambda timing: timing.seconds, reverse=True)]
+
 def _email_keep_the_score_error(error_text: str):
     email_smtp_service.send_email(config.ADMIN_EMAIL, "Keep The Score API Error", error_text)
 
 def _convert_bar_json_to_round_objects(bar_token: str, target_weekday: int, bar_json: Dict[str, Any]) -> List[Round]:
-    """Convert a single bar's API JSON directly to Round objects with correct round dates."""
+    """
+    Convert a single bar's API JSON directly to Round objects with correct round dates.
+    The board's scores are read as one rounds x players matrix: rounds without points and players
+    with 0 total points are dropped with masks, and each player name is normalized once per board.
+    """
+    import numpy as np  # only needed on refresh, kept out of the web app's import
+
     # Extract bar info from the JSON
     board_info = bar_json.get("board", {})
     bar_name: str = board_info.get("appearance", {}).get("title", "Unknown Bar")
     board_id: str = str(board_info.get("id", "unknown"))  # Use board ID as bar_id
-    
+
     players: List[Dict[str, Any]] = bar_json.get("players", [])
-    
-    # First pass: collect all rounds with scores
-    temp_rounds: List[Dict[str, Any]] = []
-    for round_obj in bar_json.get("rounds", []):
-        scores: List[Dict[str, Any]] = []
-        round_scores: List[int] = round_obj.get("scores", [])
-        for idx, score in enumerate(round_scores):
-            if idx < len(players) and score > 0:  # Only include non-zero scores
-                player: Dict[str, Any] = players[idx]
-                scores.append({
-                    "name": player.get("name"),
-                    "points": score
-                })
-        
-        # Only include rounds that have players with points
-        if scores:
-            entry_date = round_obj.get("date")
+    api_rounds: List[Dict[str, Any]] = bar_json.get("rounds", [])
+    if not players or not api_rounds:
+        return []
+
+    score_rows: List[List[int]] = [round_obj.get("scores", []) for round_obj in api_rounds]
+    num_players = len(players)
+    if all(len(row) == num_players for row in score_rows):
+        score_matrix = np.array(score_rows, dtype=float)
+    else:
+        # rows can be shorter or longer than the player list, missing scores count as 0 and extra ones are ignored
+        score_matrix = np.zeros((len(score_rows), num_players))
+        for row_index, row in enumerate(score_rows):
+            row = row[:num_players]
+            score_matrix[row_index, :len(row)] = row
+
+    scored = score_matrix > 0  # Only include non-zero scores
+    player_totals = np.where(scored, score_matrix, 0).sum(axis=0)
+    scored &= player_totals > 0  # filter out players with 0 total points across all rounds
+    round_indices = np.flatnonzero(scored.any(axis=1))  # Only include rounds that have players with points
+
+    player_names: Dict[int, str] = {
+        player_index: normalize_player_name(players[player_index].get("name"))
+        for player_index in np.flatnonzero(player_totals > 0).tolist()
+    }
+    bar_rounds: List[Round] = []
+    for round_index in round_indices.tolist():
+        round_obj = api_rounds[round_index]
+        round_scores = score_rows[round_index]  # points keep the type the API sent, the matrix is only for masks
+        entry_date = round_obj.get("date")
+        bar_rounds.append(Round(
+            round_id=str(round_obj.get("id")),
+            bar_name=bar_name,
             # Convert API entry date to actual round date immediately
-            actual_round_date = date_utils.calculate_poker_night_date(entry_date, target_weekday) if entry_date else None
-            
-            temp_rounds.append({
-                "round_id": str(round_obj.get("id")),
-                "bar_id": board_id,  # Use board ID from API, not token
-                "bar_name": bar_name,
-                "round_date": actual_round_date,  # Store calculated date
-                "scores": scores
-            })
-    
-    # Second pass: filter out players with 0 total points across all rounds
-    filtered_rounds: List[Dict[str, Any]] = _remove_zero_total_players_from_rounds(temp_rounds)
-    
-    # Third pass: convert to Round objects using shared function
-    return [_create_round_object(round_data) for round_data in filtered_rounds]
-
-def _remove_zero_total_players_from_rounds(rounds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Remove players who have 0 total points across all rounds."""
-    # Calculate total points for each player
-    player_totals: Dict[str, int] = {}
-    for round_obj in rounds:
-        for score in round_obj["scores"]:
-            player_name: str = score["name"]
-            player_totals[player_name] = player_totals.get(player_name, 0) + score["points"]
-    
-    # Get players with > 0 total points
-    players_with_points: set[str] = {name for name, total in player_totals.items() if total > 0}
-    
-    # Filter rounds to only include players with > 0 total points
-    filtered_rounds: List[Dict[str, Any]] = []
-    for round_obj in rounds:
-        filtered_scores: List[Dict[str, Any]] = [s for s in round_obj["scores"] if s["name"] in players_with_points]
-        if filtered_scores:  # Only include rounds that still have players
-            filtered_rounds.append({
-                **round_obj,  # Copy all round data
-                "scores": filtered_scores  # Replace with filtered scores
-            })
-    
-    return filtered_rounds
+            round_date=date_utils.calculate_poker_night_date(entry_date, target_weekday) if entry_date else None,
+            bar_id=board_id,  # Use board ID from API, not token
+            players=tuple(
+                PlayerScore(player_name=player_names[player_index], points=round_scores[player_index])
+                for player_index in np.flatnonzero(scored[round_index]).tolist()
+            )
+        ))
+    return bar_rounds
@@ -1,13 +1,58 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from offsuit_analyzer.config import config
+from . import board_response_cache
+
+_session = None
+_session_lock = threading.Lock()
 
-def fetch_board_json(token: str) -> dict:
+
+def _get_session() -> requests.Session:
+    """One keep-alive session shared by every fetch, sized so each concurrent fetch gets its own pooled connection."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_maxsize=config.KEEP_THE_SCORE_MAX_CONCURRENT_FETCHES))
+            session.headers.update({"accept": "*/*"})
+            _session = session
+        return _session
+
+def fetch_board_json(token: str, target_weekday: int, cached_entry: Dict[str, Any]) -> Tuple[Optional[dict], Dict[str, Any]]:
+    """
+    The board's JSON and the cache entry describing this response. The JSON is None when the board is
+    unchanged since cached_entry was stored: the server answered 304 to its validators, or sent the same
+    payload again. The round dates depend on the bar's poker night, so an entry stored with a different
+    target_weekday never counts. Pass an empty entry to always get the board.
+    """
     url = f"https://keepthescore.com/api/{token}/board/"
-    headers = {"accept": "*/*"}
+    timeout = (config.KEEP_THE_SCORE_CONNECT_TIMEOUT_SECONDS, config.KEEP_THE_SCORE_READ_TIMEOUT_SECONDS)
+    cached = cached_entry if cached_entry.get("target_weekday") == target_weekday else {}
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
 
     try:
-        response = requests.get(url, headers=headers)
+        response = _get_session().get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304:
+            return None, cached
         response.raise_for_status()
-        return response.json()
+
+        entry = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "payload_hash": board_response_cache.payload_hash(response.content),
+            "target_weekday": target_weekday,
+        }
+        if cached.get("payload_hash") == entry["payload_hash"]:
+            # the server has no validator support or changed them, but the scores did not change
+            return None, {**cached, **entry}
+        return response.json(), entry
     except requests.RequestException as e:
-        return {"error": str(e)}
-    
\ No newline at end of file
+        return {"error": str(e)}, {}
@@ -6,9 +6,15 @@ Contains Round and PlayerScore classes for poker tournament data.
 from .player_score import PlayerScore
 from .round import Round
 from .name_clash import NameClash
+from .trueskill_checkpoint import TrueSkillCheckpoint
+from .trueskill_history_segment import TrueSkillHistorySegment
+from .player_alias import PlayerAlias
 
 __all__ = [
     'PlayerScore',
     'Round',
-    'NameClash'
+    'NameClash',
+    'TrueSkillCheckpoint',
+    'TrueSkillHistorySegment',
+    'PlayerAlias'
 ]
@@ -0,0 +1,21 @@
+from dataclasses import dataclass, fields
+from typing import Dict, Any
+
+@dataclass(frozen=True)
+class PlayerAlias:
+    alias: str  # normalized spelling as it appears in stored or incoming rounds
+    canonical_name: str  # the name every round and leaderboard shows for this player instead
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert object to dict using dataclass fields."""
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PlayerAlias":
+        """Create object from dict using dataclass fields."""
+        init_args = {field.name: data[field.name] for field in fields(cls)}
+        return cls(**init_args)
+
+    def unique_id(self) -> Dict[str, Any]:
+        """Return unique identifier for this alias, a spelling maps to one canonical name."""
+        return {"alias": self.alias}
@@ -1,3 +1,5 @@
+import hashlib
+import json
 from dataclasses import dataclass, fields
 from typing import Dict, Any, Tuple
 from . import player_score
@@ -41,3 +43,8 @@ class Round:
             "round_id": self.round_id,
             "bar_id": self.bar_id
         }
+
+    def content_hash(self) -> str:
+        """Stable hash of everything stored for this round, stored rounds with the same hash don't need rewriting."""
+        canonical = json.dumps(self.to_dict(), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,36 @@
+from dataclasses import dataclass, fields
+from typing import Dict, Any, Tuple
+
+CHECKPOINT_KIND_PERIODIC = "periodic"
+CHECKPOINT_KIND_HEAD = "head"
+
+@dataclass(frozen=True)
+class TrueSkillCheckpoint:
+    settings_key: str  # engine settings the ratings were computed with, checkpoints never mix settings
+    rounds_processed: int  # number of rounds replayed in (round_date, bar_id, round_id) order
+    last_round_date: str
+    last_round_id: str
+    last_bar_id: str
+    history_digest: str  # running hash of every processed round, detects backfills and edits before this point
+    kind: str  # periodic checkpoints are kept for rewinding, a head checkpoint only marks the latest state
+    created_at: str
+    ratings: Tuple[Tuple[str, float, float], ...]  # (player_name, mu, sigma)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert object to dict using dataclass fields."""
+        result = {field.name: getattr(self, field.name) for field in fields(self)}
+        result["ratings"] = [list(rating) for rating in self.ratings]
+        return result
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrueSkillCheckpoint":
+        """Create object from dict using dataclass fields, ratings may be left out of a projected query."""
+        init_args = {field.name: data.get(field.name) for field in fields(cls)}
+        init_args["ratings"] = tuple(tuple(rating) for rating in data.get("ratings") or ())
+        return cls(**init_args)
+
+    def unique_id(self) -> Dict[str, Any]:
+        return {
+            "settings_key": self.settings_key,
+            "rounds_processed": self.rounds_processed
+        }
@@ -0,0 +1,39 @@
+from dataclasses import dataclass, fields
+from typing import Dict, Any, Tuple
+
+@dataclass(frozen=True)
+class TrueSkillHistorySegment:
+    """
+    Rating updates produced while replaying rounds (start_round, end_round].
+    Columns are packed arrays: int32 player_index into player_names, int32 round days since 1970-01-01,
+    float64 mu and sigma, all in replay order.
+    """
+    settings_key: str
+    start_round: int
+    end_round: int
+    player_names: Tuple[str, ...]
+    player_index: bytes
+    round_days: bytes
+    mu: bytes
+    sigma: bytes
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert object to dict using dataclass fields."""
+        result = {field.name: getattr(self, field.name) for field in fields(self)}
+        result["player_names"] = list(self.player_names)
+        return result
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrueSkillHistorySegment":
+        """Create object from dict using dataclass fields, array columns may be left out of a projected query."""
+        init_args = {field.name: data.get(field.name) for field in fields(cls)}
+        init_args["player_names"] = tuple(data.get("player_names") or ())
+        for column in ("player_index", "round_days", "mu", "sigma"):
+            init_args[column] = bytes(data.get(column) or b"")
+        return cls(**init_args)
+
+    def unique_id(self) -> Dict[str, Any]:
+        return {
+            "settings_key": self.settings_key,
+            "start_round": self.start_round
+        }
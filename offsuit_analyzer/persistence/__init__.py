@@ -1,19 +1,58 @@
-from .cosmos_client import (
-    store_rounds,
-    get_all_rounds,
+from .storage import (
     save_warnings,
     get_all_warnings,
     delete_all_warnings,
     get_all_name_clashes,
     save_these_name_clashes,
     delete_these_name_clashes,
-    delete_all_name_clashes
+    delete_all_name_clashes,
+    save_trueskill_checkpoint,
+    get_trueskill_checkpoint_summaries,
+    get_trueskill_checkpoint,
+    delete_trueskill_checkpoints,
+    save_trueskill_history_segment,
+    get_trueskill_history_segments,
+    delete_trueskill_history_after,
+    iter_rounds,
+    iter_round_documents,
+    find_rounds,
+    find_round_documents,
+    ensure_indexes,
+    get_index_stats,
+    get_player_aliases,
+    resolve_player_name,
+    get_storage_target,
+    count_rounds_by_bar
+)
+from .rounds_cache import (
+    store_rounds,
+    get_all_rounds,
+    get_rounds_snapshot,
+    invalidate_rounds_cache,
+    get_rounds_cache_stats,
+    save_player_alias,
+    delete_player_alias
 )
 from .export_rounds import email_json_rounds_backup
 
 __all__ = [
     "store_rounds",
     "get_all_rounds",
+    "iter_rounds",
+    "iter_round_documents",
+    "find_rounds",
+    "find_round_documents",
+    "ensure_indexes",
+    "get_index_stats",
+    "get_storage_target",
+    "count_rounds_by_bar",
+    "get_rounds_snapshot",
+    "invalidate_rounds_cache",
+    "get_rounds_cache_stats",
+    "get_player_aliases",
+    "resolve_player_name",
+    "save_player_alias",
+    "delete_player_alias",
     "save_warnings", 
     "get_all_warnings",
     "delete_all_warnings",
@@ -21,5 +60,12 @@ __all__ = [
     "save_these_name_clashes",
     "delete_these_name_clashes",
     "delete_all_name_clashes",
+    "save_trueskill_checkpoint",
+    "get_trueskill_checkpoint_summaries",
+    "get_trueskill_checkpoint",
+    "delete_trueskill_checkpoints",
+    "save_trueskill_history_segment",
+    "get_trueskill_history_segments",
+    "delete_trueskill_history_after",
     "email_json_rounds_backup"
 ]
@@ -1,78 +1,299 @@
-from typing import List
-
-from pymongo import MongoClient, ReplaceOne
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 from offsuit_analyzer.datamodel import Round
 from offsuit_analyzer.datamodel import NameClash
+from offsuit_analyzer.datamodel import TrueSkillCheckpoint
+from offsuit_analyzer.datamodel import TrueSkillHistorySegment
+from offsuit_analyzer.datamodel import PlayerAlias
 from offsuit_analyzer.config import config
+from .storage_backend import StorageBackend, StoreRoundsResult, ROUNDS_DATA_VERSION_ID, dedupe_rounds
+
+
+class _LazyCollection:
+    """Stands in for a collection until it is first used."""
+    def __init__(self, backend: "MongoStorageBackend", name: str):
+        self._backend = backend
+        self._name = name
+        self._collection = None
+
+    def __getattr__(self, attribute: str):
+        if self._collection is None:
+            self._collection = self._backend.get_database()[self._name]
+        return getattr(self._collection, attribute)
+
+
+# (collection attribute, index name, keys, unique), every filter the backend queries or upserts on
+_INDEXES = (
+    ("rounds_collection", "round_id_bar_id", [("round_id", 1), ("bar_id", 1)], True),
+    ("rounds_collection", "round_date", [("round_date", 1)], False),
+    ("rounds_collection", "bar_id_round_date", [("bar_id", 1), ("round_date", 1)], False),
+    ("rounds_collection", "players_player_name", [("players.player_name", 1)], False),  # multikey, one entry per player
+    ("name_clashes_collection", "name", [("name", 1)], True),
+    ("trueskill_checkpoints_collection", "settings_key_rounds_processed", [("settings_key", 1), ("rounds_processed", 1)], True),
+    ("trueskill_history_collection", "settings_key_start_round", [("settings_key", 1), ("start_round", 1)], True),
+    ("player_aliases_collection", "alias", [("alias", 1)], True),
+)
+
+
+def _rounds_query(start_date: str, end_date: str, bar_ids: Optional[Sequence[str]], player_names: Optional[Sequence[str]]) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    date_range = {}
+    if start_date:
+        date_range["$gte"] = start_date
+    if end_date:
+        date_range["$lte"] = end_date
+    if date_range:
+        query["round_date"] = date_range  # YYYY-MM-DD strings compare in date order
+    if bar_ids is not None:
+        query["bar_id"] = {"$in": list(bar_ids)}
+    if player_names is not None:
+        query["players.player_name"] = {"$in": list(player_names)}
+    return query
+
+
+class MongoStorageBackend(StorageBackend):
+    def __init__(self, connection_string: str = None, db_name: str = None):
+        self._connection_string = connection_string or config.DATABASE_CONNECTION_STRING
+        self._db_name = db_name or config.MONGO_DB_NAME
+        # pymongo is imported and the MongoClient opened on the first query, not when the app or a script
+        # imports persistence
+        self._client = None
+        self._client_lock = threading.Lock()
+
+        self._rounds_collection_name = config.ROUNDS_COLLECTION_NAME
+        self.rounds_collection = _LazyCollection(self, self._rounds_collection_name)
+        self.warnings_collection = _LazyCollection(self, config.WARNINGS_COLLECTION_NAME)
+        self.name_clashes_collection = _LazyCollection(self, config.NAME_INFOS_COLLECTION_NAME)
+        self.data_versions_collection = _LazyCollection(self, config.DATA_VERSIONS_COLLECTION_NAME)
+        self.trueskill_checkpoints_collection = _LazyCollection(self, config.TRUESKILL_CHECKPOINTS_COLLECTION_NAME)
+        self.trueskill_history_collection = _LazyCollection(self, config.TRUESKILL_HISTORY_COLLECTION_NAME)
+        self.player_aliases_collection = _LazyCollection(self, config.PLAYER_ALIASES_COLLECTION_NAME)
+
+    def get_database(self):
+        with self._client_lock:
+            if self._client is None:
+                from pymongo import MongoClient
+                self._client = MongoClient(self._connection_string)
+        return self._client[self._db_name]
 
-connection_string = (config.DATABASE_CONNECTION_STRING)
-client = MongoClient(connection_string)
-db = client[config.MONGO_DB_NAME]
-
-rounds_collection = db[config.ROUNDS_COLLECTION_NAME]
-warnings_collection = db[config.WARNINGS_COLLECTION_NAME]
-name_clashes_collection = db[config.NAME_INFOS_COLLECTION_NAME]
-
-def store_rounds(rounds: List[Round]) -> None:
-    if not rounds:
-        return
-    
-    operations = [
-        ReplaceOne(
-            filter=round_obj.unique_id(),
-            replacement=round_obj.to_dict(),
+    def store_rounds(self, rounds: List[Round]) -> StoreRoundsResult:
+        if not rounds:
+            return StoreRoundsResult()
+        from pymongo import ReplaceOne
+
+        incoming = dedupe_rounds(rounds)
+        # one projected read of the stored hashes, served by the (round_id, bar_id) index
+        stored_hashes = {
+            (doc["round_id"], doc["bar_id"]): doc.get("content_hash")
+            for doc in self.rounds_collection.find(
+                {"round_id": {"$in": list({round_id for round_id, _ in incoming})}},
+                {"_id": 0, "round_id": 1, "bar_id": 1, "content_hash": 1}
+            )
+        }
+
+        operations = []
+        inserted = changed = 0
+        for key, round_obj in incoming.items():
+            content_hash = round_obj.content_hash()
+            if key in stored_hashes:
+                if stored_hashes[key] == content_hash:
+                    continue
+                changed += 1
+            else:
+                inserted += 1
+            operations.append(ReplaceOne(
+                filter=round_obj.unique_id(),
+                replacement={**round_obj.to_dict(), "content_hash": content_hash},
+                upsert=True
+            ))
+
+        if operations:
+            self.rounds_collection.bulk_write(operations, ordered=False)
+            self.bump_rounds_data_version()
+        return StoreRoundsResult(inserted, changed, len(rounds) - inserted - changed)
+
+    def bump_rounds_data_version(self) -> None:
+        """Mark the rounds collection as changed so cached snapshots in every process get reloaded."""
+        self.data_versions_collection.update_one(
+            {"_id": ROUNDS_DATA_VERSION_ID},
+            {"$inc": {"version": 1}},
             upsert=True
         )
-        for round_obj in rounds
-    ]
-
-    rounds_collection.bulk_write(operations, ordered=False)
-
-def get_all_rounds() -> List[Round]:
-    docs = list(rounds_collection.find({}))
-    return [Round.from_dict(doc) for doc in docs]
-
-
-def save_warnings(warning_strings: List[str]) -> None:
-    """Save multiple warning entries efficiently using bulk insert."""
-    if not warning_strings:
-        return
-    
-    warning_docs = [{"warning": warning_str} for warning_str in warning_strings]
-    warnings_collection.insert_many(warning_docs)
-
-def get_all_warnings() -> List[str]:
-    """Retrieve all warning entries from the database."""
-    docs = list(warnings_collection.find({}, {"_id": 0, "warning": 1}))
-    return [doc["warning"] for doc in docs if "warning" in doc]
-
-def delete_all_warnings() -> None:
-    """Delete all warning entries from the database."""
-    warnings_collection.delete_many({})
-
-def save_these_name_clashes(name_infos: List[NameClash]) -> None:
-    if not name_infos:
-        return
-    operations = [
-        ReplaceOne(
-            filter={"name": name_info.unique_id()},
-            replacement=name_info.to_dict(),
+
+    def get_rounds_data_version(self) -> Tuple[int, int]:
+        """
+        Cheap server side change check for the rounds collection.
+        Point read of the version document plus the metadata based document count,
+        so writes that forgot to bump the version but added or removed rounds are still noticed.
+        """
+        version_doc = self.data_versions_collection.find_one({"_id": ROUNDS_DATA_VERSION_ID}, {"version": 1})
+        version = version_doc.get("version", 0) if version_doc else 0
+        return version, self.rounds_collection.estimated_document_count()
+
+    @property
+    def storage_target(self) -> str:
+        return f"mongo|{self._connection_string}|{self._db_name}|{self._rounds_collection_name}"
+
+    def count_rounds_by_bar(self, bar_ids: Sequence[str]) -> Dict[str, int]:
+        # served by the (bar_id, round_date) index
+        counts = self.rounds_collection.aggregate([
+            {"$match": {"bar_id": {"$in": list(bar_ids)}}},
+            {"$group": {"_id": "$bar_id", "count": {"$sum": 1}}},
+        ])
+        return {doc["_id"]: doc["count"] for doc in counts}
+
+    def _collections(self) -> List[_LazyCollection]:
+        return [self.rounds_collection, self.warnings_collection, self.name_clashes_collection, self.data_versions_collection,
+                self.trueskill_checkpoints_collection, self.trueskill_history_collection, self.player_aliases_collection]
+
+    def ensure_indexes(self) -> List[Dict[str, Any]]:
+        from pymongo.errors import PyMongoError
+        report = []
+        for collection_attribute, name, keys, unique in _INDEXES:
+            collection = getattr(self, collection_attribute)
+            try:
+                collection.create_index(keys, name=name, unique=unique)
+                error = None
+            except PyMongoError as e:
+                # duplicates already stored, or Cosmos refusing a unique index on a collection that already has documents
+                error = str(e)
+            report.append({"collection": collection.name, "index": name, "unique": unique, "error": error})
+        return report
+
+    def get_index_stats(self) -> Dict[str, Any]:
+        from pymongo.errors import PyMongoError
+        stats = {}
+        for collection in self._collections():
+            try:
+                usage = {entry["name"]: entry["accesses"] for entry in collection.aggregate([{"$indexStats": {}}])}
+            except PyMongoError:
+                usage = None  # not every Cosmos server version supports $indexStats, still list the indexes
+            indexes = []
+            for name, info in collection.index_information().items():
+                accesses = usage.get(name) if usage is not None else None
+                indexes.append({
+                    "index": name,
+                    "keys": [field for field, _ in info["key"]],
+                    "unique": bool(info.get("unique")),
+                    "ops": int(accesses["ops"]) if accesses else None,
+                    "since": accesses["since"].isoformat() if accesses else None,
+                })
+            stats[collection.name] = {"documents": collection.estimated_document_count(), "indexes": indexes}
+        return stats
+
+    def iter_round_documents(self, batch_size: int, projection: Optional[Sequence[str]] = None,
+                             start_date: str = None, end_date: str = None,
+                             bar_ids: Optional[Sequence[str]] = None,
+                             player_names: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        fields = {"_id": 0}
+        if projection:
+            fields.update({field: 1 for field in projection})
+        query = _rounds_query(start_date, end_date, bar_ids, player_names)
+        # the cursor pulls the next batch from the server only once the previous one is consumed
+        return iter(self.rounds_collection.find(query, fields, batch_size=batch_size))
+
+    def save_warnings(self, warning_strings: List[str]) -> None:
+        """Save multiple warning entries efficiently using bulk insert."""
+        if not warning_strings:
+            return
+
+        warning_docs = [{"warning": warning_str} for warning_str in warning_strings]
+        self.warnings_collection.insert_many(warning_docs)
+
+    def get_all_warnings(self) -> List[str]:
+        """Retrieve all warning entries from the database."""
+        docs = list(self.warnings_collection.find({}, {"_id": 0, "warning": 1}))
+        return [doc["warning"] for doc in docs if "warning" in doc]
+
+    def delete_all_warnings(self) -> None:
+        """Delete all warning entries from the database."""
+        self.warnings_collection.delete_many({})
+
+    def save_these_name_clashes(self, name_infos: List[NameClash]) -> None:
+        if not name_infos:
+            return
+        from pymongo import ReplaceOne
+        operations = [
+            ReplaceOne(
+                filter={"name": name_info.unique_id()},
+                replacement=name_info.to_dict(),
+                upsert=True
+            )
+            for name_info in name_infos
+        ]
+        self.name_clashes_collection.bulk_write(operations, ordered=False)
+
+    def get_all_name_clashes(self) -> List[NameClash]:
+        docs = list(self.name_clashes_collection.find({}))
+        return [NameClash.from_dict(doc) for doc in docs]
+
+    def delete_these_name_clashes(self, name_infos: List[NameClash]) -> None:
+        if not name_infos:
+            return
+        names_to_delete = [name_info.name for name_info in name_infos]
+        self.name_clashes_collection.delete_many({"name": {"$in": names_to_delete}})
+
+    def delete_all_name_clashes(self) -> None:
+        self.name_clashes_collection.delete_many({})
+
+    def get_player_aliases(self) -> List[PlayerAlias]:
+        docs = self.player_aliases_collection.find({}, {"_id": 0})
+        return [PlayerAlias.from_dict(doc) for doc in docs]
+
+    def save_player_alias(self, player_alias: PlayerAlias) -> None:
+        self.player_aliases_collection.replace_one(
+            filter=player_alias.unique_id(),
+            replacement=player_alias.to_dict(),
+            upsert=True
+        )
+        self.bump_rounds_data_version()
+
+    def delete_player_alias(self, alias: str) -> None:
+        result = self.player_aliases_collection.delete_one({"alias": alias})
+        if result.deleted_count:
+            self.bump_rounds_data_version()
+
+    def save_trueskill_checkpoint(self, checkpoint: TrueSkillCheckpoint) -> None:
+        self.trueskill_checkpoints_collection.replace_one(
+            filter=checkpoint.unique_id(),
+            replacement=checkpoint.to_dict(),
             upsert=True
         )
-        for name_info in name_infos
-    ]
-    name_clashes_collection.bulk_write(operations, ordered=False)
-
-def get_all_name_clashes() -> List[NameClash]:
-    docs = list(name_clashes_collection.find({}))
-    return [NameClash.from_dict(doc) for doc in docs]
-
-def delete_these_name_clashes(name_infos: List[NameClash]) -> None:
-    if not name_infos:
-        return
-    names_to_delete = [name_info.name for name_info in name_infos]
-    name_clashes_collection.delete_many({"name": {"$in": names_to_delete}})
-
-def delete_all_name_clashes() -> None:
-    name_clashes_collection.delete_many({})
+
+    def get_trueskill_checkpoint_summaries(self, settings_key: str) -> List[TrueSkillCheckpoint]:
+        docs = self.trueskill_checkpoints_collection.find(
+            {"settings_key": settings_key},
+            {"_id": 0, "ratings": 0}
+        ).sort("rounds_processed", 1)
+        return [TrueSkillCheckpoint.from_dict(doc) for doc in docs]
+
+    def get_trueskill_checkpoint(self, settings_key: str, rounds_processed: int) -> TrueSkillCheckpoint:
+        doc = self.trueskill_checkpoints_collection.find_one({"settings_key": settings_key, "rounds_processed": rounds_processed})
+        return TrueSkillCheckpoint.from_dict(doc) if doc else None
+
+    def delete_trueskill_checkpoints(self, settings_key: str, rounds_processed_list: List[int]) -> None:
+        if not rounds_processed_list:
+            return
+        self.trueskill_checkpoints_collection.delete_many({
+            "settings_key": settings_key,
+            "rounds_processed": {"$in": rounds_processed_list}
+        })
+
+    def save_trueskill_history_segment(self, segment: TrueSkillHistorySegment) -> None:
+        self.trueskill_history_collection.replace_one(
+            filter=segment.unique_id(),
+            replacement=segment.to_dict(),
+            upsert=True
+        )
+
+    def get_trueskill_history_segments(self, settings_key: str, include_arrays: bool = True) -> List[TrueSkillHistorySegment]:
+        projection = {"_id": 0} if include_arrays else {"_id": 0, "settings_key": 1, "start_round": 1, "end_round": 1}
+        docs = self.trueskill_history_collection.find({"settings_key": settings_key}, projection).sort("start_round", 1)
+        return [TrueSkillHistorySegment.from_dict(doc) for doc in docs]
+
+    def delete_trueskill_history_after(self, settings_key: str, rounds_processed: int) -> None:
+        self.trueskill_history_collection.delete_many({
+            "settings_key": settings_key,
+            "end_round": {"$gt": rounds_processed}
+        })
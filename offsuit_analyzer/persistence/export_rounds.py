@@ -6,34 +6,36 @@ from offsuit_analyzer import email_smtp_service
 from offsuit_analyzer.config import config
 
 
-from offsuit_analyzer.persistence.cosmos_client import get_all_rounds
+from offsuit_analyzer.persistence.storage import iter_rounds
 
 def _create_zipped_json_rounds_data(rounds) -> BytesIO:
     """Convert rounds data to a ZIP file containing formatted JSON.
     
     Args:
-        rounds: List of Round objects to be converted to JSON and zipped
+        rounds: Iterable of Round objects to be converted to JSON and zipped, consumed one at a time
     
     Returns:
         BytesIO: A memory buffer containing the ZIP file with JSON data
     """
-    rounds_data = [round_obj.to_dict() for round_obj in rounds]
-    json_string = json.dumps(rounds_data, separators=(',', ':'), ensure_ascii=False)
-    
     # Create a BytesIO object to hold the zipped data
     zip_buffer = BytesIO()
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Add the JSON string to the ZIP
+        # Stream the JSON array into the ZIP entry, only the compressed output is held in memory
         json_file_name = datetime.now().strftime("%Y%m%d") + 'rounds_export.json'
-        zip_file.writestr(json_file_name, json_string)
+        with zip_file.open(json_file_name, 'w') as json_file:
+            json_file.write(b'[')
+            for i, round_obj in enumerate(rounds):
+                if i:
+                    json_file.write(b',')
+                json_file.write(json.dumps(round_obj.to_dict(), separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+            json_file.write(b']')
     
     zip_buffer.seek(0)
     return zip_buffer
 
 def email_json_rounds_backup() -> None:
     """Email a ZIP file containing rounds data to configured recipients."""
-    rounds = get_all_rounds()
-    zip_file = _create_zipped_json_rounds_data(rounds)
+    zip_file = _create_zipped_json_rounds_data(iter_rounds())
     
     list_of_recipient_email_addresses = [config.ADMIN_EMAIL]
     subject = "Poker Rounds Export - AUTOMATED"
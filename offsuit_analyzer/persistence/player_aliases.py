@@ -0,0 +1,117 @@
+"""
+Player alias resolution.
+
+An alias maps a normalized name spelling to the canonical name of the same player. Rounds are stored
+with the names they arrived with and aliases are applied when they are read, so merging two spellings
+is one alias entry instead of rewriting every stored round, and removing the alias fully undoes it.
+Chains (a -> b, b -> c) are followed once when the table is built, every lookup after that is a single
+dict read.
+"""
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from offsuit_analyzer.datamodel import Round
+from offsuit_analyzer.datamodel import PlayerAlias
+
+
+@dataclass(frozen=True)
+class AliasTable:
+    canonical_names: Dict[str, str]  # alias -> canonical name, chains already followed
+    variants: Dict[str, Tuple[str, ...]]  # canonical name -> every alias that resolves to it
+
+    def resolve(self, name: str) -> str:
+        return self.canonical_names.get(name, name)
+
+    def expand(self, names: Iterable[str]) -> List[str]:
+        """The names plus every stored spelling that resolves to one of them, for database side player filters."""
+        expanded = []
+        for name in names:
+            canonical_name = self.resolve(name)
+            expanded.append(canonical_name)
+            expanded.extend(self.variants.get(canonical_name, ()))
+        return list(dict.fromkeys(expanded))
+
+    def apply_to_round(self, round_obj: Round) -> Round:
+        # most rounds have no aliased player, hand those back untouched instead of copying them
+        if not self.canonical_names or not any(p.player_name in self.canonical_names for p in round_obj.players):
+            return round_obj
+        return replace(round_obj, players=tuple(
+            replace(p, player_name=self.canonical_names[p.player_name]) if p.player_name in self.canonical_names else p
+            for p in round_obj.players
+        ))
+
+    def apply_to_document(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Rename aliased players in a round document in place, documents without players are left alone."""
+        if self.canonical_names:
+            for player in doc.get("players", ()):
+                player["player_name"] = self.canonical_names.get(player["player_name"], player["player_name"])
+        return doc
+
+
+def build_alias_table(aliases: List[PlayerAlias]) -> AliasTable:
+    direct = {a.alias: a.canonical_name for a in aliases if a.alias != a.canonical_name}
+    canonical_names = {}
+    for alias in direct:
+        seen = {alias}
+        name = direct[alias]
+        while name in direct and name not in seen:  # a cycle can only come from two racing writes, stop at it
+            seen.add(name)
+            name = direct[name]
+        canonical_names[alias] = name
+
+    variants: Dict[str, List[str]] = {}
+    for alias, canonical_name in canonical_names.items():
+        variants.setdefault(canonical_name, []).append(alias)
+    return AliasTable(canonical_names, {name: tuple(sorted(names)) for name, names in variants.items()})
+
+def check_new_alias(table: AliasTable, player_alias: PlayerAlias) -> None:
+    """Raise ValueError for an alias that points at itself or would close a chain back onto itself."""
+    if not player_alias.alias or not player_alias.canonical_name:
+        raise ValueError("Alias and canonical name cannot be empty")
+    if player_alias.alias == player_alias.canonical_name:
+        raise ValueError(f"'{player_alias.alias}' cannot be an alias of itself")
+    if table.resolve(player_alias.canonical_name) == player_alias.alias:
+        raise ValueError(f"'{player_alias.canonical_name}' already resolves to '{player_alias.alias}'")
+
+
+class AliasTableCache:
+    """
+    Alias table shared by the request threads. Reloaded when the rounds data version moved (alias
+    changes bump it), asking the database at most once per version check interval.
+    """
+    def __init__(
+        self,
+        loader: Callable[[], List[PlayerAlias]],
+        version_checker: Callable[[], Hashable],
+        version_check_interval_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._loader = loader
+        self._version_checker = version_checker
+        self._version_check_interval_seconds = version_check_interval_seconds
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._table: Optional[AliasTable] = None
+        self._data_version: Hashable = None
+        self._last_version_check = 0.0
+
+    def get_table(self, fresh: bool = False) -> AliasTable:
+        """fresh skips the check interval, for full reads and writes that are expensive enough to afford it."""
+        with self._lock:
+            now = self._clock()
+            if self._table is not None and not fresh and now - self._last_version_check < self._version_check_interval_seconds:
+                return self._table
+
+            data_version = self._version_checker()
+            self._last_version_check = now
+            if self._table is None or data_version != self._data_version:
+                self._table = build_alias_table(self._loader())
+                self._data_version = data_version
+            return self._table
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._table = None
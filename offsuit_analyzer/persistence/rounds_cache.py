@@ -0,0 +1,144 @@
+"""
+In-process snapshot cache of all stored rounds.
+
+Every leaderboard endpoint needs the whole round history, so instead of scanning the rounds
+collection on every request the rounds are loaded once and shared until the data version
+changes, the snapshot hits its max age, or the cache is invalidated explicitly.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from offsuit_analyzer.datamodel import Round
+from offsuit_analyzer.config import config
+from . import storage
+
+
+@dataclass(frozen=True)
+class RoundsSnapshot:
+    generation: int  # increases on every reload, use it to key anything derived from the rounds
+    data_version: Hashable  # server side version the rounds were loaded at
+    rounds: Tuple[Round, ...]
+    loaded_at: float
+
+
+class RoundsSnapshotCache:
+    def __init__(
+        self,
+        loader: Callable[[], List[Round]],
+        version_checker: Callable[[], Hashable],
+        max_age_seconds: float,
+        version_check_interval_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._loader = loader
+        self._version_checker = version_checker
+        self._max_age_seconds = max_age_seconds
+        self._version_check_interval_seconds = version_check_interval_seconds
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._snapshot: Optional[RoundsSnapshot] = None
+        self._last_version_check = 0.0
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_snapshot(self) -> RoundsSnapshot:
+        # one lock for check and reload so a burst of requests on a cold cache only loads once
+        with self._lock:
+            now = self._clock()
+            if self._is_fresh(now):
+                self.hits += 1
+                return self._snapshot
+
+            self.misses += 1
+            self._snapshot = self._load(now)
+            return self._snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "generation": self._generation,
+                "cached_rounds": len(snapshot.rounds) if snapshot else 0,
+                "data_version": snapshot.data_version if snapshot else None,
+                "age_seconds": round(self._clock() - snapshot.loaded_at, 2) if snapshot else None,
+            }
+
+    def _is_fresh(self, now: float) -> bool:
+        if self._snapshot is None:
+            return False
+        if now - self._snapshot.loaded_at >= self._max_age_seconds:
+            return False
+        if now - self._last_version_check < self._version_check_interval_seconds:
+            # checked recently enough, serve without touching the database
+            return True
+
+        self._last_version_check = now
+        return self._version_checker() == self._snapshot.data_version
+
+    def _load(self, now: float) -> RoundsSnapshot:
+        # read the version before the rounds, a write landing in between just causes one extra reload later
+        data_version = self._version_checker()
+        rounds = tuple(self._loader())
+        self._generation += 1
+        self._last_version_check = now
+        return RoundsSnapshot(
+            generation=self._generation,
+            data_version=data_version,
+            rounds=rounds,
+            loaded_at=now,
+        )
+
+
+_rounds_cache = RoundsSnapshotCache(
+    loader=storage.get_all_rounds,
+    version_checker=storage.get_rounds_data_version,
+    max_age_seconds=config.ROUNDS_CACHE_MAX_AGE_SECONDS,
+    version_check_interval_seconds=config.ROUNDS_CACHE_VERSION_CHECK_INTERVAL_SECONDS,
+)
+
+
+def get_rounds_snapshot() -> RoundsSnapshot:
+    return _rounds_cache.get_snapshot()
+
+def get_all_rounds() -> List[Round]:
+    """All stored rounds, served from the snapshot cache when it is still current."""
+    return list(_rounds_cache.get_snapshot().rounds)
+
+def store_rounds(rounds: List[Round]) -> storage.StoreRoundsResult:
+    """
+    Store new and changed rounds and drop this process's snapshot right away instead of waiting for the
+    next version check. Unchanged rounds are skipped and leave the snapshot alone.
+    """
+    result = storage.store_rounds(rounds)
+    if result.written:
+        _rounds_cache.invalidate()
+    return result
+
+def save_player_alias(alias: str, canonical_name: str) -> None:
+    """Save the alias and drop this process's snapshot so the merged names show up right away."""
+    storage.save_player_alias(alias, canonical_name)
+    _rounds_cache.invalidate()
+
+def delete_player_alias(alias: str) -> None:
+    storage.delete_player_alias(alias)
+    _rounds_cache.invalidate()
+
+def invalidate_rounds_cache() -> None:
+    _rounds_cache.invalidate()
+
+def get_rounds_cache_stats() -> Dict[str, Any]:
+    return _rounds_cache.stats()
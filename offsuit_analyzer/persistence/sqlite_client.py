@@ -0,0 +1,363 @@
+"""
+SQLite storage backend.
+
+Keeps everything cosmos_client stores in one local database file, so the app, benchmarks and load
+tests run without Cosmos. Documents are stored as the same JSON the Mongo backend writes, with the
+key fields as real columns, and the tables reuse the collection names (Dev/Prod suffix included).
+Player membership of every round is kept in a side table, the counterpart of Mongo's multikey index
+on players.player_name. Needs SQLite 3.24 or newer for the upserts.
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from offsuit_analyzer.datamodel import Round
+from offsuit_analyzer.datamodel import NameClash
+from offsuit_analyzer.datamodel import TrueSkillCheckpoint
+from offsuit_analyzer.datamodel import TrueSkillHistorySegment
+from offsuit_analyzer.datamodel import PlayerAlias
+from offsuit_analyzer.config import config
+from .storage_backend import StorageBackend, StoreRoundsResult, ROUNDS_DATA_VERSION_ID, dedupe_rounds
+
+_HISTORY_ARRAY_COLUMNS = ("player_index", "round_days", "mu", "sigma")
+
+
+class SQLiteStorageBackend(StorageBackend):
+    def __init__(self, path: str = None):
+        self._path = path or config.SQLITE_DATABASE_PATH
+        self._connection = None
+        # one connection shared by the request threads, sqlite serializes writers anyway
+        self._lock = threading.Lock()
+
+        self._rounds_table = config.ROUNDS_COLLECTION_NAME
+        self._round_players_table = config.ROUNDS_COLLECTION_NAME + "Players"
+        self._warnings_table = config.WARNINGS_COLLECTION_NAME
+        self._name_clashes_table = config.NAME_INFOS_COLLECTION_NAME
+        self._data_versions_table = config.DATA_VERSIONS_COLLECTION_NAME
+        self._checkpoints_table = config.TRUESKILL_CHECKPOINTS_COLLECTION_NAME
+        self._history_table = config.TRUESKILL_HISTORY_COLLECTION_NAME
+        self._player_aliases_table = config.PLAYER_ALIASES_COLLECTION_NAME
+
+    def _connect(self) -> sqlite3.Connection:
+        # opened on first use like the Mongo client
+        if self._connection is None:
+            connection = sqlite3.connect(self._path, check_same_thread=False, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")  # readers in other processes don't block the writer
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._create_tables(connection)
+            self._connection = connection
+        return self._connection
+
+    def _create_tables(self, connection: sqlite3.Connection) -> None:
+        with connection:
+            connection.executescript(f"""
+                CREATE TABLE IF NOT EXISTS "{self._rounds_table}" (
+                    round_id TEXT NOT NULL,
+                    bar_id TEXT NOT NULL,
+                    round_date TEXT,  -- None when the API entry had no date, same as the Mongo documents
+                    document TEXT NOT NULL,
+                    content_hash TEXT,
+                    PRIMARY KEY (round_id, bar_id)
+                );
+                CREATE TABLE IF NOT EXISTS "{self._round_players_table}" (
+                    player_name TEXT NOT NULL,
+                    round_rowid INTEGER NOT NULL,
+                    PRIMARY KEY (player_name, round_rowid)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS "{self._round_players_table}_round_rowid" ON "{self._round_players_table}" (round_rowid);
+                CREATE TABLE IF NOT EXISTS "{self._warnings_table}" (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    warning TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS "{self._name_clashes_table}" (
+                    name TEXT PRIMARY KEY,
+                    document TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS "{self._data_versions_table}" (
+                    id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS "{self._checkpoints_table}" (
+                    settings_key TEXT NOT NULL,
+                    rounds_processed INTEGER NOT NULL,
+                    summary TEXT NOT NULL,
+                    ratings TEXT NOT NULL,
+                    PRIMARY KEY (settings_key, rounds_processed)
+                );
+                CREATE TABLE IF NOT EXISTS "{self._history_table}" (
+                    settings_key TEXT NOT NULL,
+                    start_round INTEGER NOT NULL,
+                    end_round INTEGER NOT NULL,
+                    player_names TEXT NOT NULL,
+                    player_index BLOB NOT NULL,
+                    round_days BLOB NOT NULL,
+                    mu BLOB NOT NULL,
+                    sigma BLOB NOT NULL,
+                    PRIMARY KEY (settings_key, start_round)
+                );
+                CREATE TABLE IF NOT EXISTS "{self._player_aliases_table}" (
+                    alias TEXT PRIMARY KEY,
+                    canonical_name TEXT NOT NULL
+                );
+            """)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                yield connection
+
+    def _execute(self, sql: str, parameters=()) -> List[tuple]:
+        with self._transaction() as connection:
+            return connection.execute(sql, parameters).fetchall()
+
+    def _execute_many(self, sql: str, rows: List[tuple]) -> None:
+        with self._transaction() as connection:
+            connection.executemany(sql, rows)
+
+    def _tables(self) -> List[str]:
+        return [self._rounds_table, self._round_players_table, self._warnings_table, self._name_clashes_table,
+                self._data_versions_table, self._checkpoints_table, self._history_table, self._player_aliases_table]
+
+    def ensure_indexes(self) -> List[Dict[str, Any]]:
+        # the unique keys (round_id, bar_id), clash name, checkpoint, history and alias keys are the tables' primary keys
+        indexes = (
+            (f"{self._rounds_table}_round_date", self._rounds_table, "round_date"),
+            (f"{self._rounds_table}_bar_id_round_date", self._rounds_table, "bar_id, round_date"),
+        )
+        with self._transaction() as connection:
+            for name, table, columns in indexes:
+                connection.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({columns})')
+            # without statistics the planner walks the rowid order instead of using the date index
+            connection.execute("ANALYZE")
+        return [{"collection": table, "index": name, "unique": False, "error": None} for name, table, _ in indexes]
+
+    def get_index_stats(self) -> Dict[str, Any]:
+        # sqlite keeps no usage counters, the ANALYZE statistics (rows, rows per key prefix) stand in for them
+        with self._transaction() as connection:
+            has_stats = connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+            analyzed = dict(((table, index), stat) for table, index, stat in connection.execute("SELECT tbl, idx, stat FROM sqlite_stat1")) if has_stats else {}
+            stats = {}
+            for table in self._tables():
+                indexes = []
+                for _, name, unique, origin, _ in connection.execute(f'PRAGMA index_list("{table}")'):
+                    keys = [column for _, _, column in connection.execute(f'PRAGMA index_info("{name}")')]
+                    indexes.append({"index": name, "keys": keys, "unique": bool(unique), "origin": origin, "stat": analyzed.get((table, name))})
+                documents = connection.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                stats[table] = {"documents": documents, "indexes": indexes}
+            return stats
+
+    def store_rounds(self, rounds: List[Round]) -> StoreRoundsResult:
+        if not rounds:
+            return StoreRoundsResult()
+        inserted = changed = 0
+        with self._transaction() as connection:
+            for (round_id, bar_id), r in dedupe_rounds(rounds).items():
+                content_hash = r.content_hash()
+                stored = connection.execute(
+                    f'SELECT content_hash FROM "{self._rounds_table}" WHERE round_id = ? AND bar_id = ?', (round_id, bar_id)
+                ).fetchone()
+                if stored is not None:
+                    if stored[0] == content_hash:
+                        continue
+                    changed += 1
+                else:
+                    inserted += 1
+
+                # upsert in place so a replaced round keeps its position, the same as a Mongo replace
+                connection.execute(
+                    f"""INSERT INTO "{self._rounds_table}" (round_id, bar_id, round_date, document, content_hash) VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT (round_id, bar_id) DO UPDATE SET
+                            round_date = excluded.round_date, document = excluded.document, content_hash = excluded.content_hash""",
+                    (round_id, bar_id, r.round_date, json.dumps(r.to_dict()), content_hash)
+                )
+                # read back instead of RETURNING, which needs sqlite 3.35
+                (round_rowid,) = connection.execute(
+                    f'SELECT rowid FROM "{self._rounds_table}" WHERE round_id = ? AND bar_id = ?', (round_id, bar_id)
+                ).fetchone()
+                connection.execute(f'DELETE FROM "{self._round_players_table}" WHERE round_rowid = ?', (round_rowid,))
+                connection.executemany(
+                    f'INSERT OR IGNORE INTO "{self._round_players_table}" (player_name, round_rowid) VALUES (?, ?)',
+                    [(p.player_name, round_rowid) for p in r.players]
+                )
+        if inserted or changed:
+            self.bump_rounds_data_version()
+        return StoreRoundsResult(inserted, changed, len(rounds) - inserted - changed)
+
+    def bump_rounds_data_version(self) -> None:
+        self._execute(
+            f"""INSERT INTO "{self._data_versions_table}" (id, version) VALUES (?, 1)
+                ON CONFLICT (id) DO UPDATE SET version = version + 1""",
+            (ROUNDS_DATA_VERSION_ID,)
+        )
+
+    def get_rounds_data_version(self) -> Tuple[int, int]:
+        version_rows = self._execute(f'SELECT version FROM "{self._data_versions_table}" WHERE id = ?', (ROUNDS_DATA_VERSION_ID,))
+        count_rows = self._execute(f'SELECT COUNT(*) FROM "{self._rounds_table}"')
+        return (version_rows[0][0] if version_rows else 0), count_rows[0][0]
+
+    @property
+    def storage_target(self) -> str:
+        return f"sqlite|{os.path.abspath(self._path)}|{self._rounds_table}"
+
+    def count_rounds_by_bar(self, bar_ids: Sequence[str]) -> Dict[str, int]:
+        bar_ids = list(bar_ids)
+        if not bar_ids:
+            return {}
+        rows = self._execute(
+            f'SELECT bar_id, COUNT(*) FROM "{self._rounds_table}" WHERE bar_id IN ({", ".join("?" * len(bar_ids))}) GROUP BY bar_id',
+            bar_ids
+        )
+        return dict(rows)
+
+    def iter_round_documents(self, batch_size: int, projection: Optional[Sequence[str]] = None,
+                             start_date: str = None, end_date: str = None,
+                             bar_ids: Optional[Sequence[str]] = None,
+                             player_names: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        conditions, parameters = ["rowid > ?"], []
+        if start_date:
+            conditions.append("round_date >= ?")
+            parameters.append(start_date)
+        if end_date:
+            conditions.append("round_date <= ?")
+            parameters.append(end_date)
+        if bar_ids is not None:
+            bar_ids = list(bar_ids)
+            conditions.append(f"bar_id IN ({', '.join('?' * len(bar_ids))})")
+            parameters.extend(bar_ids)
+        if player_names is not None:
+            player_names = list(player_names)
+            conditions.append(
+                f'rowid IN (SELECT round_rowid FROM "{self._round_players_table}" WHERE player_name IN ({", ".join("?" * len(player_names))}))'
+            )
+            parameters.extend(player_names)
+        sql = f'SELECT rowid, document FROM "{self._rounds_table}" WHERE {" AND ".join(conditions)} ORDER BY rowid LIMIT ?'
+
+        # keyset pages by rowid, the lock is only held while a page is read, not while the caller works through it
+        last_rowid = 0
+        while True:
+            rows = self._execute(sql, (last_rowid, *parameters, batch_size))
+            for _, document in rows:
+                doc = json.loads(document)
+                yield {field: doc[field] for field in projection if field in doc} if projection else doc
+            if len(rows) < batch_size:
+                return
+            last_rowid = rows[-1][0]
+
+    def save_warnings(self, warning_strings: List[str]) -> None:
+        if not warning_strings:
+            return
+        self._execute_many(f'INSERT INTO "{self._warnings_table}" (warning) VALUES (?)', [(w,) for w in warning_strings])
+
+    def get_all_warnings(self) -> List[str]:
+        return [warning for warning, in self._execute(f'SELECT warning FROM "{self._warnings_table}" ORDER BY id')]
+
+    def delete_all_warnings(self) -> None:
+        self._execute(f'DELETE FROM "{self._warnings_table}"')
+
+    def save_these_name_clashes(self, name_infos: List[NameClash]) -> None:
+        if not name_infos:
+            return
+        self._execute_many(
+            f"""INSERT INTO "{self._name_clashes_table}" (name, document) VALUES (?, ?)
+                ON CONFLICT (name) DO UPDATE SET document = excluded.document""",
+            [(name_info.unique_id(), json.dumps(name_info.to_dict())) for name_info in name_infos]
+        )
+
+    def get_all_name_clashes(self) -> List[NameClash]:
+        rows = self._execute(f'SELECT document FROM "{self._name_clashes_table}" ORDER BY rowid')
+        return [NameClash.from_dict(json.loads(document)) for document, in rows]
+
+    def delete_these_name_clashes(self, name_infos: List[NameClash]) -> None:
+        if not name_infos:
+            return
+        self._execute_many(f'DELETE FROM "{self._name_clashes_table}" WHERE name = ?', [(name_info.name,) for name_info in name_infos])
+
+    def delete_all_name_clashes(self) -> None:
+        self._execute(f'DELETE FROM "{self._name_clashes_table}"')
+
+    def get_player_aliases(self) -> List[PlayerAlias]:
+        rows = self._execute(f'SELECT alias, canonical_name FROM "{self._player_aliases_table}" ORDER BY alias')
+        return [PlayerAlias(alias, canonical_name) for alias, canonical_name in rows]
+
+    def save_player_alias(self, player_alias: PlayerAlias) -> None:
+        self._execute(
+            f"""INSERT INTO "{self._player_aliases_table}" (alias, canonical_name) VALUES (?, ?)
+                ON CONFLICT (alias) DO UPDATE SET canonical_name = excluded.canonical_name""",
+            (player_alias.alias, player_alias.canonical_name)
+        )
+        self.bump_rounds_data_version()
+
+    def delete_player_alias(self, alias: str) -> None:
+        with self._transaction() as connection:
+            deleted = connection.execute(f'DELETE FROM "{self._player_aliases_table}" WHERE alias = ?', (alias,)).rowcount
+        if deleted:
+            self.bump_rounds_data_version()
+
+    def save_trueskill_checkpoint(self, checkpoint: TrueSkillCheckpoint) -> None:
+        # ratings in their own column so the summaries never have to parse them
+        summary = checkpoint.to_dict()
+        ratings = summary.pop("ratings")
+        self._execute(
+            f"""INSERT OR REPLACE INTO "{self._checkpoints_table}" (settings_key, rounds_processed, summary, ratings)
+                VALUES (?, ?, ?, ?)""",
+            (checkpoint.settings_key, checkpoint.rounds_processed, json.dumps(summary), json.dumps(ratings))
+        )
+
+    def get_trueskill_checkpoint_summaries(self, settings_key: str) -> List[TrueSkillCheckpoint]:
+        rows = self._execute(
+            f'SELECT summary FROM "{self._checkpoints_table}" WHERE settings_key = ? ORDER BY rounds_processed',
+            (settings_key,)
+        )
+        return [TrueSkillCheckpoint.from_dict(json.loads(summary)) for summary, in rows]
+
+    def get_trueskill_checkpoint(self, settings_key: str, rounds_processed: int) -> TrueSkillCheckpoint:
+        rows = self._execute(
+            f'SELECT summary, ratings FROM "{self._checkpoints_table}" WHERE settings_key = ? AND rounds_processed = ?',
+            (settings_key, rounds_processed)
+        )
+        if not rows:
+            return None
+        summary, ratings = rows[0]
+        return TrueSkillCheckpoint.from_dict({**json.loads(summary), "ratings": json.loads(ratings)})
+
+    def delete_trueskill_checkpoints(self, settings_key: str, rounds_processed_list: List[int]) -> None:
+        if not rounds_processed_list:
+            return
+        self._execute_many(
+            f'DELETE FROM "{self._checkpoints_table}" WHERE settings_key = ? AND rounds_processed = ?',
+            [(settings_key, rounds_processed) for rounds_processed in rounds_processed_list]
+        )
+
+    def save_trueskill_history_segment(self, segment: TrueSkillHistorySegment) -> None:
+        self._execute(
+            f"""INSERT OR REPLACE INTO "{self._history_table}"
+                (settings_key, start_round, end_round, player_names, player_index, round_days, mu, sigma)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            (segment.settings_key, segment.start_round, segment.end_round, json.dumps(list(segment.player_names)),
+             segment.player_index, segment.round_days, segment.mu, segment.sigma)
+        )
+
+    def get_trueskill_history_segments(self, settings_key: str, include_arrays: bool = True) -> List[TrueSkillHistorySegment]:
+        columns = ("settings_key", "start_round", "end_round") + (("player_names",) + _HISTORY_ARRAY_COLUMNS if include_arrays else ())
+        rows = self._execute(
+            f'SELECT {", ".join(columns)} FROM "{self._history_table}" WHERE settings_key = ? ORDER BY start_round',
+            (settings_key,)
+        )
+        segments = []
+        for row in rows:
+            doc = dict(zip(columns, row))
+            if include_arrays:
+                doc["player_names"] = json.loads(doc["player_names"])
+            segments.append(TrueSkillHistorySegment.from_dict(doc))
+        return segments
+
+    def delete_trueskill_history_after(self, settings_key: str, rounds_processed: int) -> None:
+        self._execute(
+            f'DELETE FROM "{self._history_table}" WHERE settings_key = ? AND end_round > ?',
+            (settings_key, rounds_processed)
+        )
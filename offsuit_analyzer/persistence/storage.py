@@ -0,0 +1,216 @@
+"""
+Persistence functions, forwarded to the storage backend chosen by config.STORAGE_BACKEND.
+Player aliases are applied here when rounds are read, rounds are stored with names as they arrived.
+
+The backend is created on first use. Copying one backend into another gives a local SQLite file
+with production data for benchmarks and load tests:
+
+    python -m offsuit_analyzer.persistence.storage --from mongo --to sqlite --path prod_copy.sqlite3
+"""
+import argparse
+import itertools
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from offsuit_analyzer.datamodel import Round
+from offsuit_analyzer.datamodel import NameClash
+from offsuit_analyzer.datamodel import TrueSkillCheckpoint
+from offsuit_analyzer.datamodel import TrueSkillHistorySegment
+from offsuit_analyzer.datamodel import PlayerAlias
+from offsuit_analyzer.config import config
+from .storage_backend import StorageBackend, StoreRoundsResult
+from .player_aliases import AliasTable, AliasTableCache, check_new_alias
+
+STORAGE_BACKENDS = ("mongo", "sqlite")
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_storage_backend(backend: str = None, sqlite_path: str = None) -> StorageBackend:
+    backend = backend or config.STORAGE_BACKEND
+    if backend == "mongo":
+        from .cosmos_client import MongoStorageBackend
+        return MongoStorageBackend()
+    if backend == "sqlite":
+        from .sqlite_client import SQLiteStorageBackend
+        return SQLiteStorageBackend(sqlite_path)
+    raise ValueError(f"Unknown storage backend {backend!r}, expected one of {STORAGE_BACKENDS}")
+
+def get_storage_backend() -> StorageBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_storage_backend()
+        return _backend
+
+def set_storage_backend(backend: StorageBackend) -> None:
+    """Swap the backend for this process, benchmarks and load tests point it at a scratch database."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def store_rounds(rounds: List[Round]) -> StoreRoundsResult:
+    # names are kept as they arrived so content hashes don't depend on the aliases and removing one fully undoes it
+    return get_storage_backend().store_rounds(rounds)
+
+def bump_rounds_data_version() -> None:
+    get_storage_backend().bump_rounds_data_version()
+
+def get_rounds_data_version() -> Tuple[int, int]:
+    return get_storage_backend().get_rounds_data_version()
+
+def get_storage_target() -> str:
+    return get_storage_backend().storage_target
+
+def count_rounds_by_bar(bar_ids: Sequence[str]) -> Dict[str, int]:
+    return get_storage_backend().count_rounds_by_bar(bar_ids)
+
+def get_all_rounds() -> List[Round]:
+    return list(iter_rounds())
+
+def iter_rounds(batch_size: int = None) -> Iterator[Round]:
+    """Rounds straight from the database as they arrive, bypassing the snapshot cache, for one pass folds."""
+    alias_table = _get_alias_table(fresh=True)
+    return (alias_table.apply_to_round(r) for r in get_storage_backend().iter_rounds(batch_size))
+
+def iter_round_documents(batch_size: int = None, projection: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Raw round documents as they arrive, e.g. to feed RoundsFrame.from_documents without building Rounds."""
+    alias_table = _get_alias_table(fresh=True)
+    docs = get_storage_backend().iter_round_documents(batch_size or config.ROUNDS_CURSOR_BATCH_SIZE, projection)
+    return (alias_table.apply_to_document(doc) for doc in docs)
+
+def find_rounds(start_date: str = None, end_date: str = None,
+                bar_ids: Optional[Sequence[str]] = None, player_names: Optional[Sequence[str]] = None) -> List[Round]:
+    """
+    Only the stored rounds matching every given filter, read with an indexed database query instead of
+    filtering the full history: round_date within [start_date, end_date] (YYYY-MM-DD), bar_id in
+    bar_ids, any of player_names played.
+    """
+    docs = find_round_documents(start_date, end_date, bar_ids, player_names)
+    return [Round.from_dict(doc) for doc in docs]
+
+def find_round_documents(start_date: str = None, end_date: str = None,
+                         bar_ids: Optional[Sequence[str]] = None, player_names: Optional[Sequence[str]] = None,
+                         projection: Optional[Sequence[str]] = None, batch_size: int = None) -> Iterator[Dict[str, Any]]:
+    """find_rounds as raw documents, limited to the projection fields, streamed as they arrive."""
+    alias_table = _get_alias_table()
+    if player_names is not None:
+        player_names = alias_table.expand(player_names)  # rounds stored under any spelling of the player
+    docs = get_storage_backend().iter_round_documents(
+        batch_size or config.ROUNDS_CURSOR_BATCH_SIZE, projection,
+        start_date=start_date, end_date=end_date, bar_ids=bar_ids, player_names=player_names
+    )
+    return (alias_table.apply_to_document(doc) for doc in docs)
+
+def ensure_indexes() -> List[Dict[str, Any]]:
+    """Index bootstrap, run at app startup. One entry per index, error is None once it exists."""
+    return get_storage_backend().ensure_indexes()
+
+def get_index_stats() -> Dict[str, Any]:
+    return get_storage_backend().get_index_stats()
+
+def save_warnings(warning_strings: List[str]) -> None:
+    get_storage_backend().save_warnings(warning_strings)
+
+def get_all_warnings() -> List[str]:
+    return get_storage_backend().get_all_warnings()
+
+def delete_all_warnings() -> None:
+    get_storage_backend().delete_all_warnings()
+
+def save_these_name_clashes(name_infos: List[NameClash]) -> None:
+    get_storage_backend().save_these_name_clashes(name_infos)
+
+def get_all_name_clashes() -> List[NameClash]:
+    return get_storage_backend().get_all_name_clashes()
+
+def delete_these_name_clashes(name_infos: List[NameClash]) -> None:
+    get_storage_backend().delete_these_name_clashes(name_infos)
+
+def delete_all_name_clashes() -> None:
+    get_storage_backend().delete_all_name_clashes()
+
+def get_player_aliases() -> List[PlayerAlias]:
+    return get_storage_backend().get_player_aliases()
+
+def resolve_player_name(player_name: str) -> str:
+    """The canonical name for a (normalized) spelling, the name itself if it is no alias."""
+    return _get_alias_table().resolve(player_name)
+
+def save_player_alias(alias: str, canonical_name: str) -> None:
+    """Show every round of alias under canonical_name from now on, raises ValueError for self references and cycles."""
+    player_alias = PlayerAlias(alias, canonical_name)
+    check_new_alias(_get_alias_table(fresh=True), player_alias)
+    get_storage_backend().save_player_alias(player_alias)
+    _alias_cache.invalidate()
+
+def delete_player_alias(alias: str) -> None:
+    get_storage_backend().delete_player_alias(alias)
+    _alias_cache.invalidate()
+
+def save_trueskill_checkpoint(checkpoint: TrueSkillCheckpoint) -> None:
+    get_storage_backend().save_trueskill_checkpoint(checkpoint)
+
+def get_trueskill_checkpoint_summaries(settings_key: str) -> List[TrueSkillCheckpoint]:
+    return get_storage_backend().get_trueskill_checkpoint_summaries(settings_key)
+
+def get_trueskill_checkpoint(settings_key: str, rounds_processed: int) -> Optional[TrueSkillCheckpoint]:
+    return get_storage_backend().get_trueskill_checkpoint(settings_key, rounds_processed)
+
+def delete_trueskill_checkpoints(settings_key: str, rounds_processed_list: List[int]) -> None:
+    get_storage_backend().delete_trueskill_checkpoints(settings_key, rounds_processed_list)
+
+def save_trueskill_history_segment(segment: TrueSkillHistorySegment) -> None:
+    get_storage_backend().save_trueskill_history_segment(segment)
+
+def get_trueskill_history_segments(settings_key: str, include_arrays: bool = True) -> List[TrueSkillHistorySegment]:
+    return get_storage_backend().get_trueskill_history_segments(settings_key, include_arrays)
+
+def delete_trueskill_history_after(settings_key: str, rounds_processed: int) -> None:
+    get_storage_backend().delete_trueskill_history_after(settings_key, rounds_processed)
+
+
+_alias_cache = AliasTableCache(
+    loader=get_player_aliases,
+    version_checker=get_rounds_data_version,
+    version_check_interval_seconds=config.ROUNDS_CACHE_VERSION_CHECK_INTERVAL_SECONDS,
+)
+
+def _get_alias_table(fresh: bool = False) -> AliasTable:
+    return _alias_cache.get_table(fresh)
+
+
+def copy_storage(source: StorageBackend, target: StorageBackend, settings_keys: List[str] = ()) -> None:
+    """
+    Copy rounds, warnings, name clashes and player aliases, plus the rating checkpoints and history of
+    the given engine settings keys, from source into target. Rounds are copied as stored, aliases unapplied.
+    """
+    rounds = source.iter_rounds()
+    while batch := list(itertools.islice(rounds, config.ROUNDS_CURSOR_BATCH_SIZE)):
+        target.store_rounds(batch)
+    target.save_warnings(source.get_all_warnings())
+    target.save_these_name_clashes(source.get_all_name_clashes())
+    for player_alias in source.get_player_aliases():
+        target.save_player_alias(player_alias)
+    for settings_key in settings_keys:
+        for summary in source.get_trueskill_checkpoint_summaries(settings_key):
+            target.save_trueskill_checkpoint(source.get_trueskill_checkpoint(settings_key, summary.rounds_processed))
+        for segment in source.get_trueskill_history_segments(settings_key):
+            target.save_trueskill_history_segment(segment)
+
+
+# ===============================
+# DRIVER
+# ===============================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy stored data from one storage backend into another")
+    parser.add_argument("--from", dest="source", choices=STORAGE_BACKENDS, default="mongo")
+    parser.add_argument("--to", dest="target", choices=STORAGE_BACKENDS, default="sqlite")
+    parser.add_argument("--path", default=None, help="sqlite database file, defaults to config.SQLITE_DATABASE_PATH")
+    parser.add_argument("--settings-keys", nargs="*", default=(), help="rating engine settings keys whose checkpoints and history are copied too")
+    args = parser.parse_args()
+
+    copy_storage(create_storage_backend(args.source, args.path), create_storage_backend(args.target, args.path), args.settings_keys)
@@ -0,0 +1,164 @@
+"""
+Interface every storage backend implements.
+
+The persistence functions in persistence.storage forward to whichever backend config.STORAGE_BACKEND
+selects: "mongo" for Cosmos DB, "sqlite" for a local database file that needs no outside service.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from offsuit_analyzer.datamodel import Round
+from offsuit_analyzer.datamodel import NameClash
+from offsuit_analyzer.datamodel import TrueSkillCheckpoint
+from offsuit_analyzer.datamodel import TrueSkillHistorySegment
+from offsuit_analyzer.datamodel import PlayerAlias
+from offsuit_analyzer.config import config
+
+ROUNDS_DATA_VERSION_ID = "rounds"
+
+
+@dataclass(frozen=True)
+class StoreRoundsResult:
+    inserted: int = 0
+    changed: int = 0  # stored before with different content, or stored before hashes were kept
+    skipped: int = 0  # identical to the stored round, nothing was sent
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.changed
+
+    def __str__(self) -> str:
+        return f"{self.inserted} inserted, {self.changed} changed, {self.skipped} unchanged"
+
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def store_rounds(self, rounds: List[Round]) -> StoreRoundsResult:
+        """
+        Insert or replace rounds by (round_id, bar_id). Rounds whose content hash matches the stored one
+        are skipped, and the rounds data version is only bumped when something was written.
+        """
+
+    @abstractmethod
+    def bump_rounds_data_version(self) -> None:
+        pass
+
+    @abstractmethod
+    def get_rounds_data_version(self) -> Tuple[int, int]:
+        """(version, round count), cheap enough to call on every cache freshness check."""
+
+    @property
+    @abstractmethod
+    def storage_target(self) -> str:
+        """
+        Identifies the database and rounds collection written to, for caches of what was already stored.
+        Can contain credentials, hash it before writing it anywhere.
+        """
+
+    @abstractmethod
+    def count_rounds_by_bar(self, bar_ids: Sequence[str]) -> Dict[str, int]:
+        """Stored rounds of each of bar_ids, bars without any are left out."""
+
+    @abstractmethod
+    def ensure_indexes(self) -> List[Dict[str, Any]]:
+        """
+        Create every index the queries and upserts rely on, safe to call on every startup.
+        Returns one entry per index with the error that kept it from being built, None if it exists.
+        """
+
+    @abstractmethod
+    def get_index_stats(self) -> Dict[str, Any]:
+        """Per collection document count and indexes, with usage counters where the database keeps them."""
+
+    @abstractmethod
+    def iter_round_documents(self, batch_size: int, projection: Optional[Sequence[str]] = None,
+                             start_date: str = None, end_date: str = None,
+                             bar_ids: Optional[Sequence[str]] = None,
+                             player_names: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stored round documents in storage order, fetched batch_size at a time as the caller iterates.
+        projection limits each document to those top level fields. The filters are applied by the
+        database: round_date between start_date and end_date (inclusive, YYYY-MM-DD), bar_id in
+        bar_ids, and at least one of player_names among the round's players.
+        """
+
+    def iter_rounds(self, batch_size: int = None) -> Iterator[Round]:
+        for doc in self.iter_round_documents(batch_size or config.ROUNDS_CURSOR_BATCH_SIZE):
+            yield Round.from_dict(doc)
+
+    def get_all_rounds(self) -> List[Round]:
+        return list(self.iter_rounds())
+
+    @abstractmethod
+    def save_warnings(self, warning_strings: List[str]) -> None:
+        pass
+
+    @abstractmethod
+    def get_all_warnings(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    def delete_all_warnings(self) -> None:
+        pass
+
+    @abstractmethod
+    def save_these_name_clashes(self, name_infos: List[NameClash]) -> None:
+        pass
+
+    @abstractmethod
+    def get_all_name_clashes(self) -> List[NameClash]:
+        pass
+
+    @abstractmethod
+    def delete_these_name_clashes(self, name_infos: List[NameClash]) -> None:
+        pass
+
+    @abstractmethod
+    def delete_all_name_clashes(self) -> None:
+        pass
+
+    @abstractmethod
+    def get_player_aliases(self) -> List[PlayerAlias]:
+        pass
+
+    @abstractmethod
+    def save_player_alias(self, player_alias: PlayerAlias) -> None:
+        """Insert or replace the alias and bump the rounds data version, rounds read after it show the canonical name."""
+
+    @abstractmethod
+    def delete_player_alias(self, alias: str) -> None:
+        """Drop the alias and bump the rounds data version."""
+
+    @abstractmethod
+    def save_trueskill_checkpoint(self, checkpoint: TrueSkillCheckpoint) -> None:
+        pass
+
+    @abstractmethod
+    def get_trueskill_checkpoint_summaries(self, settings_key: str) -> List[TrueSkillCheckpoint]:
+        """All checkpoints for these engine settings without their ratings, oldest first."""
+
+    @abstractmethod
+    def get_trueskill_checkpoint(self, settings_key: str, rounds_processed: int) -> Optional[TrueSkillCheckpoint]:
+        pass
+
+    @abstractmethod
+    def delete_trueskill_checkpoints(self, settings_key: str, rounds_processed_list: List[int]) -> None:
+        pass
+
+    @abstractmethod
+    def save_trueskill_history_segment(self, segment: TrueSkillHistorySegment) -> None:
+        pass
+
+    @abstractmethod
+    def get_trueskill_history_segments(self, settings_key: str, include_arrays: bool = True) -> List[TrueSkillHistorySegment]:
+        """Rating history segments for these engine settings in replay order."""
+
+    @abstractmethod
+    def delete_trueskill_history_after(self, settings_key: str, rounds_processed: int) -> None:
+        """Drop every segment that reaches past rounds_processed, used when the ratings rewind."""
+
+
+def dedupe_rounds(rounds: List[Round]) -> Dict[Tuple[str, str], Round]:
+    """Rounds by (round_id, bar_id), a later duplicate replaces an earlier one the same way a second upsert would."""
+    return {(r.round_id, r.bar_id): r for r in rounds}
@@ -4,10 +4,10 @@ import json
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 
-from pymongo import MongoClient
 from offsuit_analyzer.config import config  # absolute import
 
 def find_rounds_by_player(player_name: str, env_suffix: str):
+    from pymongo import MongoClient
     client = MongoClient(config.DATABASE_CONNECTION_STRING)
     db = client[config.MONGO_DB_NAME]
     collection = db[f"pokerRoundsCollection{env_suffix}"]
@@ -23,15 +23,20 @@ def find_rounds_by_player(player_name: str, env_suffix: str):
         print("-" * 50)
 
 def update_player_name(old_name: str, new_name: str, env_suffix: str):
+    from pymongo import MongoClient
     client = MongoClient(config.DATABASE_CONNECTION_STRING)
     db = client[config.MONGO_DB_NAME]
     collection = db[f"pokerRoundsCollection{env_suffix}"]
 
     # Update only the first matching player element in each document
     filter_query = { "players.player_name": old_name }
-    update_query = { "$set": { "players.$.player_name": new_name } }
+    # the stored content hash no longer describes the document, drop it so the next refresh compares as changed
+    update_query = { "$set": { "players.$.player_name": new_name }, "$unset": { "content_hash": "" } }
 
     result = collection.update_many(filter_query, update_query)
+    if result.modified_count > 0:
+        # let running api instances know their cached rounds are stale
+        db[f"dataVersionsCollection{env_suffix}"].update_one({"_id": "rounds"}, {"$inc": {"version": 1}}, upsert=True)
     print(f"Modified {result.modified_count} documents updating '{old_name}' to '{new_name}'.")
 
 def main():
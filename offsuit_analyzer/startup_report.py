@@ -0,0 +1,84 @@
+"""
+Import time report for the web app, the analytics package and the persistence scripts.
+
+Every target is imported in a fresh interpreter with -X importtime, a few times over, and the
+median is reported next to the wall clock time of the whole process (interpreter start included).
+The heaviest imports of each target are listed so anything that becomes eager again shows up.
+
+    python -m offsuit_analyzer.startup_report
+    python -m offsuit_analyzer.startup_report --repeat 7 --top 15 offsuit_analyzer.web.app
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+DEFAULT_TARGETS = (
+    "offsuit_analyzer.web.app",
+    "offsuit_analyzer.analytics",
+    "offsuit_analyzer.persistence",
+    "offsuit_analyzer.persistence.update_names_script",
+)
+
+
+def _import_once(module: str) -> Tuple[float, Dict[str, float]]:
+    """Wall clock seconds for a fresh interpreter importing module, and cumulative ms per imported module."""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    wall_seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{completed.stderr}")
+
+    cumulative_ms = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        cumulative_ms[name.strip()] = int(cumulative) / 1000
+    return wall_seconds, cumulative_ms
+
+
+def measure_import(module: str, repeat: int = 5) -> Dict[str, object]:
+    runs = [_import_once(module) for _ in range(repeat)]
+    heaviest: Dict[str, List[float]] = {}
+    for _, cumulative_ms in runs:
+        for name, ms in cumulative_ms.items():
+            heaviest.setdefault(name, []).append(ms)
+    return {
+        "module": module,
+        "import_ms": statistics.median(cumulative_ms.get(module, 0.0) for _, cumulative_ms in runs),
+        "process_ms": statistics.median(wall_seconds for wall_seconds, _ in runs) * 1000,
+        "imports": {name: statistics.median(values) for name, values in heaviest.items()},
+    }
+
+
+def print_report(results: List[Dict[str, object]], top: int) -> None:
+    print(f"{'Module':<52}{'Import ms':>12}{'Process ms':>12}")
+    for result in results:
+        print(f"{result['module']:<52}{result['import_ms']:>12.1f}{result['process_ms']:>12.1f}")
+
+    for result in results:
+        # top level packages only, their submodules are already inside the cumulative time
+        packages = {name: ms for name, ms in result["imports"].items() if "." not in name and name != result["module"]}
+        print(f"\nHeaviest imports under {result['module']}:")
+        for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+            print(f"  {name:<40}{ms:>10.1f} ms")
+
+
+# ===============================
+# DRIVER
+# ===============================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how long the app and scripts take to import")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module, the median is reported")
+    parser.add_argument("--top", type=int, default=10, help="heaviest top level imports to list per module")
+    args = parser.parse_args()
+
+    print_report([measure_import(module, args.repeat) for module in args.modules], args.top)
@@ -1,6 +1,8 @@
 from flask import Flask, Response, g
 from flask_cors import CORS
+import threading
 import time
+from offsuit_analyzer import persistence
 from .controllers.leaderboard_controller import leaderboard_bp
 from .controllers.name_tools_controller import name_tools_bp
 from .controllers.admin_controller import admin_bp
@@ -12,8 +14,32 @@ app.register_blueprint(leaderboard_bp)
 app.register_blueprint(name_tools_bp)
 app.register_blueprint(admin_bp)
 
+def _ensure_database_indexes():
+    # in the background so a slow or unreachable database doesn't hold up startup
+    try:
+        for result in persistence.ensure_indexes():
+            if result["error"]:
+                app.logger.warning("Index %s on %s was not created: %s", result["index"], result["collection"], result["error"])
+    except Exception:
+        app.logger.exception("Creating database indexes failed")
+
+_index_bootstrap_started = False
+_index_bootstrap_lock = threading.Lock()
+
+def _start_index_bootstrap_once():
+    # on the first request instead of at import, so render workers and scripts importing the app don't touch the database
+    global _index_bootstrap_started
+    if _index_bootstrap_started:
+        return
+    with _index_bootstrap_lock:
+        if _index_bootstrap_started:
+            return
+        _index_bootstrap_started = True
+    threading.Thread(target=_ensure_database_indexes, name="ensure-indexes", daemon=True).start()
+
 @app.before_request
 def before_api_request():
+    _start_index_bootstrap_once()
     g.start_time = time.perf_counter()
 
 @app.after_request
@@ -1,4 +1,4 @@
-from flask import Blueprint, Response
+from flask import Blueprint, Response, jsonify, request, abort
 from flask_httpauth import HTTPTokenAuth
 from ..services import admin_service 
 from offsuit_analyzer.config import config
@@ -15,8 +15,42 @@ def verify_token(token):
 @admin_bp.route('/refreshrounds', methods=['POST'])
 @auth.login_required
 def refresh_rounds():
-    admin_service.refresh_rounds_database()
-    return Response("<h1>Rounds Database Was refreshed for current month</h1>", mimetype='text/html')
+    force = request.args.get('force') == 'true'  # ?force=true refetches boards the response cache says are unchanged
+    summary = admin_service.refresh_rounds_database(force)
+    return Response(f"<h1>Rounds Database Was refreshed for current month</h1><p>{summary}</p>", mimetype='text/html')
+
+@admin_bp.route('/refreshtrueskill', methods=['POST'])
+@auth.login_required
+def refresh_trueskill():
+    summary = admin_service.refresh_trueskill_checkpoints()
+    return Response(f"<h1>TrueSkill checkpoints were refreshed</h1><p>{summary}</p>", mimetype='text/html')
+
+@admin_bp.route('/playeraliases')
+@auth.login_required
+def player_aliases():
+    return jsonify(admin_service.get_player_aliases())
+
+@admin_bp.route('/addplayeralias', methods=['POST'])
+@auth.login_required
+def add_player_alias():
+    alias = request.args.get('alias')
+    canonical_name = request.args.get('canonical')
+    if not alias or not canonical_name:
+        abort(400, description="alias and canonical are required")
+    try:
+        summary = admin_service.add_player_alias(alias, canonical_name)
+    except ValueError as e:
+        abort(400, description=str(e))
+    return Response(f"<h1>Player alias was added</h1><p>{summary}</p>", mimetype='text/html')
+
+@admin_bp.route('/removeplayeralias', methods=['POST'])
+@auth.login_required
+def remove_player_alias():
+    alias = request.args.get('alias')
+    if not alias:
+        abort(400, description="alias is required")
+    summary = admin_service.remove_player_alias(alias)
+    return Response(f"<h1>Player alias was removed</h1><p>{summary}</p>", mimetype='text/html')
 
 @admin_bp.route('/emailroundbackup', methods=['POST'])
 @auth.login_required
@@ -27,8 +61,8 @@ def email_round_backup():
 @admin_bp.route('/refreshlegacyrounds', methods=['POST'])
 @auth.login_required
 def refresh_legacy_rounds_endpoint():
-    admin_service.refresh_legacy_rounds()
-    return Response("<h1>Rounds Database Was refreshed for current legacy june months</h1>", mimetype='text/html')
+    summary = admin_service.refresh_legacy_rounds()
+    return Response(f"<h1>Rounds Database Was refreshed for current legacy june months</h1><p>{summary}</p>", mimetype='text/html')
 
 
 @admin_bp.route('/checknameclashes', methods=['POST'])
@@ -37,3 +71,34 @@ def check_name_clashes():
     """Endpoint to run name clash detection."""
     admin_service.run_name_clash_detection()
     return Response("<h1>Name clash detection has been run</h1>", mimetype='text/html')
+
+@admin_bp.route('/roundscachestats')
+@auth.login_required
+def rounds_cache_stats():
+    return jsonify(admin_service.get_rounds_cache_stats())
+
+@admin_bp.route('/graphcachestats')
+@auth.login_required
+def graph_cache_stats():
+    return jsonify(admin_service.get_graph_image_cache_stats())
+
+@admin_bp.route('/fetchtimings')
+@auth.login_required
+def fetch_timings():
+    return jsonify(admin_service.get_keep_the_score_fetch_timings())
+
+@admin_bp.route('/indexstats')
+@auth.login_required
+def index_stats():
+    return jsonify(admin_service.get_index_stats())
+
+@admin_bp.route('/ensureindexes', methods=['POST'])
+@auth.login_required
+def ensure_indexes():
+    return jsonify(admin_service.ensure_indexes())
+
+@admin_bp.route('/invalidateroundscache', methods=['POST'])
+@auth.login_required
+def invalidate_rounds_cache():
+    admin_service.invalidate_rounds_cache()
+    return Response("<h1>Rounds cache was invalidated</h1>", mimetype='text/html')
@@ -1,5 +1,10 @@
-from flask import Blueprint, Response, request
+import calendar
+import json
+from datetime import date
+from flask import Blueprint, Response, request, abort
 from ..services import leaderboard_service 
+from ..services.graph_render_pool import GraphRenderBusyError, GraphRenderTimeoutError
+from offsuit_analyzer.config import config
 
 leaderboard_bp = Blueprint('leaderboard', __name__, url_prefix='/api/leaderboard')
 
@@ -16,11 +21,52 @@ def roi():
     roi_leaderboard_dataframe = leaderboard_service.get_roi_leaderboard(min_rounds_required)
     return roi_leaderboard_dataframe.to_json(orient="records")
 
+@leaderboard_bp.route('/roi-whatif')
+def roi_what_if():
+    """
+    ROI leaderboard for a hypothetical payout structure.
+    Query parameters: payoutpercent (fraction of the field paid, 0-1), steepness (payout curve exponent), minrounds
+    """
+    min_rounds_required = int(request.args.get('minrounds') or 0)
+    payout_percent = float(request.args.get('payoutpercent') or config.PERCENT_FOR_ROI)
+    steepness = float(request.args.get('steepness') or config.STEEPNESS_FOR_ROI)
+    if not 0 < payout_percent <= 1 or steepness < 0:
+        abort(400, description="payoutpercent must be in (0, 1] and steepness must not be negative")
+
+    roi_leaderboard_dataframe = leaderboard_service.get_roi_what_if_leaderboard(payout_percent, steepness, min_rounds_required)
+    return roi_leaderboard_dataframe.to_json(orient="records")
+
 @leaderboard_bp.route('/trueskill')
 def trueskill():
     trueskill_leaderboard_dataframe = leaderboard_service.get_trueskill_leaderboard()
     return trueskill_leaderboard_dataframe.to_json(orient="records")
 
+@leaderboard_bp.route('/trueskill/history')
+def trueskill_history():
+    """
+    TrueSkill rating curve of one player.
+    Query parameter: player_name
+    """
+    player_name = request.args.get('player_name')
+    if not player_name:
+        abort(400, description="player_name is required")
+    rating_history_dataframe = leaderboard_service.get_player_rating_history(player_name)
+    return rating_history_dataframe.to_json(orient="records")
+
+@leaderboard_bp.route('/trueskill/asof')
+def trueskill_as_of():
+    """
+    TrueSkill leaderboard as of a date.
+    Query parameter: date - YYYY-MM-DD, includes rounds played on that date
+    """
+    as_of_date = request.args.get('date') or ""
+    try:
+        date.fromisoformat(as_of_date)
+    except ValueError:
+        abort(400, description="date must be in YYYY-MM-DD format")
+    trueskill_leaderboard_dataframe = leaderboard_service.get_trueskill_leaderboard_as_of(as_of_date)
+    return trueskill_leaderboard_dataframe.to_json(orient="records")
+
 @leaderboard_bp.route('/firstplace')
 def firstplace():
     first_place_leaderboard_dataframe = leaderboard_service.get_first_place_leaderboard()
@@ -31,6 +77,57 @@ def itmpercent():
     top_percentile_leaderboard_dataframe = leaderboard_service.get_itm_percentage_leaderboard()
     return top_percentile_leaderboard_dataframe.to_json(orient="records")
 
+def _parse_round_filters():
+    """
+    month (YYYY-MM) or from / to (YYYY-MM-DD, inclusive) and bar (comma separated bar ids) query parameters.
+    Returns (start_date, end_date, bar_ids), all None when not given.
+    """
+    month = request.args.get('month')
+    start_date = request.args.get('from') or None
+    end_date = request.args.get('to') or None
+    bar = request.args.get('bar')
+    try:
+        if month:
+            if start_date or end_date:
+                abort(400, description="month can not be combined with from or to")
+            first_day = date.fromisoformat(month + "-01")
+            start_date = first_day.isoformat()
+            end_date = first_day.replace(day=calendar.monthrange(first_day.year, first_day.month)[1]).isoformat()
+        for filter_date in (start_date, end_date):
+            if filter_date:
+                date.fromisoformat(filter_date)
+    except ValueError:
+        abort(400, description="month must be in YYYY-MM format and from and to in YYYY-MM-DD format")
+    bar_ids = [bar_id.strip() for bar_id in bar.split(',') if bar_id.strip()] if bar else None
+    return start_date, end_date, bar_ids
+
+@leaderboard_bp.route('/overview')
+def overview():
+    """
+    Outlasted, ITM, ROI and first place stats for every player from a single pass over the rounds.
+    Optional query parameters month, from, to and bar limit it to those rounds, minrounds then defaults to 1.
+    """
+    min_rounds_required = int(request.args.get('minrounds') or 0)
+    start_date, end_date, bar_ids = _parse_round_filters()
+    if start_date or end_date or bar_ids:
+        overview_dataframe = leaderboard_service.get_filtered_placement_leaderboard(start_date, end_date, bar_ids, min_rounds_required or 1)
+    else:
+        overview_dataframe = leaderboard_service.get_combined_placement_leaderboard(min_rounds_required)
+    return overview_dataframe.to_json(orient="records")
+
+@leaderboard_bp.route('/player-rounds')
+def player_rounds():
+    """
+    Every round one player played with points, place and field size, newest first.
+    Query parameters: player_name (required), optional month or from / to
+    """
+    player_name = request.args.get('player_name')
+    if not player_name:
+        abort(400, description="player_name is required")
+    start_date, end_date, _ = _parse_round_filters()
+    player_rounds_dataframe = leaderboard_service.get_player_round_results(player_name, start_date, end_date)
+    return player_rounds_dataframe.to_json(orient="records")
+
 @leaderboard_bp.route('/network-graph')
 def network_graph():
     """
@@ -39,7 +136,12 @@ def network_graph():
     Query parameter: player_name - highlights the specified player in blue
     """
     searched_player_name = request.args.get('player_name')
-    img_buffer = leaderboard_service.get_network_graph_image(searched_player_name)
+    try:
+        img_buffer = leaderboard_service.get_network_graph_image(searched_player_name)
+    except GraphRenderBusyError:
+        abort(503, description="Too many graph renders in progress, try again shortly")
+    except GraphRenderTimeoutError:
+        abort(504, description="Graph render timed out")
     
     return Response(
         img_buffer.getvalue(),
@@ -50,7 +152,85 @@ def network_graph():
         }
     )
 
+@leaderboard_bp.route('/network-graph/ego')
+def ego_network_graph():
+    """
+    Network graph of only the players within a few shared rounds of one player.
+    Query parameters: player_name (required), hops (default 1), topedges - keep only the strongest edges
+    """
+    player_name = request.args.get('player_name')
+    if not player_name:
+        abort(400, description="player_name is required")
+    try:
+        hops = int(request.args.get('hops') or 1)
+        top_n_edges = int(request.args['topedges']) if request.args.get('topedges') else None
+    except ValueError:
+        abort(400, description="hops and topedges must be integers")
+    if not 1 <= hops <= config.GRAPH_EGO_MAX_HOPS or (top_n_edges is not None and top_n_edges < 1):
+        abort(400, description=f"hops must be between 1 and {config.GRAPH_EGO_MAX_HOPS} and topedges must be positive")
+
+    try:
+        img_buffer = leaderboard_service.get_player_ego_graph_image(player_name, hops, top_n_edges)
+    except GraphRenderBusyError:
+        abort(503, description="Too many graph renders in progress, try again shortly")
+    except GraphRenderTimeoutError:
+        abort(504, description="Graph render timed out")
+    if img_buffer is None:
+        abort(404, description="player not found in the network graph")
+
+    return Response(
+        img_buffer.getvalue(),
+        mimetype='image/png',
+        headers={
+            'Content-Disposition': 'inline; filename="player_ego_network.png"',
+            'Cache-Control': 'public, max-age=3600'
+        }
+    )
+
+@leaderboard_bp.route('/network-graph/data')
+def network_graph_data():
+    """
+    Player network as json for client side rendering, layout and colors are precomputed.
+    Query parameters: minweight - drop edges with fewer shared rounds, maxnodes - keep the most connected players,
+    maxedges - keep the heaviest edges, precision - decimals of the layout coordinates (default 3)
+    """
+    try:
+        min_edge_weight = int(request.args.get('minweight') or 1)
+        max_nodes = int(request.args['maxnodes']) if request.args.get('maxnodes') else None
+        max_edges = int(request.args['maxedges']) if request.args.get('maxedges') else None
+        precision = int(request.args.get('precision') or 3)
+    except ValueError:
+        abort(400, description="minweight, maxnodes, maxedges and precision must be integers")
+    if any(v is not None and v < 0 for v in (max_nodes, max_edges)) or not 0 <= precision <= 6:
+        abort(400, description="maxnodes and maxedges must not be negative and precision must be between 0 and 6")
+
+    try:
+        graph_data = leaderboard_service.get_network_graph_data(min_edge_weight, max_nodes, max_edges, precision)
+    except GraphRenderBusyError:
+        abort(503, description="Too many graph layouts in progress, try again shortly")
+    except GraphRenderTimeoutError:
+        abort(504, description="Graph layout timed out")
+
+    return Response(
+        json.dumps(graph_data, separators=(',', ':')),
+        mimetype='application/json',
+        headers={'Cache-Control': 'public, max-age=3600'}
+    )
+
 @leaderboard_bp.route('/community-disconnectedness')
 def community_disconnectedness():
     disconnectedness_df = leaderboard_service.get_community_disconnectedness_analysis()
-    return disconnectedness_df.to_json(orient="records")
\ No newline at end of file
+    return disconnectedness_df.to_json(orient="records")
+
+@leaderboard_bp.route('/community-disconnectedness/over-time')
+def community_disconnectedness_over_time():
+    """Query parameter: slices - number of cumulative time slices (default 5)"""
+    try:
+        num_slices = int(request.args.get('slices') or 5)
+    except ValueError:
+        abort(400, description="slices must be an integer")
+    if not 1 <= num_slices <= config.COMMUNITY_OVER_TIME_MAX_SLICES:
+        abort(400, description=f"slices must be between 1 and {config.COMMUNITY_OVER_TIME_MAX_SLICES}")
+
+    over_time_df = leaderboard_service.get_community_disconnectedness_over_time(num_slices)
+    return over_time_df.to_json(orient="records")
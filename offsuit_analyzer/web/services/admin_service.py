@@ -1,20 +1,89 @@
 from offsuit_analyzer import data_service
 from offsuit_analyzer import persistence
+from offsuit_analyzer import analytics
 from .name_tools_service import check_and_log_clashing_player_names
+from . import leaderboard_service
 
-def refresh_rounds_database():
-    """Refresh the rounds database with latest data from this months Keep the score API"""
-    all_rounds = data_service.get_this_months_rounds_for_bars()  
-    persistence.store_rounds(all_rounds)
+def refresh_rounds_database(force: bool = False) -> str:
+    """
+    Refresh the rounds database with latest data from this months Keep the score API.
+    Boards unchanged since the last refresh are skipped, force refetches and restores all of them.
+    """
+    staged_entries = data_service.StagedEntries(persistence.get_storage_target())
+    all_rounds = data_service.get_this_months_rounds_for_bars(force, staged_entries)
+    result = persistence.store_rounds(all_rounds)
+    data_service.commit_fetched_boards(staged_entries)
+    if result.written:
+        refresh_trueskill_checkpoints()
+    timings = data_service.get_last_fetch_timings()
+    if not timings:
+        return str(result)
+    slowest = timings[0]
+    unchanged_boards = sum(timing["unchanged"] for timing in timings)
+    return (f"{result}, {len(timings)} bars fetched ({unchanged_boards} unchanged since the last refresh), "
+            f"slowest was {slowest['bar']} at {slowest['seconds']:.2f}s")
 
-def refresh_legacy_rounds():
+def refresh_legacy_rounds() -> str:
     """Refresh with legacy June data."""
     all_rounds = data_service.get_june_data_as_rounds()
-    persistence.store_rounds(all_rounds)
+    result = persistence.store_rounds(all_rounds)
+    if result.written:
+        refresh_trueskill_checkpoints()
+    return str(result)
+
+def refresh_trueskill_checkpoints() -> str:
+    """Advance the persisted TrueSkill ratings so leaderboard requests only have new rounds left to replay."""
+    result = analytics.refresh_trueskill_ratings(persistence.get_all_rounds())
+    return (f"Resumed from round {result.resumed_from_round}, replayed {result.rounds_replayed} rounds, "
+            f"wrote {result.checkpoints_written} checkpoints")
+
+def get_player_aliases():
+    """Every alias with the canonical name it resolves to."""
+    return [player_alias.to_dict() for player_alias in persistence.get_player_aliases()]
+
+def add_player_alias(alias: str, canonical_name: str) -> str:
+    """
+    Merge a spelling into a player with one alias entry instead of rewriting stored rounds, raises
+    ValueError if the alias points at itself or would form a cycle.
+    """
+    alias = data_service.normalize_player_name(alias)
+    canonical_name = data_service.normalize_player_name(canonical_name)
+    persistence.save_player_alias(alias, canonical_name)
+    refresh_trueskill_checkpoints()
+    return f"Rounds of '{alias}' are now shown as '{canonical_name}'"
+
+def remove_player_alias(alias: str) -> str:
+    alias = data_service.normalize_player_name(alias)
+    persistence.delete_player_alias(alias)
+    refresh_trueskill_checkpoints()
+    return f"Rounds of '{alias}' are shown under their own name again"
 
 def email_json_rounds_to_admin():
     persistence.email_json_rounds_backup()
 
+def get_rounds_cache_stats():
+    """Hit/miss counters and age of the in-process rounds snapshot."""
+    return persistence.get_rounds_cache_stats()
+
+def get_graph_image_cache_stats():
+    """Size and hit/miss counters of the highlighted network graph image cache."""
+    return leaderboard_service.get_graph_image_cache_stats()
+
+def get_keep_the_score_fetch_timings():
+    """How long each bar took in the last Keep The Score refresh, slowest first."""
+    return data_service.get_last_fetch_timings()
+
+def get_index_stats():
+    """Indexes of every collection with their usage counters."""
+    return persistence.get_index_stats()
+
+def ensure_indexes():
+    """Rerun the startup index bootstrap, e.g. after duplicate rounds kept a unique index from being built."""
+    return persistence.ensure_indexes()
+
+def invalidate_rounds_cache():
+    persistence.invalidate_rounds_cache()
+
 def run_name_clash_detection():
     """Manually run name clash detection."""
     check_and_log_clashing_player_names()
@@ -0,0 +1,67 @@
+"""
+Byte bounded LRU cache for rendered graph images.
+
+Entries belong to one rounds snapshot generation. The first put for a newer generation drops
+everything rendered from older rounds, and the least recently used images are evicted once the
+total size goes over max_bytes.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class GraphImageCache:
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._generation = None
+        self._total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, generation: int, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            image = self._entries.get(key) if generation == self._generation else None
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, generation: int, key: Hashable, image: bytes) -> None:
+        with self._lock:
+            if self._generation is not None and generation < self._generation:
+                return  # rendered from rounds that have already been replaced
+            if generation != self._generation:
+                self.evictions += len(self._entries)
+                self._entries.clear()
+                self._total_bytes = 0
+                self._generation = generation
+            if len(image) > self._max_bytes:
+                return
+
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= len(previous)
+            self._entries[key] = image
+            self._total_bytes += len(image)
+            while self._total_bytes > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "generation": self._generation,
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,83 @@
+"""
+Bounded process pool for graph layout and rendering.
+
+Spring layouts and 48 inch matplotlib renders hold the GIL for seconds, so they run in worker
+processes instead of the Flask request threads. At most max_pending tasks may be queued or running
+at once, further submissions fail fast with GraphRenderBusyError, and callers stop waiting on a
+task after timeout_seconds with GraphRenderTimeoutError (the task keeps its slot until it finishes).
+"""
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict
+
+
+class GraphRenderBusyError(Exception):
+    pass
+
+
+class GraphRenderTimeoutError(Exception):
+    pass
+
+
+class GraphRenderPool:
+    def __init__(self, max_workers: int, max_pending: int, timeout_seconds: float):
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._timeout_seconds = timeout_seconds
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+
+        self.submitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _get_executor(self, replace_broken: ProcessPoolExecutor = None) -> ProcessPoolExecutor:
+        # created on first use, spawn so workers never inherit the web server's threads and locks
+        with self._lock:
+            if self._executor is not None and self._executor is replace_broken:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self._max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise GraphRenderBusyError(f"{self._max_pending} graph renders already queued")
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # a worker died (out of memory during a render), start a fresh pool once
+                future = self._get_executor(replace_broken=executor).submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        self.submitted += 1
+        return future
+
+    def wait(self, future: Future) -> Any:
+        try:
+            return future.result(timeout=self._timeout_seconds)
+        except FutureTimeoutError:
+            self.timed_out += 1
+            raise GraphRenderTimeoutError(f"graph render did not finish within {self._timeout_seconds}s") from None
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return self.wait(self.submit(fn, *args))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self._max_workers,
+            "max_pending": self._max_pending,
+            "timeout_seconds": self._timeout_seconds,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
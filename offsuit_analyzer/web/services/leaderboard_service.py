@@ -1,52 +1,244 @@
+import io
+import threading
+from typing import Any, Callable, Dict, List
 
-from offsuit_analyzer import persistence, analytics
+from offsuit_analyzer import persistence, analytics, data_service
 from offsuit_analyzer.config import config
+from offsuit_analyzer.web.services.graph_image_cache import GraphImageCache
+from offsuit_analyzer.web.services.graph_render_pool import GraphRenderPool
+
+_snapshot_memo_lock = threading.Lock()
+_snapshot_memo: Dict[str, Any] = {"generation": None, "entries": {}}
+_NOT_BUILT = object()
+_graph_image_cache = GraphImageCache(config.GRAPH_IMAGE_CACHE_MAX_BYTES)
+_graph_render_pool = GraphRenderPool(config.GRAPH_RENDER_MAX_WORKERS, config.GRAPH_RENDER_MAX_PENDING, config.GRAPH_RENDER_TIMEOUT_SECONDS)
+NETWORK_GRAPH_TITLE = "Player Network - TrueSkill Colored"
+
+def _memoize_for_rounds_snapshot(key: str, builder: Callable[[list], Any]) -> Any:
+    """Build something from the stored rounds once per rounds snapshot and share it between requests."""
+    snapshot = persistence.get_rounds_snapshot()
+    with _snapshot_memo_lock:
+        if _snapshot_memo["generation"] != snapshot.generation:
+            _snapshot_memo["generation"] = snapshot.generation
+            _snapshot_memo["entries"] = {}
+        entry = _snapshot_memo["entries"].setdefault(key, {"lock": threading.Lock(), "value": _NOT_BUILT})
+
+    # per key lock so a slow build only blocks requests waiting on that same value
+    with entry["lock"]:
+        if entry["value"] is _NOT_BUILT:
+            entry["value"] = builder(list(snapshot.rounds))
+        return entry["value"]
+
+def _forget_rounds_snapshot_entry(key: str, value: Any) -> None:
+    """Drop a memoized value, only if it is still the given one, so the next request builds it again."""
+    with _snapshot_memo_lock:
+        entry = _snapshot_memo["entries"].get(key)
+    if entry is not None:
+        with entry["lock"]:
+            if entry["value"] is value:
+                entry["value"] = _NOT_BUILT
+
+def _run_graph_task_for_rounds_snapshot(key: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run fn in the graph render pool once per rounds snapshot. The pending task itself is memoized so
+    concurrent requests wait on the same render instead of queueing duplicates.
+    """
+    future = _memoize_for_rounds_snapshot(key, lambda _: _graph_render_pool.submit(fn, *args))
+    try:
+        return _graph_render_pool.wait(future)
+    except Exception:
+        if future.done():
+            # failed render, let the next request try again instead of replaying the error all snapshot long
+            _forget_rounds_snapshot_entry(key, future)
+        raise
+
+def _resolve_player_name(player_name: str) -> str:
+    """Searched names are normalized like stored ones and resolved through the aliases, the rounds only carry canonical names."""
+    return persistence.resolve_player_name(data_service.normalize_player_name(player_name))
+
+def _get_rounds_frame() -> "analytics.RoundsFrame":
+    return _memoize_for_rounds_snapshot("rounds_frame", analytics.RoundsFrame.from_rounds)
+
+def _get_placement_metrics() -> "analytics.PlacementMetrics":
+    """One traversal of the rounds feeds the outlasted, itm, roi and first place leaderboards."""
+    rounds_frame = _get_rounds_frame()
+    return _memoize_for_rounds_snapshot("placement_metrics", lambda _: analytics.compute_placement_metrics(rounds_frame))
 
 def get_players_outlasted_leaderboard(min_rounds_required: int = None):
     if min_rounds_required in (None, 0):
         min_rounds_required = config.MINIMUM_ROUNDS_TO_ANALYZE_PLAYER
 
-    stored_rounds = persistence.get_all_rounds()
-    players_outlasted_leaderboard = analytics.build_players_outlasted_leaderboard(stored_rounds, min_rounds_required)
+    placement_metrics = _get_placement_metrics()
+    players_outlasted_leaderboard = analytics.build_players_outlasted_leaderboard(placement_metrics, min_rounds_required)
     return players_outlasted_leaderboard
 
 def get_roi_leaderboard(min_rounds_required: int = None):
     if min_rounds_required in (None, 0):
         min_rounds_required = config.MINIMUM_ROUNDS_TO_ANALYZE_PLAYER
 
-    stored_rounds = persistence.get_all_rounds()
-    roi_leaderboard = analytics.build_roi_leaderboard(stored_rounds, min_rounds_required)
+    placement_metrics = _get_placement_metrics()
+    roi_leaderboard = analytics.build_roi_leaderboard(placement_metrics, min_rounds_required)
     return roi_leaderboard
 
+def get_roi_what_if_leaderboard(payout_percent: float, steepness: float, min_rounds_required: int = None):
+    """ROI leaderboard under a different payout structure, payout tables are cached per structure so trying many is cheap."""
+    if min_rounds_required in (None, 0):
+        min_rounds_required = config.MINIMUM_ROUNDS_TO_ANALYZE_PLAYER
+
+    placement_metrics = _get_placement_metrics()
+    return analytics.build_roi_leaderboard(placement_metrics, min_rounds_required, payout_percent, steepness)
+
+def _get_trueskill_ratings():
+    # read only: resumes from the checkpoints the admin refresh persisted, newer rounds are replayed in memory
+    rounds_frame = _get_rounds_frame()
+    return _memoize_for_rounds_snapshot("trueskill_ratings", lambda _: analytics.load_trueskill_ratings(rounds_frame))
+
+def _get_rating_history():
+    trueskill_ratings = _get_trueskill_ratings()
+    return _memoize_for_rounds_snapshot("rating_history", lambda _: analytics.load_rating_history(
+        trueskill_ratings.engine.settings_key, trueskill_ratings.resumed_from_round, trueskill_ratings.rating_log
+    ))
+
 def get_trueskill_leaderboard():
-    stored_rounds = persistence.get_all_rounds()
-    trueskill_leaderboard = analytics.build_trueskill_leaderboard(stored_rounds)
+    trueskill_ratings = _get_trueskill_ratings()
+    trueskill_leaderboard = analytics.trueskill_leaderboard_to_dataframe(trueskill_ratings.engine.get_leaderboard())
     return trueskill_leaderboard
 
+def get_player_rating_history(player_name: str):
+    """A player's TrueSkill rating after every round they played."""
+    return _get_rating_history().player_curve(_resolve_player_name(player_name))
+
+def get_trueskill_leaderboard_as_of(round_date: str):
+    """TrueSkill leaderboard as it stood after all rounds played on or before round_date."""
+    leaderboard = _get_rating_history().leaderboard_as_of(round_date)
+    return analytics.trueskill_leaderboard_to_dataframe(leaderboard)
+
 def get_first_place_leaderboard(min_rounds_required: int = None):
     if min_rounds_required in (None, 0):
         min_rounds_required = config.MINIMUM_ROUNDS_TO_ANALYZE_PLAYER
     
-    stored_rounds = persistence.get_all_rounds()
-    first_place_leaderboard = analytics.build_1st_place_win_leaderboard(stored_rounds, min_rounds_required)
+    placement_metrics = _get_placement_metrics()
+    first_place_leaderboard = analytics.build_1st_place_win_leaderboard(placement_metrics, min_rounds_required)
     return first_place_leaderboard
 
 def get_itm_percentage_leaderboard(min_rounds_required: int = None):
     if min_rounds_required in (None, 0):
         min_rounds_required = config.MINIMUM_ROUNDS_TO_ANALYZE_PLAYER
 
-    stored_rounds = persistence.get_all_rounds()
-    itm_percentage_leaderboard = analytics.build_itm_percent_leaderboard(stored_rounds, min_rounds_required, config.PERCENT_FOR_ITM)
+    placement_metrics = _get_placement_metrics()
+    itm_percentage_leaderboard = analytics.build_itm_percent_leaderboard(placement_metrics, min_rounds_required, config.PERCENT_FOR_ITM)
     return itm_percentage_leaderboard
 
+def get_combined_placement_leaderboard(min_rounds_required: int = None):
+    if min_rounds_required in (None, 0):
+        min_rounds_required = config.MINIMUM_ROUNDS_TO_ANALYZE_PLAYER
+
+    placement_metrics = _get_placement_metrics()
+    return analytics.build_combined_placement_leaderboard(placement_metrics, min_rounds_required)
+
+def _find_rounds_frame(start_date: str = None, end_date: str = None, bar_ids: List[str] = None, player_names: List[str] = None) -> "analytics.RoundsFrame":
+    """Frame of only the matching rounds, filtered by the database instead of out of the cached full history."""
+    docs = persistence.find_round_documents(
+        start_date, end_date, bar_ids, player_names, projection=analytics.rounds_frame.ROUNDS_FRAME_FIELDS
+    )
+    return analytics.RoundsFrame.from_documents(docs)
+
+def get_filtered_placement_leaderboard(start_date: str = None, end_date: str = None, bar_ids: List[str] = None, min_rounds_required: int = 1):
+    """Overview leaderboard over a date range and/or some bars, backs the per month and per bar views."""
+    rounds_frame = _find_rounds_frame(start_date, end_date, bar_ids)
+    return analytics.build_combined_placement_leaderboard(rounds_frame, min_rounds_required)
+
+def get_player_round_results(player_name: str, start_date: str = None, end_date: str = None):
+    """One player's finishes, only that player's rounds are read."""
+    player_name = _resolve_player_name(player_name)
+    rounds_frame = _find_rounds_frame(start_date, end_date, player_names=[player_name])
+    return analytics.build_player_round_results(rounds_frame, player_name)
+
+def _get_player_graph():
+    """One co-occurrence build shared by the network graph and the community analysis."""
+    rounds_frame = _get_rounds_frame()
+    return _memoize_for_rounds_snapshot("player_graph", lambda _: analytics.build_player_graph(rounds_frame))
+
+def _get_graph_layout():
+    player_graph = _get_player_graph()
+    return _run_graph_task_for_rounds_snapshot("graph_layout", analytics.compute_graph_layout, player_graph)
+
+def _get_graph_rendering():
+    """Full league render with nobody highlighted, layout and colors are only computed once per rounds snapshot."""
+    player_graph = _get_player_graph()
+    graph_layout = _get_graph_layout()
+    trueskill_leaderboard = get_trueskill_leaderboard()
+    return _run_graph_task_for_rounds_snapshot(
+        "graph_rendering", analytics.render_graph, player_graph, None, NETWORK_GRAPH_TITLE, graph_layout, trueskill_leaderboard
+    )
+
 def get_network_graph_image(searched_player_name: str = None):
     """
     Generate a player network graph visualization.
     Returns BytesIO buffer containing the image.
     """
-    stored_rounds = persistence.get_all_rounds()
-    return analytics.generate_graph_image_buffer(stored_rounds, searched_player_name, "Player Network - TrueSkill Colored")
+    generation = persistence.get_rounds_snapshot().generation
+    graph_rendering = _get_graph_rendering()
+    if searched_player_name:
+        searched_player_name = _resolve_player_name(searched_player_name)
+    if not searched_player_name or searched_player_name not in graph_rendering.node_pixels:
+        return io.BytesIO(graph_rendering.png)
+
+    image = _graph_image_cache.get(generation, searched_player_name)
+    if image is None:
+        image = analytics.highlight_player(graph_rendering, searched_player_name).getvalue()
+        _graph_image_cache.put(generation, searched_player_name, image)
+    return io.BytesIO(image)
+
+def get_player_ego_graph_image(player_name: str, hops: int = 1, top_n_edges: int = None):
+    """
+    Network graph of just the players within hops of player_name, laid out and rendered on its own.
+    Returns None when the player never shared a round with anyone.
+    """
+    generation = persistence.get_rounds_snapshot().generation
+    player_graph = _get_player_graph()
+    player_name = _resolve_player_name(player_name)
+    if player_name not in player_graph:
+        return None
+
+    cache_key = ("ego", player_name, hops, top_n_edges)
+    image = _graph_image_cache.get(generation, cache_key)
+    if image is None:
+        ego_graph = analytics.build_ego_graph(player_graph, player_name, hops, top_n_edges)
+        title = f"{player_name} - {hops} Hop Player Network"
+        image = _graph_render_pool.run(analytics.render_ego_graph, ego_graph, player_name, title, get_trueskill_leaderboard())
+        _graph_image_cache.put(generation, cache_key, image)
+    return io.BytesIO(image)
+
+def get_graph_image_cache_stats():
+    return {**_graph_image_cache.stats(), "render_pool": _graph_render_pool.stats()}
+
+def _get_player_communities():
+    """Louvain is randomized, computing it once per snapshot keeps the graph data and the community analysis in agreement."""
+    player_graph = _get_player_graph()
+    return _memoize_for_rounds_snapshot("player_communities", lambda _: analytics.compute_community_labels(player_graph))
 
 def get_community_disconnectedness_analysis():
     stored_rounds = persistence.get_all_rounds()
-    return analytics.get_community_avg_disconnectedness_df(stored_rounds)
+    return analytics.get_community_avg_disconnectedness_df(stored_rounds, _get_player_graph(), _get_player_communities())
+
+def get_community_disconnectedness_over_time(num_slices: int = 5):
+    """Community disconnectedness for cumulative time slices of the round history, one row per player per slice."""
+    rounds_frame = _get_rounds_frame()
+    return _memoize_for_rounds_snapshot(
+        f"community_disconnectedness_over_time:{num_slices}",
+        lambda _: analytics.get_community_disconnectedness_over_time_df(rounds_frame, num_slices)
+    )
+
+def _get_graph_export():
+    player_graph = _get_player_graph()
+    graph_layout = _get_graph_layout()
+    trueskill_leaderboard = get_trueskill_leaderboard()
+    player_communities = _get_player_communities()
+    return _memoize_for_rounds_snapshot(
+        "graph_export", lambda _: analytics.build_graph_export(player_graph, graph_layout, trueskill_leaderboard, player_communities)
+    )
+
+def get_network_graph_data(min_edge_weight: int = 1, max_nodes: int = None, max_edges: int = None, precision: int = 3):
+    """Nodes with cached layout coordinates, colors and communities plus weighted edges, for client side rendering."""
+    return _get_graph_export().to_dict(min_edge_weight, max_nodes, max_edges, precision)